@@ -0,0 +1,91 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# benchmarks/import_time.py
+#
+# Import-time guard for the assistants. Collects each entry point's
+# module-level imports, times them with `python -X importtime` in a fresh
+# interpreter and fails when an entry point exceeds its budget, so a heavy
+# top-level import (torch, langchain, an SDK) can't creep back into startup.
+#
+#   python3 benchmarks/import_time.py
+#   python3 benchmarks/import_time.py --top 15 local_llm_assistant.py
+import os
+import ast
+import sys
+import argparse
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds of cumulative import time allowed per entry point.
+BUDGETS_MS = {
+    "openai_assistant.py": 300,
+    "claude_assistant.py": 300,
+    "groq_assistant.py": 300,
+    "gemini_assistant.py": 300,
+    "venice_assistant.py": 300,
+    "local_llm_assistant.py": 400,
+    "multi_ai_query.py": 400,
+}
+
+
+def top_level_imports(path):
+    # Only module-level statements; imports inside functions are already lazy.
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    lines = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            lines.extend(f"import {alias.name}" for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            lines.append(f"import {node.module}")
+    return lines
+
+
+def measure(imports):
+    # Returns ({module: cumulative_us}, total_us, error); error is the failing import's message.
+    code = "\n".join(imports)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {}, 0, proc.stderr.strip().splitlines()[-1]
+    times, total = {}, 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        times[module] = int(cumulative)
+        if not name[:len(name) - len(name.lstrip())].startswith("  "):
+            total += int(cumulative)  # top-level entry: nested modules are already included
+    return times, total, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Module-level import time per assistant")
+    parser.add_argument("scripts", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument("--top", type=int, default=5, help="slowest modules to list per entry point")
+    args = parser.parse_args()
+
+    failed = False
+    for script in args.scripts:
+        imports = top_level_imports(os.path.join(PROJECT_ROOT, script))
+        times, total_us, error = measure(imports)
+        if error:
+            print(f"{script}: skipped ({error})")
+            continue
+        budget = BUDGETS_MS.get(script)
+        total_ms = total_us / 1000
+        over = budget is not None and total_ms > budget
+        failed |= over
+        status = "OVER BUDGET" if over else "ok"
+        print(f"{script}: {total_ms:.0f}ms (budget {budget}ms) {status}")
+        for module, us in sorted(times.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"    {us / 1000:8.1f}ms  {module}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# benchmarks/memory_bench.py
+#
+# End-to-end benchmark of the memory path as memory grows: saving an entry,
+# loading the log cold and warm, embedding it and answering retrieval
+# queries. Each size starts from a synthetic legacy memory_db.json, which is
+# also timed the old way (json.load / full rewrite) for comparison.
+#
+# Embeddings come from a hashed bag-of-words stub, so the suite runs offline
+# with no model download; it measures the storage/index path, not MiniLM.
+# Every size runs in its own process so peak RSS is per size.
+#
+#   python3 benchmarks/memory_bench.py                    # 1k, 10k, 100k, 1M
+#   python3 benchmarks/memory_bench.py --sizes 1000 10000 --ann exact
+#   python3 benchmarks/memory_bench.py --backend sqlite      # + FTS5 keyword latency
+import os
+import sys
+import json
+import time
+import zlib
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.memory_store import MemoryStore
+from utils.sqlite_memory import SqliteMemoryStore
+from utils.embedding_index import PersistentEmbeddingIndex
+from utils.ann_index import make_ann_index
+from tabulate import tabulate
+
+VOCAB_SIZE = 20000
+# Exact identifiers keyword_search must find, wherever they sit in a sentence.
+KEYWORD_CHECKS = [
+    ("The build hash was a1b2c3d4. Deploy went fine.", "a1b2c3d4"),
+    ("It is in Paris.", "Paris"),
+    ("Pinned the client to v1.2.3, then retried.", "v1.2.3"),
+    ("Set max_retries in config.yaml before the run.", "config.yaml"),
+]
+SYLLABLES = ["ka", "to", "mi", "ra", "ne", "su", "lo", "vi", "de", "po", "an", "el", "or", "us", "in"]
+
+
+def vocabulary(size=VOCAB_SIZE):
+    words = []
+    for i in range(size):
+        word, n = "", i + len(SYLLABLES)
+        while n:
+            n, r = divmod(n, len(SYLLABLES))
+            word += SYLLABLES[r]
+        words.append(word)
+    return words
+
+
+def synthetic_entries(n, seed=0):
+    # local_llm-shaped records with Zipf-distributed words, like real prose.
+    rng = np.random.default_rng(seed)
+    words = vocabulary()
+    lengths = rng.integers(10, 40, n)
+    ids = (rng.zipf(1.3, int(lengths.sum())) - 1) % VOCAB_SIZE
+    base = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, 0))
+    entries, pos = [], 0
+    for i, length in enumerate(lengths):
+        entries.append({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(base + i * 60)),
+            "source": "local_llm:tinyllama",
+            "content": " ".join(words[j] for j in ids[pos:pos + length]),
+        })
+        pos += length
+    return entries
+
+
+def stub_encoder(dim=384):
+    # Hashed bag-of-words, L2-normalised; same interface as the MiniLM encoder.
+    def encode(texts):
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in text.split():
+                h = zlib.crc32(token.encode("utf-8"))
+                out[i, h % dim] += 1.0 if h & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+    return encode
+
+
+def percentiles(samples, *ps):
+    return [float(np.percentile(samples, p)) for p in ps]
+
+
+def drop_page_cache(directory):
+    # Best effort "cold" read: ask the kernel to forget the files' cached pages.
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for root, _, files in os.walk(directory):
+        for name in files:
+            with open(os.path.join(root, name), "rb") as f:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def open_store(backend, directory):
+    if backend == "sqlite":
+        return SqliteMemoryStore(os.path.join(directory, "memory.sqlite"))
+    return MemoryStore(directory)
+
+
+def run_size(n, workdir, ann="ivf", saves=200, queries=200, k=5, backend="segments"):
+    directory = tempfile.mkdtemp(prefix=f"memory_bench_{n}_", dir=workdir)
+    try:
+        entries = synthetic_entries(n)
+        legacy_file = os.path.join(directory, "memory_db.json")
+        start = time.perf_counter()
+        with open(legacy_file, "w") as f:
+            json.dump(entries, f, indent=2)  # what save_memory used to do per entry
+        legacy_save = time.perf_counter() - start
+        drop_page_cache(directory)
+        start = time.perf_counter()
+        with open(legacy_file) as f:
+            json.load(f)
+        legacy_load = time.perf_counter() - start
+
+        store = open_store(backend, directory)  # migrates memory_db.json
+        latencies = []
+        for i in range(saves):
+            entry = {"timestamp": entries[-1]["timestamp"], "source": "bench", "content": f"new memory {i}"}
+            start = time.perf_counter()
+            store.append(entry)
+            latencies.append(time.perf_counter() - start)
+        store.close()
+
+        drop_page_cache(directory)
+        start = time.perf_counter()
+        store = open_store(backend, directory)
+        loaded = store.load()
+        cold_load = time.perf_counter() - start
+        start = time.perf_counter()
+        store.load()
+        warm_load = time.perf_counter() - start
+
+        texts = [e["content"] for e in loaded]
+        del loaded, entries
+        prefix = os.path.join(directory, "embeddings")
+        index = PersistentEmbeddingIndex(stub_encoder(), prefix, model_name="stub-hash", ann=make_ann_index(ann))
+        start = time.perf_counter()
+        encoded = index.sync(texts)
+        embed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = PersistentEmbeddingIndex(stub_encoder(), prefix, model_name="stub-hash", ann=make_ann_index(ann))
+        index.sync(texts)
+        reopen = time.perf_counter() - start
+
+        rng = np.random.default_rng(1)
+        picks = [texts[i].split() for i in rng.integers(0, len(texts), queries)]
+        qs = [" ".join(words[:max(3, len(words) // 2)]) for words in picks]
+        start = time.perf_counter()
+        index.search(qs[0], top_k=k)  # trains the ANN structure when one is used
+        first_query = time.perf_counter() - start
+        query_latencies = []
+        for q in qs:
+            start = time.perf_counter()
+            index.search(q, top_k=k)
+            query_latencies.append(time.perf_counter() - start)
+
+        keyword_latencies = []
+        if backend == "sqlite":
+            for q in qs:
+                start = time.perf_counter()
+                store.keyword_search(q, limit=k)
+                keyword_latencies.append(time.perf_counter() - start)
+            store.append_many([{"source": "bench", "content": text} for text, _ in KEYWORD_CHECKS])
+            for text, query in KEYWORD_CHECKS:
+                if not any(e.get("content") == text for e, _ in store.keyword_search(query, limit=k)):
+                    raise AssertionError(f"keyword_search({query!r}) missed {text!r}")
+        store.close()
+
+        save_p50, save_p95 = percentiles(np.array(latencies) * 1e6, 50, 95)
+        q50, q95, q99 = percentiles(np.array(query_latencies) * 1000, 50, 95, 99)
+        return {
+            "memories": n,
+            "save_p50_us": save_p50, "save_p95_us": save_p95,
+            "legacy_save_ms": legacy_save * 1000, "legacy_load_ms": legacy_load * 1000,
+            "cold_load_ms": cold_load * 1000, "warm_load_ms": warm_load * 1000,
+            "embed_rows_per_s": encoded / embed if embed else 0.0,
+            "reopen_ms": reopen * 1000, "first_query_ms": first_query * 1000,
+            "query_p50_ms": q50, "query_p95_ms": q95, "query_p99_ms": q99,
+            "keyword_p50_ms": percentiles(np.array(keyword_latencies) * 1000, 50)[0] if keyword_latencies else None,
+            "keyword_p95_ms": percentiles(np.array(keyword_latencies) * 1000, 95)[0] if keyword_latencies else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def report(sizes, ann, workdir=None, saves=200, queries=200, backend="segments"):
+    rows = []
+    for n in sizes:
+        # A fresh interpreter per size keeps ru_maxrss meaningful.
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(n), "--ann", ann,
+                               "--backend", backend,
+                               "--saves", str(saves), "--queries", str(queries)]
+                              + (["--workdir", workdir] if workdir else []),
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"[!] {n} memories failed:\n{proc.stderr}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        rows.append([r["memories"], f"{r['save_p50_us']:.0f}", f"{r['save_p95_us']:.0f}",
+                     f"{r['legacy_save_ms']:.0f}", f"{r['legacy_load_ms']:.0f}",
+                     f"{r['cold_load_ms']:.0f}", f"{r['warm_load_ms']:.0f}",
+                     f"{r['embed_rows_per_s']:.0f}", f"{r['reopen_ms']:.0f}", f"{r['first_query_ms']:.0f}",
+                     f"{r['query_p50_ms']:.2f}", f"{r['query_p95_ms']:.2f}", f"{r['query_p99_ms']:.2f}",
+                     f"{r['peak_rss_mb']:.0f}"]
+                    + ([f"{r['keyword_p50_ms']:.2f}", f"{r['keyword_p95_ms']:.2f}"] if backend == "sqlite" else []))
+        print(f"[+] {n:>8} memories done (peak RSS {r['peak_rss_mb']:.0f} MB)")
+    print(tabulate(rows, headers=["Memories", "Save p50 µs", "Save p95 µs", "Legacy save ms", "Legacy load ms",
+                                  "Cold load ms", "Warm load ms", "Embed rows/s", "Reopen ms",
+                                  "1st query ms", "Query p50 ms", "Query p95 ms", "Query p99 ms",
+                                  "Peak RSS MB"]
+                   + (["Keyword p50 ms", "Keyword p95 ms"] if backend == "sqlite" else []), tablefmt="github"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory store and retrieval benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--ann", default=os.getenv("SUPERBRAIN_ANN", "int8"), help="exact | ivf | hnsw | int8 | binary")
+    parser.add_argument("--backend", default="segments", choices=["segments", "sqlite"])
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--workdir", help="where to build the synthetic memory (default: system temp)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run_size(args.child, args.workdir, args.ann, args.saves, args.queries,
+                                  backend=args.backend)))
+    else:
+        report(args.sizes, args.ann, args.workdir, args.saves, args.queries, args.backend)
@@ -5,66 +5,58 @@
 import os
 import subprocess
 import sys
-import base64
-import getpass
-import hashlib
 from datetime import datetime, timezone
-from cryptography.fernet import Fernet
-import anthropic
+from utils.providers import registry
+from utils.sdk_updates import FAST_START, schedule_sdk_update
+from utils.memory_store import append_entry
+from utils.streaming import STREAM_ENABLED, stream_claude, stream_to_console
+from utils.response_cache import get_cache, enable_semantic_from_env
+from utils.embedding_index import lazy_sentence_transformer_encoder
+from utils import metrics
 
 # 🔄 Ensure latest Claude SDK (Anthropic)
 def ensure_latest_anthropic():
+    if FAST_START:
+        schedule_sdk_update("anthropic")
+        return
     try:
         print("[🔄] Checking for Anthropic SDK updates...")
         subprocess.run([os.path.join(sys.prefix, "bin", "pip"), "install", "--upgrade", "anthropic", "--break-system-packages"], check=True)
+        import anthropic
         print(f"[ℹ️] Anthropic SDK version: {anthropic.__version__}")
     except Exception as e:
         print(f"[!] Failed to update Claude SDK: {e}")
 
 ensure_latest_anthropic()
 
-# 🔐 Encrypted API key storage
-KEY_FILE = os.path.expanduser("~/.claude_api.enc")
-SECRET = hashlib.sha256(getpass.getuser().encode()).digest()
-FERNET_KEY = base64.urlsafe_b64encode(SECRET[:32])
-fernet = Fernet(FERNET_KEY)
-
-def save_encrypted_api_key(api_key):
-    with open(KEY_FILE, "wb") as f:
-        f.write(fernet.encrypt(api_key.encode()))
-
-def load_encrypted_api_key():
-    if not os.path.exists(KEY_FILE):
-        return None
-    try:
-        with open(KEY_FILE, "rb") as f:
-            return fernet.decrypt(f.read()).decode()
-    except:
-        return None
-
+# 🔐 Encrypted API key storage (shared provider registry)
 def get_valid_claude_client():
     for _ in range(2):
-        api_key = load_encrypted_api_key()
-        if not api_key:
+        if not registry.key("Claude"):
             print("[🔐] Missing Claude (Anthropic) API Key. Get it at https://console.anthropic.com/account/keys")
-            api_key = input("Paste Claude API Key: ")
-            save_encrypted_api_key(api_key)
+            registry.save_key("Claude", input("Paste Claude API Key: "))
         else:
             print("[🔑] Reusing encrypted Claude API Key.")
+            if FAST_START:
+                # Skip the network round-trip; a bad key surfaces on the first request.
+                return registry.client("Claude")
 
         try:
-            client = anthropic.Anthropic(api_key=api_key)
+            client = registry.client("Claude")
             _ = client.models.list()
             return client
         except Exception as e:
             print(f"[!] Stored API key failed: {e}\n[↩️] Please enter a new one.")
-            os.remove(KEY_FILE)
+            registry.forget_key("Claude")
 
     print("[❌] Failed to authenticate after retry.")
     exit(1)
 
 client = get_valid_claude_client()
 model = os.getenv("CLAUDE_MODEL", "claude-3-opus-20240229")
+params = {"max_tokens": 1000}
+cache = get_cache()
+enable_semantic_from_env(lazy_sentence_transformer_encoder)
 
 print("\n🤖 [Claude Assistant] — Type 'exit' to quit.\n")
 
@@ -72,13 +64,32 @@ while True:
     user_input = input("You: ")
     if user_input.lower() in ("exit", "quit"):
         break
+    cached = cache.get("Claude", model, user_input, params)
+    if cached is not None:
+        print("Claude (cached):", cached)
+        continue
     try:
-        response = client.messages.create(
-            model=model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": user_input}]
-        )
-        print("Claude:", response.content[0].text)
+        messages = [{"role": "user", "content": user_input}]
+        if STREAM_ENABLED:
+            usage = {}
+            answer, _ = stream_to_console(stream_claude(client, model, messages, usage=usage, **params), "Claude",
+                                          prefix="Claude: ", usage=usage, provider="Claude")
+        else:
+            response = metrics.record_call("Claude", client.messages.create,
+                model=model,
+                messages=messages,
+                **params
+            )
+            answer = response.content[0].text
+            print("Claude:", answer)
+        cache.put("Claude", model, user_input, answer, params)
+        append_entry({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "source": "Claude",
+            "model": model,
+            "prompt": user_input,
+            "response": answer
+        })
     except Exception as e:
         print(f"[!] Error: {e}")
 
@@ -1,11 +1,7 @@
 import os
+from utils.providers import KEY_FILES
 
-key_files = {
-    "OpenAI": "~/.openai_api.enc",
-    "Claude": "~/.claude_api.enc",
-    "Gemini": "~/.gemini_api.enc",
-    "Groq": "~/.groq_api.enc"
-}
+key_files = KEY_FILES
 
 print("🔐 SuperBrain Key Cleaner\n--------------------------")
 for name, path in key_files.items():
@@ -5,14 +5,20 @@
 import os
 import subprocess
 import sys
-import base64
-import getpass
-import hashlib
-from cryptography.fernet import Fernet
 from datetime import datetime, timezone
+from utils.providers import registry
+from utils.sdk_updates import FAST_START, schedule_sdk_update
+from utils.memory_store import append_entry
+from utils.streaming import STREAM_ENABLED, stream_gemini, stream_to_console
+from utils.response_cache import get_cache, enable_semantic_from_env
+from utils.embedding_index import lazy_sentence_transformer_encoder
+from utils import metrics
 
 # 🔄 Ensure latest Gemini SDK
 def ensure_latest_gemini():
+    if FAST_START:
+        schedule_sdk_update("google-generativeai")
+        return
     try:
         print("[🔄] Checking for Gemini SDK updates...")
         subprocess.run([
@@ -26,44 +32,26 @@ def ensure_latest_gemini():
 
 ensure_latest_gemini()
 
-# 🔐 Secure API key store
-KEY_FILE = os.path.expanduser("~/.gemini_api.enc")
-SECRET = hashlib.sha256(getpass.getuser().encode()).digest()
-FERNET_KEY = base64.urlsafe_b64encode(SECRET[:32])
-fernet = Fernet(FERNET_KEY)
-
-def save_encrypted_api_key(api_key):
-    with open(KEY_FILE, "wb") as f:
-        f.write(fernet.encrypt(api_key.encode()))
-
-def load_encrypted_api_key():
-    if not os.path.exists(KEY_FILE):
-        return None
-    try:
-        with open(KEY_FILE, "rb") as f:
-            return fernet.decrypt(f.read()).decode()
-    except:
-        return None
-
+# 🔐 Secure API key store (shared provider registry)
 # Load or validate API key
-import google.generativeai as genai
 def get_valid_gemini_client():
     for _ in range(2):
-        api_key = load_encrypted_api_key()
-        if not api_key:
+        if not registry.key("Gemini"):
             print("[🔐] Missing Gemini API Key. Get yours at https://makersuite.google.com/app/apikey")
-            api_key = input("Paste Gemini API Key: ")
-            save_encrypted_api_key(api_key)
+            registry.save_key("Gemini", input("Paste Gemini API Key: "))
         else:
             print("[🔑] Reusing encrypted Gemini API Key.")
+            if FAST_START:
+                # Skip the network round-trip; a bad key surfaces on the first request.
+                return registry.key("Gemini"), None
 
         try:
-            genai.configure(api_key=api_key)
-            models = genai.list_models()
-            return api_key, models
+            genai = registry.client("Gemini")
+            models = list(genai.list_models())
+            return registry.key("Gemini"), models
         except Exception as e:
             print(f"[!] Stored API key failed: {e}\n[↩️] Please enter a new one.")
-            os.remove(KEY_FILE)
+            registry.forget_key("Gemini")
 
     print("[❌] Failed to authenticate after retry.")
     exit(1)
@@ -71,20 +59,26 @@ def get_valid_gemini_client():
 api_key, all_models = get_valid_gemini_client()
 
 # 🔍 Choose a valid model
-supported_models = [
-    m.name for m in all_models
-    if "generateContent" in m.supported_generation_methods
-    and "vision" not in m.name
-    and not m.name.endswith("deprecated")
-]
-print("[📋] Supported models:", supported_models)
-
-model_name = os.getenv("GEMINI_MODEL")
-if model_name not in supported_models:
-    model_name = "models/gemini-1.5-flash" if "models/gemini-1.5-flash" in supported_models else supported_models[0]
-    print(f"[⚙️] Using fallback model: {model_name}")
-
-model = genai.GenerativeModel(model_name)
+if all_models is None:
+    # Fast start: trust GEMINI_MODEL or the default instead of listing models.
+    model_name = os.getenv("GEMINI_MODEL", "models/gemini-1.5-flash")
+else:
+    supported_models = [
+        m.name for m in all_models
+        if "generateContent" in m.supported_generation_methods
+        and "vision" not in m.name
+        and not m.name.endswith("deprecated")
+    ]
+    print("[📋] Supported models:", supported_models)
+
+    model_name = os.getenv("GEMINI_MODEL")
+    if model_name not in supported_models:
+        model_name = "models/gemini-1.5-flash" if "models/gemini-1.5-flash" in supported_models else supported_models[0]
+        print(f"[⚙️] Using fallback model: {model_name}")
+
+model = registry.gemini_model(model_name)
+cache = get_cache()
+enable_semantic_from_env(lazy_sentence_transformer_encoder)
 
 print("\n🤖 [Gemini Assistant] — Type 'exit' to quit.\n")
 
@@ -92,9 +86,27 @@ while True:
     user_input = input("You: ")
     if user_input.lower() in ("exit", "quit"):
         break
+    cached = cache.get("Gemini", model_name, user_input)
+    if cached is not None:
+        print("Gemini (cached):", cached)
+        continue
     try:
-        response = model.generate_content(user_input)
-        print("Gemini:", response.text)
+        if STREAM_ENABLED:
+            usage = {}
+            answer, _ = stream_to_console(stream_gemini(model, user_input, usage), "Gemini", prefix="Gemini: ",
+                                          usage=usage, provider="Gemini")
+        else:
+            response = metrics.record_call("Gemini", model.generate_content, user_input)
+            answer = response.text
+            print("Gemini:", answer)
+        cache.put("Gemini", model_name, user_input, answer)
+        append_entry({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "source": "Gemini",
+            "model": model_name,
+            "prompt": user_input,
+            "response": answer
+        })
     except Exception as e:
         print(f"[!] Error: {e}")
 
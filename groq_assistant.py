@@ -5,15 +5,20 @@
 import os
 import subprocess
 import sys
-import base64
-import getpass
-import hashlib
 from datetime import datetime, timezone
-from cryptography.fernet import Fernet
-from groq import Groq
+from utils.providers import registry
+from utils.sdk_updates import FAST_START, schedule_sdk_update
+from utils.memory_store import append_entry
+from utils.streaming import STREAM_ENABLED, stream_chat_completion, stream_to_console
+from utils.response_cache import get_cache, enable_semantic_from_env
+from utils.embedding_index import lazy_sentence_transformer_encoder
+from utils import metrics
 
 # 🔄 Ensure latest Groq SDK
 def ensure_latest_groq():
+    if FAST_START:
+        schedule_sdk_update("groq")
+        return
     try:
         print("[🔄] Checking for Groq SDK updates...")
         subprocess.run([
@@ -27,49 +32,34 @@ def ensure_latest_groq():
 
 ensure_latest_groq()
 
-# 🔐 Encrypted API key storage
-KEY_FILE = os.path.expanduser("~/.groq_api.enc")
-SECRET = hashlib.sha256(getpass.getuser().encode()).digest()
-FERNET_KEY = base64.urlsafe_b64encode(SECRET[:32])
-fernet = Fernet(FERNET_KEY)
-
-def save_encrypted_api_key(api_key):
-    with open(KEY_FILE, "wb") as f:
-        f.write(fernet.encrypt(api_key.encode()))
-
-def load_encrypted_api_key():
-    if not os.path.exists(KEY_FILE):
-        return None
-    try:
-        with open(KEY_FILE, "rb") as f:
-            return fernet.decrypt(f.read()).decode()
-    except:
-        return None
-
+# 🔐 Encrypted API key storage (shared provider registry)
 # Load or prompt for API key
 def get_valid_groq_client():
     for _ in range(2):
-        api_key = load_encrypted_api_key()
-        if not api_key:
+        if not registry.key("Groq"):
             print("[🔐] Missing Groq API Key. Get yours at https://console.groq.com/api-keys")
-            api_key = input("Paste Groq API Key: ")
-            save_encrypted_api_key(api_key)
+            registry.save_key("Groq", input("Paste Groq API Key: "))
         else:
             print("[🔑] Reusing encrypted Groq API Key.")
+            if FAST_START:
+                # Skip the network round-trip; a bad key surfaces on the first request.
+                return registry.client("Groq")
 
         try:
-            test_client = Groq(api_key=api_key)
-            _ = test_client.models.list()
-            return test_client
+            client = registry.client("Groq")
+            _ = client.models.list()
+            return client
         except Exception as e:
             print(f"[!] Stored API key failed: {e}\n[↩️] Please enter a new one.")
-            os.remove(KEY_FILE)
+            registry.forget_key("Groq")
 
     print("[❌] Failed to authenticate after retry.")
     exit(1)
 
 client = get_valid_groq_client()
 model = os.getenv("GROQ_MODEL", "mixtral-8x7b-32768")
+cache = get_cache()
+enable_semantic_from_env(lazy_sentence_transformer_encoder)
 
 print("\n🤖 [Groq Assistant] — Type 'exit' to quit.\n")
 
@@ -77,12 +67,31 @@ while True:
     user_input = input("You: ")
     if user_input.lower() in ("exit", "quit"):
         break
+    cached = cache.get("Groq", model, user_input)
+    if cached is not None:
+        print("Groq (cached):", cached)
+        continue
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": user_input}]
-        )
-        print("Groq:", response.choices[0].message.content)
+        messages = [{"role": "user", "content": user_input}]
+        if STREAM_ENABLED:
+            usage = {}
+            answer, _ = stream_to_console(stream_chat_completion(client, model, messages, usage), "Groq",
+                                          prefix="Groq: ", usage=usage, provider="Groq")
+        else:
+            response = metrics.record_call("Groq", client.chat.completions.create,
+                model=model,
+                messages=messages
+            )
+            answer = response.choices[0].message.content
+            print("Groq:", answer)
+        cache.put("Groq", model, user_input, answer)
+        append_entry({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "source": "Groq",
+            "model": model,
+            "prompt": user_input,
+            "response": answer
+        })
     except Exception as e:
         print(f"[!] Error: {e}")
 
@@ -120,6 +120,18 @@ stop_resource_monitor() {
     fi
 }
 
+start_memory_daemon() {
+    # Shared memory service for assistants running in several terminals; a
+    # second start exits on its own, and the daemon stops itself when idle.
+    if [ "${SUPERBRAIN_MEMORY_DAEMON:-1}" != "0" ]; then
+        echo "[+] Starting memory daemon in the background..."
+        "$VENV_DIR/bin/python3" -m utils.memory_daemon > /dev/null 2>&1 &
+        # The daemon answers as soon as its socket is up; the index loads behind it.
+        "$VENV_DIR/bin/python3" -m utils.memory_daemon --wait 10 \
+            || echo "[!] Memory daemon not answering; assistants will use the memory files directly."
+    fi
+}
+
 # =============== MAIN MENU ===============
 echo ""
 echo "🧠 Welcome to SuperBrain Launcher"
@@ -143,6 +155,7 @@ echo ""
 read -p "Choose an assistant [1-11] or local LLM [a-z]: " choice
 
 OLLAMA_RUNNING=false
+start_memory_daemon
 
 case "$choice" in
     1) "$VENV_DIR/bin/python3" openai_assistant.py ;;
@@ -5,47 +5,90 @@
 # local_llm_assistant.py
 import sys
 import os
-import json
 import time
-import subprocess
-from sentence_transformers import SentenceTransformer, util
-import torch
-from langchain_community.llms import Ollama
+import queue
 from utils.logger import log_info, log_error, log_warning
-import sys
+from utils.memory_store import append_entry, load_entries, get_store
+from utils.sqlite_memory import hybrid_rank
+from utils.embedding_index import lazy_sentence_transformer_encoder, content_hash
+from utils.memory_indexer import MemoryIndexer, record_text, matches
+from utils.embedding_worker import EmbeddingWorker
+from utils.memory_daemon import connect as connect_memory_daemon, DaemonIndex
+from utils.context_builder import build_context
+from utils.sdk_updates import FAST_START
+from utils.streaming import STREAM_ENABLED, stream_ollama, stream_to_console
+from utils.response_cache import get_cache, enable_semantic_from_env
+from utils.ollama_manager import get_manager
+from utils.local_ensemble import GenerationScheduler, run_ensemble
+from tabulate import tabulate
 from datetime import datetime
 
-MEMORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory", "memory_db.json")
-
 def load_memory():
-    if os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, "r") as f:
-            return json.load(f)
-    return []
-
-def save_memory(entries):
-    os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(entries, f, indent=2)
+    return load_entries()
 
 def save_local_llm_entry(model, content):
-    entries = load_memory()
-    entries.append({
+    entry = {
         "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
         "source": f"local_llm:{model}",
         "content": content
-    })
-    save_memory(entries)
+    }
+    append_entry(entry)
+    return entry
 
 DEFAULT_MODEL = "tinyllama"
 model_name = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODEL
-llm = Ollama(model=model_name)
+# Talks to Ollama over HTTP; selecting a model starts loading it in the background.
+ollama = get_manager()
+llm = ollama.select(model_name)
+# Sized from this machine's cores and free RAM.
+ensemble_scheduler = GenerationScheduler()
+
+def get_llm():
+    global llm
+    if llm is None:
+        llm = ollama.select(model_name)
+    return llm
 
 # Load memory and embeddings
-memory_entries = load_memory()
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-texts = [entry["content"] for entry in memory_entries if "content" in entry]
-embeddings = embedding_model.encode(texts, convert_to_tensor=True) if texts else torch.empty(0)
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+EMBEDDING_DTYPE = os.getenv("SUPERBRAIN_EMBEDDING_DTYPE", "float32")  # or float16 to halve disk/RAM
+# int8 rescores its candidates, so results match exact search at a quarter of the scan;
+# ivf trades recall for speed (about 0.6 at 1M rows).
+ANN_BACKEND = os.getenv("SUPERBRAIN_ANN", "int8")  # exact | ivf | hnsw (needs hnswlib) | int8 | binary
+# sentence_transformers/torch load only when something actually needs encoding.
+memory_encoder = lazy_sentence_transformer_encoder(EMBEDDING_MODEL)
+embedding_worker = None
+
+def open_local_index():
+    # Every source's memories, partitioned by source/model under memory/index/;
+    # startup maps the vectors and encodes only new entries.
+    global embedding_worker
+    index = MemoryIndexer(memory_encoder, EMBEDDING_MODEL, dtype=EMBEDDING_DTYPE, ann=ANN_BACKEND)
+    encoded = index.sync(load_memory())
+    log_info("Memory index ready: %d entries in %d partitions, %d newly encoded.",
+             len(index), len(index.partitions), encoded, module="local_llm")
+    # New memories are encoded in the background and flushed on exit.
+    embedding_worker = EmbeddingWorker(encoder=memory_encoder)
+    return index
+
+# With the memory daemon running, searches go to its shared index and it
+# embeds whatever we save; otherwise (or once it stops) this process keeps its own index.
+memory_daemon = connect_memory_daemon()
+if memory_daemon is not None:
+    memory_index = DaemonIndex(memory_daemon, open_local_index)
+    daemon_stats = memory_index.stats()
+    if daemon_stats.get("loading"):
+        log_info("Using the memory daemon's index (still loading).", module="local_llm")
+    else:
+        log_info("Using the memory daemon's index (%d entries).", daemon_stats["indexed"], module="local_llm")
+else:
+    memory_index = open_local_index()
+# '/source <name> [model]' limits retrieval to one partition, e.g. only Venice answers.
+memory_filter = {"source": None, "model": None}
+
+# Semantic cache hits reuse the same MiniLM encoder as memory retrieval.
+response_cache = get_cache()
+enable_semantic_from_env(lambda: memory_encoder)
 
 FEEDBACK_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "feedback.log")
 
@@ -54,22 +97,30 @@ def record_feedback(user_query, model, response, feedback):
     timestamp = datetime.utcnow().isoformat()
     with open(FEEDBACK_LOG_FILE, "a") as f:
         f.write(f"[{timestamp}] Model: {model}, Question: {user_query}\nResponse: {response}\nFeedback: {feedback}\n\n")
-    log_info(f"Feedback recorded: {feedback}", module="local_llm")
+    log_info("Feedback recorded: %s", feedback, module="local_llm")
 
 def retrieve_relevant_memories(query, top_k=5, similarity_threshold=None):
-    if not embeddings.numel():
-        return []
-    query_embedding = embedding_model.encode(query, convert_to_tensor=True)
-    similarities = util.pytorch_cos_sim(query_embedding, embeddings)[0]
-    sorted_indices = torch.argsort(similarities, descending=True)[:top_k]
-    relevant_memories = [texts[i] for i in sorted_indices if similarity_threshold is None or similarities[i] >= similarity_threshold]
-    return relevant_memories
+    keyword_search = getattr(get_store(), "keyword_search", None)
+    if keyword_search is None:
+        return memory_index.search(query, top_k=top_k, similarity_threshold=similarity_threshold, **memory_filter)
+    # SQLite backend: BM25 catches exact names/identifiers the embeddings miss.
+    # Both lists carry the memory's id, so one memory is recalled once.
+    hits = memory_index.search(query, top_k=top_k, similarity_threshold=similarity_threshold, with_keys=True,
+                               **memory_filter)
+    keyword_hits = [(record_text(entry), score, content_hash(record_text(entry)))
+                    for entry, score in keyword_search(query, limit=top_k * 2)
+                    if record_text(entry) and matches(entry, **memory_filter)]
+    return hybrid_rank(hits, keyword_hits, top_k=top_k)
 
 def build_context_with_memory(user_query, use_memory=True, similarity_threshold=None):
     if use_memory:
-        relevant = retrieve_relevant_memories(user_query, similarity_threshold=similarity_threshold)
-        memory_snippets = "\n".join(f"- {r}" for r in relevant)
-        return f"The assistant has the following prior context:\n{memory_snippets}\n\nNow answer:\n{user_query}" if memory_snippets else user_query
+        # Over-fetch so MMR has alternatives to near-duplicates; the token budget decides how many fit.
+        hits = retrieve_relevant_memories(user_query, top_k=15, similarity_threshold=similarity_threshold)
+        embed = getattr(memory_index, "vectors", memory_encoder)  # stored vectors when the index is local
+        prompt, report = build_context(user_query, hits, embed, model_name)
+        if report.used:
+            print(f"[🧠] Using {report.used} memories, {report.tokens_used} tokens (saved {report.tokens_saved}).")
+        return prompt
     else:
         return user_query
 
@@ -77,98 +128,142 @@ def load_new_model(new_model_name):
     global llm
     global model_name
     try:
-        llm = Ollama(model=new_model_name)
+        llm = ollama.select(new_model_name)  # warms up while you type; the old model is unloaded once idle
         model_name = new_model_name
-        log_info(f"Model switched to: {model_name}", module="local_llm")
+        log_info("Model switched to: %s", model_name, module="local_llm")
         return True
     except Exception as e:
-        log_error(f"Error loading model '{new_model_name}': {e}", module="local_llm")
+        log_error("Error loading model '%s': %s", new_model_name, e, module="local_llm")
         return False
 
 def list_ollama_models_numbered():
-    try:
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, check=True)
-        models = result.stdout.strip().split('\n')[1:]  # Skip the header
-        if models:
-            print("\n[+] Available Ollama models:")
-            numbered_models = {}
-            for i, model_info in enumerate(models):
-                parts = model_info.split()
-                if parts:
-                    print(f"{i+1}. {parts[0]}")
-                    numbered_models[str(i+1)] = parts[0]
-            return numbered_models
-        else:
-            print("[!] No Ollama models found.")
-            return {}
-    except FileNotFoundError:
-        log_error("Ollama command not found.", module="local_llm")
-        return {}
-    except subprocess.CalledProcessError as e:
-        log_error(f"Error listing Ollama models: {e}", module="local_llm")
+    models = ollama.models()  # cached briefly; no subprocess per '/list' or '/model'
+    if not models:
+        print("[!] No Ollama models found (is 'ollama serve' running?).")
         return {}
+    print("\n[+] Available Ollama models:")
+    numbered_models = {}
+    for i, name in enumerate(models):
+        print(f"{i+1}. {name}")
+        numbered_models[str(i+1)] = name
+    return numbered_models
 
 def check_for_model_update(model_name):
-    try:
-        result = subprocess.run(['ollama', 'pull', '--dry-run', model_name], capture_output=True, text=True, check=False)
-        if "already up-to-date" not in result.stdout:
-            log_warning(f"Update found for Ollama model '{model_name}'.", module="local_llm")
-            return True
-        else:
-            log_info(f"Ollama model '{model_name}' is up-to-date.", module="local_llm")
-            return False
-    except FileNotFoundError:
-        log_error("Ollama command not found.", module="local_llm")
-        return False
-    except subprocess.CalledProcessError as e:
-        log_error(f"Error checking for model update: {e}", module="local_llm")
-        return False
+    # Digest comparison over HTTP; nothing is pulled and no 'ollama' process is started.
+    update = ollama.update_available(model_name)
+    if update:
+        log_warning("Update found for Ollama model '%s'.", model_name, module="local_llm")
+    elif update is False:
+        log_info("Ollama model '%s' is up-to-date.", model_name, module="local_llm")
+    return bool(update)
+
+# Pulls run in the background; the chat loop announces them when they finish.
+finished_pulls = queue.Queue()
 
 def update_model(model_name):
-    try:
-        log_info(f"Pulling latest version of Ollama model '{model_name}'.", module="local_llm")
-        result = subprocess.run(['ollama', 'pull', model_name], check=True)
-        log_info(f"Ollama model '{model_name}' updated successfully.", module="local_llm")
-        global llm
-        llm = Ollama(model=model_name) # Use the correct class name
-        return True
-    except FileNotFoundError:
-        log_error("Ollama command not found.", module="local_llm")
-        return False
-    except subprocess.CalledProcessError as e:
-        log_error(f"Error updating model '{model_name}': {e}", module="local_llm")
-        return False
+    job = ollama.pull(model_name, on_done=finished_pulls.put)
+    log_info("Pulling latest version of Ollama model '%s' in the background.", model_name, module="local_llm")
+    print(f"[⬇] Updating '{model_name}' in the background; '/pulls' shows progress.")
+    return job
 
 def download_new_model(model_name_to_download):
-    try:
-        log_info(f"Downloading Ollama model '{model_name_to_download}'.", module="local_llm")
-        result = subprocess.run(['ollama', 'pull', model_name_to_download], check=True, capture_output=True, text=True)
-        log_info(f"Ollama model '{model_name_to_download}' downloaded successfully.", module="local_llm")
-        print(f"[+] Model '{model_name_to_download}' downloaded. Use '/model' to switch.")
-        return True
-    except FileNotFoundError:
-        log_error("Ollama command not found.", module="local_llm")
-        print("[!] Error: Ollama command not found.")
-        return False
-    except subprocess.CalledProcessError as e:
-        log_error(f"Error downloading model '{model_name_to_download}': {e.stderr}", module="local_llm")
-        print(f"[!] Error downloading model '{model_name_to_download}': {e.stderr}")
-        return False
+    job = ollama.pull(model_name_to_download, on_done=finished_pulls.put)
+    log_info("Downloading Ollama model '%s' in the background.", model_name_to_download, module="local_llm")
+    print(f"[⬇] Downloading '{model_name_to_download}' in the background; keep chatting, '/pulls' shows progress.")
+    return job
+
+def remember_answer(model, user_input, response):
+    entry = save_local_llm_entry(model, user_input + "\n" + response)
+    if embedding_worker:
+        for index, passage, key in memory_index.route(entry):
+            embedding_worker.submit(passage, index=index, key=key)  # Encoded off the chat loop
+
+# '/ensemble' sends each question to these models at once instead of the current one.
+ensemble_models = []
+
+def set_ensemble(args):
+    global ensemble_models
+    if not args or args[0].lower() == "off":
+        ensemble_models = []
+        print("[-] Ensemble off; questions go to the current model.")
+        return
+    installed = ollama.models()
+    numbered = {str(i + 1): name for i, name in enumerate(installed)}
+    chosen = installed if args[0].lower() == "all" else [numbered.get(a, a) for a in args]
+    unknown = [m for m in chosen if m not in installed and with_tag(m) not in installed]
+    if unknown or len(chosen) < 2:
+        print(f"[!] Pick at least two installed models ({', '.join(unknown) or 'see /list'}).")
+        return
+    ensemble_models = chosen
+    print(f"[🤝] Ensemble: {', '.join(ensemble_models)}")
+
+def ask_ensemble(user_input, prompt):
+    print(f"\n[+] Asking {len(ensemble_models)} local models...\n")
+    results, pending = {}, []
+    for model in ensemble_models:
+        hit = response_cache.get("ollama", model, prompt)
+        if hit is not None:
+            results[model] = [model, "cached", "", "", hit]
+            print(f"[✓] {model} (cached): {preview(hit)}")
+        else:
+            pending.append(model)
+    for result in run_ensemble(ollama, prompt, pending, ensemble_scheduler) if pending else []:
+        if not result.ok:
+            results[result.model] = [result.model, f"{result.latency:.1f}", "", "", f"[Error: {result.error}]"]
+            print(f"[!] {result.summary()}")
+            continue
+        results[result.model] = [result.model, f"{result.latency:.1f}", f"{result.waited:.1f}",
+                                 f"{result.tokens_per_sec:.1f}", result.answer]
+        print(f"[✓] {result.summary()}: {preview(result.answer)}")
+        response_cache.put("ollama", result.model, prompt, result.answer)
+        remember_answer(result.model, user_input, result.answer)
+    print(tabulate([results[m] for m in ensemble_models if m in results],
+                   headers=["Model", "Latency s", "Queued s", "Tok/s", "Response"], tablefmt="fancy_grid"))
+
+def preview(text, width=100):
+    text = " ".join(str(text).split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+def with_tag(name):
+    return name if ":" in name else f"{name}:latest"
+
+def announce_finished_pulls():
+    global llm
+    while not finished_pulls.empty():
+        job = finished_pulls.get()
+        if job.ok:
+            print(f"[+] {job.summary()}. Use '/model' to switch.")
+            if with_tag(job.name) == with_tag(model_name):
+                llm = ollama.select(model_name)  # reload the updated weights
+        else:
+            print(f"[!] Downloading '{job.name}' {job.status}" + (f": {job.error}" if job.error else "."))
+
+def show_pulls():
+    jobs = list(ollama.pulls.values())
+    if not jobs:
+        print("[-] No downloads this session.")
+    for job in jobs:
+        print(f"  - {job.summary()}")
 
-# Check for update on startup
-if check_for_model_update(model_name):
+# Check for update on startup (fast start leaves this to '/update')
+if not FAST_START and check_for_model_update(model_name):
     if input(f"Do you want to update the Ollama model '{model_name}' now? (y/N): ").lower() == 'y':
         update_model(model_name)
 
 # Main loop
 while True:
-    print(f"\n🧠 Current model: {model_name}")
+    announce_finished_pulls()
+    print(f"\n🧠 Current model: {model_name}" + (f" (ensemble: {', '.join(ensemble_models)})" if ensemble_models else ""))
     print("Options: ")
     print("  - Type your question to chat.")
     print("  - '/model <number>' to switch model.")
     print("  - '/list' to see available models.")
-    print("  - '/update' to check for and update the current model.")
+    print("  - '/update' to pull the latest version of the current model.")
     print("  - '/download <model_name>' to download a new Ollama model (e.g., '/download llama3').")
+    print("  - '/pulls' to show download progress, '/cancel <model_name>' to stop one.")
+    print("  - '/ensemble <numbers or names | all>' to ask several models at once; '/ensemble off' to stop.")
+    print("  - '/stats' to show memory indexing progress.")
+    print("  - '/source <name> [model]' to only recall memories from one source (e.g. '/source venice'); '/source' for all.")
     print("  - '/exit' or '/quit' to exit.")
     user_input = input(">> ")
 
@@ -190,10 +285,34 @@ while True:
         list_ollama_models_numbered()
         continue
     elif user_input.lower() == "/update":
-        if check_for_model_update(model_name):
-            update_model(model_name)
+        update_model(model_name)  # an up-to-date model only has its manifest checked
+        continue
+    elif user_input.lower().split(" ")[0] == "/ensemble":
+        set_ensemble(user_input.split()[1:])
+        continue
+    elif user_input.lower() == "/pulls":
+        show_pulls()
+        continue
+    elif user_input.startswith("/cancel "):
+        job = ollama.pulls.get(user_input.split("/cancel ")[1].strip())
+        if job is not None and not job.done:
+            job.cancel()
+            print(f"[-] Cancelling download of '{job.name}'.")
         else:
-            print(f"[-] Ollama model '{model_name}' is already up-to-date.")
+            print("[!] No such download in progress. Use '/pulls' to see them.")
+        continue
+    elif user_input.lower() == "/stats":
+        daemon_stats = memory_index.stats() if embedding_worker is None else None
+        if embedding_worker is None:  # still None unless stats() just fell back to a local index
+            print(f"[📊] Memory daemon: {daemon_stats}")
+        else:
+            print(f"[📊] Memory index: {len(memory_index)} entries; embedding worker: {embedding_worker.summary()}")
+        continue
+    elif user_input.lower().split(" ")[0] == "/source":
+        args = user_input.split()[1:]
+        memory_filter["source"] = args[0] if args else None
+        memory_filter["model"] = args[1] if len(args) > 1 else None
+        print(f"[🔎] Recalling memories from: {' / '.join(args) if args else 'all sources'}")
         continue
     elif user_input.startswith("/download "):
         model_to_download = user_input.split("/download ")[1].strip()
@@ -216,13 +335,25 @@ while True:
                 print("[!] Invalid threshold. Using default.")
 
     prompt = build_context_with_memory(user_input, use_memory, similarity_threshold)
+    if ensemble_models:
+        ask_ensemble(user_input, prompt)
+        continue
     try:
-        response = llm(prompt)
-        print(f"\n🤖 {response}\n")
-        save_local_llm_entry(model_name, user_input + "\n" + response)
-        memory_entries = load_memory() # Reload memory to update embeddings
-        texts = [entry["content"] for entry in memory_entries if "content" in entry]
-        embeddings = embedding_model.encode(texts, convert_to_tensor=True) if texts else torch.empty(0)
+        # Keyed on the full prompt, so a different memory context is a different entry.
+        response = response_cache.get("ollama", model_name, prompt)
+        if response is not None:
+            print(f"\n🤖 (cached) {response}\n")
+        else:
+            if STREAM_ENABLED:
+                usage = {}
+                response, _ = stream_to_console(stream_ollama(get_llm(), prompt, usage), f"local_llm:{model_name}",
+                                                prefix="\n🤖 ", usage=usage)
+                print()
+            else:
+                response = get_llm()(prompt)
+                print(f"\n🤖 {response}\n")
+            response_cache.put("ollama", model_name, prompt, response)
+            remember_answer(model_name, user_input, response)
 
         # Get user feedback
         feedback = input("Was this response helpful? (y/n): ").lower()
@@ -232,7 +363,7 @@ while True:
             print("[!] Invalid feedback.")
 
     except Exception as e:
-        log_error(f"Error during Ollama interaction: {e}", module="local_llm")
+        log_error("Error during Ollama interaction: %s", e, module="local_llm")
         print(f"[!] Error: {e}")
 
 
@@ -4,173 +4,563 @@
 # © 2025 All Rights Reserved
 
 import os
+import sys
 import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from tabulate import tabulate
 
-# === Fallback Logger ===
-def log_info(msg, module="multi_ai_query"):
-    print(f"[INFO][{module}] {msg}")
-
-def log_error(msg, module="multi_ai_query"):
-    print(f"[ERROR][{module}] {msg}")
-
-def log_warning(msg, module="multi_ai_query"):
-    print(f"[WARN][{module}] {msg}")
+# === Logging ===
+from utils.logger import log_info, log_warning
 
 # === Memory ===
-MEMORY_FILE = "memory/memory_db.json"
-
-def save_entry(source, prompt, response):
-    os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-    memory = []
-    if os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, "r") as f:
-            memory = json.load(f)
-    memory.append({
+from utils.memory_store import append_entry, append_entries, MEMORY_DIR
+
+def memory_entry(provider, prompt, response):
+    # Saved under the provider and model that answered, like the single-provider
+    # assistants' memories, so '/source venice' finds them too.
+    return {
         "timestamp": datetime.utcnow().isoformat(),
-        "source": source,
+        "source": provider,
+        "model": MODELS[provider],
+        "via": "multi_ai_query",
         "prompt": prompt,
         "response": response
-    })
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=2)
-
-# === Encrypted Key Loader ===
-import base64, getpass, hashlib
-from cryptography.fernet import Fernet
-
-SECRET = hashlib.sha256(getpass.getuser().encode()).digest()
-FERNET_KEY = base64.urlsafe_b64encode(SECRET[:32])
-fernet = Fernet(FERNET_KEY)
-
-KEYS = {
-    "OpenAI": "~/.openai_api.enc",
-    "Claude": "~/.claude_api.enc",
-    "Gemini": "~/.gemini_api.enc",
-    "Groq": "~/.groq_api.enc",
-    "Venice": "~/.venice_api.enc"
+    }
+
+def save_entry(provider, prompt, response):
+    append_entry(memory_entry(provider, prompt, response))
+
+# === Provider Clients ===
+# Keys are decrypted once and clients/sessions are reused across calls.
+from utils.providers import registry, provider_timeout, VENICE_API_URL
+# utils.resilience retries; SDK retries on top would multiply every deadline.
+registry.sdk_retries = 0
+from utils.response_cache import get_cache, enable_semantic_from_env
+from utils.embedding_index import lazy_sentence_transformer_encoder
+from utils.resilience import (ProviderError, RETRYABLE_STATUS, call as resilient_call, retry_after_of,
+                              summary as resilience_summary, cancel_scope)
+
+MODELS = {
+    "OpenAI": "gpt-3.5-turbo",
+    "Claude": "claude-3-opus-20240229",
+    "Gemini": "models/gemini-1.5-flash",
+    "Groq": "mixtral-8x7b-32768",
+    "Venice": "llama-3.3-70b"
 }
 
-def load_encrypted_key(path):
-    path = os.path.expanduser(path)
-    if not os.path.exists(path):
-        return None
-    try:
-        with open(path, "rb") as f:
-            return fernet.decrypt(f.read()).decode()
-    except:
-        return None
+cache = get_cache()
+enable_semantic_from_env(lazy_sentence_transformer_encoder)
+
+CLAUDE_PARAMS = {"max_tokens": 500}
+
+def cached_reply(provider, prompt):
+    # The same lookup the get_*_response functions start with.
+    return cache.get(provider, MODELS[provider], prompt, CLAUDE_PARAMS if provider == "Claude" else None)
 
-# === AI Client Imports ===
-from openai import OpenAI
-from anthropic import Anthropic
-import google.generativeai as genai
-from groq import Groq
-import requests
+def remember(provider, prompt, reply, model=None, params=None):
+    # Caches a successful reply; error strings never reach this point.
+    cache.put(provider, model or MODELS[provider], prompt, reply, params)
+    return reply
 
 # === AI Response Functions ===
+# Each returns the reply text or raises ProviderError; utils.resilience adds
+# rate limiting, retries and a circuit breaker, so the SDKs' own retries are off.
+def missing_key(provider):
+    return ProviderError(provider, f"Missing {provider} Key")
+
 def get_openai_response(prompt):
-    key = load_encrypted_key(KEYS["OpenAI"])
-    if not key:
-        return "[Missing OpenAI Key]"
-    try:
-        client = OpenAI(api_key=key)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"[OpenAI Error: {e}]"
+    hit = cache.get("OpenAI", MODELS["OpenAI"], prompt)
+    if hit is not None:
+        return hit
+    client = registry.client("OpenAI")
+    if not client:
+        raise missing_key("OpenAI")
+    response = resilient_call("OpenAI", client.chat.completions.create,
+                              model=MODELS["OpenAI"],
+                              messages=[{"role": "user", "content": prompt}])
+    return remember("OpenAI", prompt, response.choices[0].message.content.strip())
 
 def get_claude_response(prompt):
-    key = load_encrypted_key(KEYS["Claude"])
-    if not key:
-        return "[Missing Claude Key]"
-    try:
-        client = Anthropic(api_key=key)
-        response = client.messages.create(
-            model="claude-3-opus-20240229",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text.strip()
-    except Exception as e:
-        return f"[Claude Error: {e}]"
+    hit = cache.get("Claude", MODELS["Claude"], prompt, CLAUDE_PARAMS)
+    if hit is not None:
+        return hit
+    client = registry.client("Claude")
+    if not client:
+        raise missing_key("Claude")
+    response = resilient_call("Claude", client.messages.create,
+                              model=MODELS["Claude"],
+                              messages=[{"role": "user", "content": prompt}],
+                              **CLAUDE_PARAMS)
+    return remember("Claude", prompt, response.content[0].text.strip(), params=CLAUDE_PARAMS)
 
 def get_gemini_response(prompt):
-    key = load_encrypted_key(KEYS["Gemini"])
-    if not key:
-        return "[Missing Gemini Key]"
-    try:
-        genai.configure(api_key=key)
-        model = genai.GenerativeModel("models/gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        return f"[Gemini Error: {e}]"
+    hit = cache.get("Gemini", MODELS["Gemini"], prompt)
+    if hit is not None:
+        return hit
+    model = registry.gemini_model(MODELS["Gemini"])
+    if not model:
+        raise missing_key("Gemini")
+    response = resilient_call("Gemini", model.generate_content, prompt,
+                              request_options={"timeout": provider_timeout("Gemini")})
+    return remember("Gemini", prompt, response.text.strip())
 
 def get_groq_response(prompt):
-    key = load_encrypted_key(KEYS["Groq"])
-    if not key:
-        return "[Missing Groq Key]"
-    try:
-        client = Groq(api_key=key)
-        response = client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"[Groq Error: {e}]"
-
-def get_venice_response(prompt, model="llama-3.3-70b"):
-    key = load_encrypted_key(KEYS["Venice"])
-    if not key:
-        return "[Missing Venice Key]"
-    try:
-        headers = {
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ]
-        }
-        r = requests.post("https://api.venice.ai/api/v1/chat/completions", headers=headers, json=payload)
-        if r.status_code == 200:
-            return r.json()["choices"][0]["message"]["content"].strip()
-        else:
-            return f"[Venice Error {r.status_code}]: {r.text}"
-    except Exception as e:
-        return f"[Venice Error: {e}]"
+    hit = cache.get("Groq", MODELS["Groq"], prompt)
+    if hit is not None:
+        return hit
+    client = registry.client("Groq")
+    if not client:
+        raise missing_key("Groq")
+    response = resilient_call("Groq", client.chat.completions.create,
+                              model=MODELS["Groq"],
+                              messages=[{"role": "user", "content": prompt}])
+    return remember("Groq", prompt, response.choices[0].message.content.strip())
+
+def get_venice_response(prompt, model=MODELS["Venice"]):
+    hit = cache.get("Venice", model, prompt)
+    if hit is not None:
+        return hit
+    session = registry.client("Venice")
+    if not session:
+        raise missing_key("Venice")
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": prompt}
+        ]
+    }
+
+    def post():
+        r = session.post(f"{VENICE_API_URL}/chat/completions", json=payload, timeout=provider_timeout("Venice"))
+        if r.status_code != 200:
+            error = ProviderError("Venice", r.text[:300], status=r.status_code,
+                                  retryable=r.status_code in RETRYABLE_STATUS, retry_after=retry_after_of(r))
+            raise error
+        return r.json()  # the guard reads token usage from it
+
+    response = resilient_call("Venice", post)
+    return remember("Venice", prompt, response["choices"][0]["message"]["content"].strip(), model)
+
+PROVIDERS = {
+    "OpenAI": get_openai_response,
+    "Claude": get_claude_response,
+    "Gemini": get_gemini_response,
+    "Groq": get_groq_response,
+    "Venice": get_venice_response
+}
 
 # === Main Query Execution ===
+def preview(text, width=100):
+    text = " ".join(str(text).split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+def fan_out(prompt, providers=None):
+    # Runs every provider concurrently, yielding (name, reply, seconds, error)
+    # as each finishes. A failed provider has reply=None and the error; one
+    # still running at its deadline has both None.
+    providers = providers or PROVIDERS
+    started = time.monotonic()
+    # Set at a provider's deadline (or when we return): it stops retrying and waiting.
+    cancels = {name: threading.Event() for name in providers}
+
+    def run(name, fn):
+        with cancel_scope(cancels[name]):
+            return fn(prompt)
+
+    pool = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="provider")
+    futures = {pool.submit(run, name, fn): name for name, fn in providers.items()}
+    deadlines = {name: started + provider_timeout(name) for name in providers}
+    pending = set(futures)
+    try:
+        while pending:
+            next_deadline = min(deadlines[futures[f]] for f in pending)
+            done, pending = wait(pending, timeout=max(0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    yield name, future.result(), time.monotonic() - started, None
+                except Exception as e:
+                    yield name, None, time.monotonic() - started, e
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines[futures[f]] <= now]:
+                pending.discard(future)
+                cancels[futures[future]].set()
+                yield futures[future], None, now - started, None
+    finally:
+        # Stragglers give up at their next retry or rate-limit wait. A request
+        # already on the wire ends by its SDK timeout (the deadline), and SDK
+        # retries are off, so the process can exit soon after.
+        for cancel in cancels.values():
+            cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
 def query_all(prompt):
     print(f"\n[+] Querying all AI models for: '{prompt}'...\n")
-    responses = {
-        "OpenAI": get_openai_response(prompt),
-        "Claude": get_claude_response(prompt),
-        "Gemini": get_gemini_response(prompt),
-        "Groq": get_groq_response(prompt),
-        "Venice": get_venice_response(prompt)
-    }
+    responses, entries = {}, []
+    for model, reply, elapsed, error in fan_out(prompt):
+        if error is not None:
+            responses[model] = f"[{error}]"
+            print(f"[✗] {model} ({elapsed:.1f}s): {error}")
+            continue
+        if reply is None:
+            responses[model] = f"[{model} Timeout after {provider_timeout(model):.0f}s]"
+            log_warning("%s missed its %.0fs deadline.", model, provider_timeout(model),
+                        module="multi_ai_query")
+            print(f"[⏱] {model} timed out after {elapsed:.1f}s")
+            continue
+        responses[model] = reply
+        entries.append(memory_entry(model, prompt, reply))
+        print(f"[✓] {model} ({elapsed:.1f}s): {preview(reply)}")
+
+    # One memory write for the whole fan-out; errors and timeouts are never saved.
+    append_entries(entries)
+    log_info("Saved %d responses to memory.", len(entries), module="multi_ai_query")
+
+    print(tabulate([[m, responses[m]] for m in PROVIDERS if m in responses], headers=["Model", "Response"], tablefmt="fancy_grid"))
 
-    for model, reply in responses.items():
-        save_entry("multi_ai_query", f"{model} → {prompt}", reply)
-        log_info(f"Saved {model} response to memory.")
+# === Fastest Answer ===
+# Hedged requests: the first successful answer wins and the rest are called
+# off. Racing starts every provider at once. Hedging starts them one at a
+# time, adding the next one only once the running one is slower than its
+# own SUPERBRAIN_HEDGE_PERCENTILE latency (or fails). That catches the slow
+# tail for a fraction of the extra requests.
+HEDGE_PERCENTILE = float(os.getenv("SUPERBRAIN_HEDGE_PERCENTILE", "90"))
+# Hedge delay for a provider with too little latency history.
+HEDGE_DEFAULT_DELAY = float(os.getenv("SUPERBRAIN_HEDGE_DELAY", "2"))
+LATENCY_FILE = os.path.join(MEMORY_DIR, "provider_latency.json")
+LATENCY_SAMPLES = 200
 
-    print(tabulate([[m, r] for m, r in responses.items()], headers=["Model", "Response"], tablefmt="fancy_grid"))
+class LatencyHistory:
+    # Recent successful latencies and hedge wins per provider, kept across runs.
+    def __init__(self, path=LATENCY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.samples = data.get("latency", {})
+        self.wins = data.get("wins", {})
+        self.saved = data.get("saved", {"seconds": 0.0, "queries": 0})
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self.samples.setdefault(name, [])
+            samples.append(round(seconds, 3))
+            del samples[:-LATENCY_SAMPLES]
+
+    def record_win(self, name):
+        with self._lock:
+            self.wins[name] = self.wins.get(name, 0) + 1
+
+    def record_saving(self, seconds):
+        with self._lock:
+            self.saved["seconds"] = round(self.saved["seconds"] + seconds, 3)
+            self.saved["queries"] += 1
+
+    def percentile(self, name, p):
+        samples = self.samples.get(name, [])
+        if len(samples) < 5:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"latency": self.samples, "wins": self.wins, "saved": self.saved}, f)
+            os.replace(tmp, self.path)
+
+class HedgeResult:
+    def __init__(self, winner, reply, seconds, launched, errors):
+        self.winner = winner
+        self.reply = reply
+        self.seconds = seconds
+        self.launched = launched  # providers that got a request, in order
+        self.errors = errors      # provider -> error for the ones that failed
+
+def fastest_answer(prompt, providers=None, hedge=False, history=None, on_saved=None):
+    # First successful reply among `providers` (in preference order). When
+    # someone other than the first provider wins, on_saved(first, seconds) is
+    # called once the first provider's own request finally ends, with the
+    # time the hedge saved.
+    names = list(providers or PROVIDERS)
+    history = history or LatencyHistory()
+    cancel = threading.Event()
+    started = time.monotonic()
+    deadline = started + max(provider_timeout(n) for n in names)
+
+    def run(name):
+        with cancel_scope(cancel):
+            if cached_reply(name, prompt) is not None:
+                # Instant, but not the provider's latency: kept out of the history
+                # so it doesn't drag the hedge delay towards zero.
+                return PROVIDERS[name](prompt)
+            t0 = time.monotonic()
+            reply = PROVIDERS[name](prompt)
+            history.record(name, time.monotonic() - t0)  # losers that finish still teach us their latency
+            return reply
+
+    def saving(primary, future, seconds):
+        # Only a primary that went on to answer shows what the hedge saved;
+        # one that failed or was called off would have saved nothing.
+        if future.cancelled() or future.exception() is not None:
+            return
+        history.record_saving(seconds)
+        try:
+            history.save()
+        except OSError:
+            pass
+        if on_saved is not None:
+            on_saved(primary, seconds)
+
+    pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="hedge")
+    futures, waiting, launched, errors = {}, list(names), [], {}
+    next_launch = None
+
+    def launch():
+        nonlocal next_launch
+        name = waiting.pop(0)
+        launched.append(name)
+        futures[pool.submit(run, name)] = name
+        delay = history.percentile(name, HEDGE_PERCENTILE) or HEDGE_DEFAULT_DELAY
+        next_launch = time.monotonic() + delay if hedge and waiting else None
+
+    try:
+        launch()
+        while not hedge and waiting:
+            launch()
+        pending = set(futures)
+        while pending or waiting:
+            if not pending:
+                launch()  # everything running failed: go straight to the next
+                pending = {f for f in futures if not f.done()}
+            until = min(t for t in (next_launch, deadline) if t is not None)
+            done, pending = wait(pending, timeout=max(0, until - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    reply = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    continue
+                seconds = time.monotonic() - started
+                history.record_win(name)
+                primary = next(f for f, n in futures.items() if n == launched[0])
+                if name != launched[0] and not primary.done():
+                    primary.add_done_callback(lambda f: saving(launched[0], f, time.monotonic() - started - seconds))
+                return HedgeResult(name, reply, seconds, launched, errors)
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if next_launch is not None and now >= next_launch and waiting:
+                launch()
+                pending |= {f for f in futures if not f.done()}
+        return HedgeResult(None, None, time.monotonic() - started, launched, errors)
+    finally:
+        cancel.set()  # losers stop retrying/waiting; requests on the wire are left to finish
+        pool.shutdown(wait=False, cancel_futures=True)
+        try:
+            history.save()
+        except OSError as e:
+            log_warning("Could not save provider latency history: %s", e, module="multi_ai_query")
+
+def query_fastest(prompt, providers=None, hedge=False):
+    mode = "hedging" if hedge else "racing"
+    names = list(providers or PROVIDERS)
+    print(f"\n[+] {mode.capitalize()} {', '.join(names)} for: '{prompt}'...\n")
+    history = LatencyHistory()
+
+    def report_saving(primary, seconds):
+        print(f"[⏱] {primary} finished {seconds:.1f}s after the winner; "
+              f"{mode} has saved {history.saved['seconds']:.1f}s over {history.saved['queries']} queries.")
+
+    result = fastest_answer(prompt, names, hedge, history, on_saved=report_saving)
+    for name, error in result.errors.items():
+        print(f"[✗] {name}: {error}")
+    if result.winner is None:
+        print(f"[!] No provider answered within {result.seconds:.1f}s.")
+        return None
+    append_entry(memory_entry(result.winner, prompt, result.reply))
+    print(f"[⚡] {result.winner} answered first in {result.seconds:.1f}s "
+          f"({len(result.launched)} of {len(names)} providers asked):\n")
+    print(result.reply)
+    wins = sorted(history.wins.items(), key=lambda item: -item[1])
+    print("\n[📊] Wins so far: " + ", ".join(f"{name} {count}" for name, count in wins))
+    log_info("Fastest answer: %s in %.2fs, launched %s.", result.winner, result.seconds, result.launched,
+             module="multi_ai_query")
+    return result
+
+# === Batch Mode ===
+# Requests in flight per provider; SUPERBRAIN_BATCH_CONCURRENCY_<PROVIDER> overrides one.
+BATCH_CONCURRENCY = int(os.getenv("SUPERBRAIN_BATCH_CONCURRENCY", "4"))
+BATCH_MEMORY_FLUSH = 50
+
+def batch_concurrency(name):
+    return int(os.getenv(f"SUPERBRAIN_BATCH_CONCURRENCY_{name.upper()}", BATCH_CONCURRENCY))
+
+def prompt_id(record):
+    return str(record["id"]) if record.get("id") is not None else hashlib.sha256(record["prompt"].encode("utf-8")).hexdigest()[:16]
+
+def iter_prompts(path):
+    # {"prompt": "...", "id": optional} per line; a bare JSON string is a prompt too.
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                log_warning("%s:%d: not JSON, skipped.", path, n, module="multi_ai_query")
+                continue
+            record = {"prompt": record} if isinstance(record, str) else record
+            if isinstance(record.get("prompt"), str) and record["prompt"].strip():
+                yield record
+
+def completed_pairs(path):
+    # (prompt id, provider) pairs already answered in an earlier run; errors are retried.
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a crash
+            if result.get("error") is None:
+                done.add((result["id"], result["provider"]))
+    return done
+
+class BatchWriter:
+    # Appends one JSON line per finished request, flushed so a crash loses at most the line being written.
+    def __init__(self, path, save_memory=True):
+        self.save_memory = save_memory
+        self._entries = []
+        self._lock = threading.Lock()
+        with open(path, "ab") as f:
+            if f.tell():
+                with open(path, "rb") as r:
+                    r.seek(-1, os.SEEK_END)
+                    torn = r.read(1) != b"\n"
+                if torn:
+                    f.write(b"\n")  # don't glue the next result onto a torn line
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, result):
+        with self._lock:
+            self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if self.save_memory and result["error"] is None:
+                self._entries.append(memory_entry(result["provider"], result["prompt"], result["response"]))
+                if len(self._entries) >= BATCH_MEMORY_FLUSH:
+                    self._flush_memory()
+
+    def _flush_memory(self):
+        entries, self._entries = self._entries, []
+        if entries:
+            append_entries(entries)
+
+    def close(self):
+        with self._lock:
+            self._flush_memory()
+            self._file.close()
+
+def run_batch(input_path, output_path, providers=None, save_memory=True, progress_every=5.0):
+    # Every prompt in input_path to every provider. Each provider reads the
+    # prompts at its own pace with its own bounded pool, so a slow or
+    # rate-limited provider never holds up the others. Results stream to
+    # output_path as they finish; rerunning resumes where it stopped.
+    providers = {name: PROVIDERS[name] for name in (providers or PROVIDERS)}
+    done = completed_pairs(output_path)
+    total = sum(1 for _ in iter_prompts(input_path))
+    writer = BatchWriter(output_path, save_memory)
+    counts = {name: {"done": sum(1 for _, p in done if p == name), "errors": 0, "skipped": 0} for name in providers}
+    counts_lock = threading.Lock()
+    started = time.monotonic()
+    if done:
+        log_info("Resuming: %d answers already in %s.", len(done), output_path, module="multi_ai_query")
+
+    def ask(name, fn, record):
+        t0 = time.monotonic()
+        reply, error = None, None
+        try:
+            reply = fn(record["prompt"])
+        except Exception as e:
+            error = str(e)
+        writer.write({"id": prompt_id(record), "provider": name,
+                      "model": MODELS[name], "prompt": record["prompt"],
+                      "response": reply, "error": error,
+                      "seconds": round(time.monotonic() - t0, 3),
+                      "timestamp": datetime.utcnow().isoformat()})
+        with counts_lock:
+            counts[name]["errors" if error else "done"] += 1
+
+    def feed(name, fn):
+        limit = batch_concurrency(name)
+        slots = threading.BoundedSemaphore(limit * 2)  # bounds queued work, not just running work
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"batch-{name}") as pool:
+            for record in iter_prompts(input_path):
+                if (prompt_id(record), name) in done:
+                    counts[name]["skipped"] += 1
+                    continue
+                slots.acquire()
+                pool.submit(ask, name, fn, record).add_done_callback(lambda _: slots.release())
+
+    feeders = [threading.Thread(target=feed, args=item, name=f"batch-feed-{item[0]}", daemon=True)
+               for item in providers.items()]
+    for t in feeders:
+        t.start()
+    try:
+        while any(t.is_alive() for t in feeders):
+            for t in feeders:
+                t.join(timeout=progress_every / len(feeders))
+            elapsed = time.monotonic() - started
+            print("[batch] " + "  ".join(
+                f"{name} {c['done']}/{total}" + (f" ({c['errors']} errors)" if c["errors"] else "")
+                for name, c in counts.items()) + f"  {elapsed:.0f}s", flush=True)
+    finally:
+        writer.close()
+    answered = sum(c["done"] - c["skipped"] for c in counts.values())
+    for line in resilience_summary():
+        log_info(line, module="multi_ai_query")
+    errors = sum(c["errors"] for c in counts.values())
+    log_info("Batch finished: %d new answers, %d errors in %.1fs; results in %s.",
+             answered, errors, time.monotonic() - started, output_path, module="multi_ai_query")
+    return counts
 
 # === Entry Point ===
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ask every AI provider the same question(s).")
+    parser.add_argument("--batch", metavar="PROMPTS.jsonl", help="run every prompt in a JSONL file headlessly")
+    parser.add_argument("--out", metavar="RESULTS.jsonl", help="where batch results go (default: <input>.results.jsonl)")
+    parser.add_argument("--providers", nargs="+", choices=list(PROVIDERS), help="only these providers")
+    parser.add_argument("--no-memory", action="store_true", help="don't save batch answers to memory")
+    parser.add_argument("--fastest", action="store_true",
+                        help="return only the first successful answer (providers raced at once)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="with --fastest: ask providers in the given order, adding the next only when "
+                             "the running one is slow or fails")
+    args = parser.parse_args()
+    if args.batch:
+        out = args.out or os.path.splitext(args.batch)[0] + ".results.jsonl"
+        counts = run_batch(args.batch, out, args.providers, save_memory=not args.no_memory)
+        sys.exit(1 if any(c["errors"] for c in counts.values()) else 0)
     print("\n🧠 [SuperBrain] Multi-AI Query")
     user_query = input("Prompt > ").strip()
-    if user_query:
+    if user_query and (args.fastest or args.hedge):
+        query_fastest(user_query, args.providers, hedge=args.hedge)
+    elif user_query:
         query_all(user_query)
     else:
         print("[!] No input provided.")
@@ -3,18 +3,22 @@
 # © 2025 All Rights Reserved — https://github.com/KatchDaVizion
 
 import os
-import json
 import subprocess
 import sys
-import base64
-import getpass
-import hashlib
 from datetime import datetime, timezone
-from cryptography.fernet import Fernet
-from openai import OpenAI
+from utils.memory_store import append_entry
+from utils.providers import registry
+from utils.sdk_updates import FAST_START, schedule_sdk_update
+from utils.streaming import STREAM_ENABLED, stream_chat_completion, stream_to_console
+from utils.response_cache import get_cache, enable_semantic_from_env
+from utils.embedding_index import lazy_sentence_transformer_encoder
+from utils import metrics
 
 # 🔄 Ensure the latest OpenAI SDK is installed
 def ensure_latest_openai():
+    if FAST_START:
+        schedule_sdk_update("openai")
+        return
     try:
         print("[🔄] Checking for OpenAI SDK updates...")
         subprocess.run([os.path.join(sys.prefix, "bin", "pip"), "install", "--upgrade", "openai", "--break-system-packages"], check=True)
@@ -25,86 +29,87 @@ def ensure_latest_openai():
 
 ensure_latest_openai()
 
-# 🔐 Encrypted API key storage
-KEY_FILE = os.path.expanduser("~/.openai_api.enc")
-SECRET = hashlib.sha256(getpass.getuser().encode()).digest()
-FERNET_KEY = base64.urlsafe_b64encode(SECRET[:32])
-fernet = Fernet(FERNET_KEY)
-
-def save_encrypted_api_key(api_key):
-    with open(KEY_FILE, "wb") as f:
-        f.write(fernet.encrypt(api_key.encode()))
-
-def load_encrypted_api_key():
-    if not os.path.exists(KEY_FILE):
-        return None
-    try:
-        with open(KEY_FILE, "rb") as f:
-            return fernet.decrypt(f.read()).decode()
-    except:
-        return None
-
+# 🔐 Encrypted API key storage (shared provider registry)
 # Load or prompt for API key
 def get_valid_openai_client():
     for _ in range(2):
-        api_key = load_encrypted_api_key()
-        if not api_key:
+        if not registry.key("OpenAI"):
             print("[🔐] Missing OpenAI API Key. Get yours at https://platform.openai.com/account/api-keys")
-            api_key = input("Paste OpenAI API Key: ")
-            save_encrypted_api_key(api_key)
+            registry.save_key("OpenAI", input("Paste OpenAI API Key: "))
         else:
             print("[🔑] Reusing encrypted OpenAI API Key.")
+            if FAST_START:
+                # Skip the network round-trip; a bad key surfaces on the first request.
+                return registry.client("OpenAI")
 
         try:
-            client = OpenAI(api_key=api_key)
+            client = registry.client("OpenAI")
             models = client.models.list()
             return client
         except Exception as e:
             print(f"[!] Stored API key failed: {e}\n[↩️] Please enter a new one.")
-            os.remove(KEY_FILE)
+            registry.forget_key("OpenAI")
 
     print("[❌] Failed to authenticate after retry.")
     exit(1)
 
 client = get_valid_openai_client()
-MEMORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory", "memory_db.json")
 SOURCE = "OpenAI"
 
 def save_to_memory(prompt, answer):
-    os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-    memory = []
-    if os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, "r") as f:
-            memory = json.load(f)
-
-    memory.append({
+    append_entry({
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "source": SOURCE,
         "prompt": prompt,
         "response": answer
     })
 
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=2)
+MODEL = "gpt-4"
+cache = get_cache()
+enable_semantic_from_env(lazy_sentence_transformer_encoder)
 
 def ask_openai(prompt):
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
+        response = metrics.record_call(SOURCE, client.chat.completions.create,
+            model=MODEL,
             messages=[{"role": "user", "content": prompt}]
         )
         return response.choices[0].message.content
     except Exception as e:
         return f"[!] Error: {e}"
 
+def ask_openai_streaming(prompt):
+    # Prints tokens as they arrive; returns the full answer, or None on error.
+    try:
+        usage = {}
+        chunks = stream_chat_completion(client, MODEL, [{"role": "user", "content": prompt}], usage,
+                                        stream_options={"include_usage": True})
+        answer, _ = stream_to_console(chunks, SOURCE, prefix="Assistant: ", usage=usage, provider=SOURCE)
+        return answer
+    except Exception as e:
+        print(f"[!] Error: {e}")
+        return None
+
 def chat():
     print(f"\n🤖 [OpenAI Assistant] — Type 'exit' to quit.\n")
     while True:
         user_input = input("You: ")
         if user_input.lower() in ["exit", "quit"]:
             break
-        answer = ask_openai(user_input)
-        print("Assistant:", answer)
+        cached = cache.get(SOURCE, MODEL, user_input)
+        if cached is not None:
+            print("Assistant (cached):", cached)
+            continue
+        if STREAM_ENABLED:
+            answer = ask_openai_streaming(user_input)
+            if answer is None:
+                continue
+        else:
+            answer = ask_openai(user_input)
+            print("Assistant:", answer)
+            if answer.startswith("[!] Error"):
+                continue
+        cache.put(SOURCE, MODEL, user_input, answer)
         save_to_memory(user_input, answer)
 
 if __name__ == "__main__":
@@ -0,0 +1,335 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/ann_index.py
+#
+# Nearest-neighbour backends for EmbeddingIndex. Every backend follows the
+# same small interface:
+#
+#     search(vectors, query, k) -> (rows, scores)   best first
+#     reset()                                        rows were renumbered
+#     resident_bytes(vectors)                        RAM a query scans
+#
+# `vectors` is the live (n, dim) matrix owned by the embedding index, always
+# L2-normalised, so backends only keep row ids and pick up appended rows
+# lazily on the next search.
+#
+#   exact  brute force with argpartition top-k (ground truth)
+#   ivf    inverted file over spherical k-means centroids, pure NumPy
+#   hnsw   hnswlib graph when installed, otherwise falls back to ivf
+#   int8   per-dimension int8 codes (1/4 of float32), exact rescoring
+#   binary sign bits (1/32 of float32) ranked by Hamming distance, exact rescoring
+#
+# The quantized backends scan only their codes and read full-precision rows
+# just for a short candidate list, so the float32 matrix (memory-mapped by
+# PersistentEmbeddingIndex) no longer has to stay resident.
+import math
+import numpy as np
+
+from utils.logger import log_info, log_warning
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+ASSIGN_CHUNK_ROWS = 8192
+# Code blocks are widened to float32 for scoring; 4096 rows keep that in cache.
+SCAN_CHUNK_ROWS = 4096
+# Bits set in each byte value, for popcount without np.bitwise_count (NumPy < 2.0).
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def top_k_indices(scores, k):
+    # O(n) selection of the k best, then a sort of just those k.
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _as_float32(vectors):
+    return vectors if vectors.dtype == np.float32 else vectors.astype(np.float32)
+
+
+class ExactSearch:
+    name = "exact"
+
+    def search(self, vectors, query, k):
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), 65536):
+            scores[start:start + 65536] = _as_float32(vectors[start:start + 65536]) @ query
+        rows = top_k_indices(scores, k)
+        return rows, scores[rows]
+
+    def reset(self):
+        pass
+
+    def resident_bytes(self, vectors):
+        return vectors.nbytes
+
+
+class IVFIndex:
+    name = "ivf"
+
+    def __init__(self, nlist=None, nprobe=None, train_iterations=10, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        self.centroids = None
+        self._trained_rows = 0
+        self._assign = np.empty(0, dtype=np.int32)
+        self._order = np.empty(0, dtype=np.int64)   # rows grouped by list
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._built_rows = 0
+
+    # === Training ===
+    def _assign_rows(self, vectors):
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+            block = _as_float32(vectors[start:start + ASSIGN_CHUNK_ROWS])
+            out[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return out
+
+    def train(self, vectors):
+        n = len(vectors)
+        nlist = self.nlist or max(1, min(4096, int(math.sqrt(n))))
+        rng = np.random.default_rng(self.seed)
+        sample = _as_float32(vectors[np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        # Spherical k-means: vectors are unit length, so assign by dot product.
+        for _ in range(self.train_iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        self.centroids = centroids.astype(np.float32)
+        self._trained_rows = n
+        self._assign = self._assign_rows(vectors)
+        self._build()
+        log_info("IVF index trained: %d rows, %d lists.", n, nlist, module="ann_index")
+
+    def _build(self):
+        self._order = np.argsort(self._assign, kind="stable")
+        counts = np.bincount(self._assign, minlength=len(self.centroids))
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._built_rows = len(self._assign)
+
+    def _sync(self, vectors):
+        n = len(vectors)
+        if self.centroids is None or n > 2 * self._trained_rows:
+            self.train(vectors)
+            return
+        if n > len(self._assign):
+            self._assign = np.concatenate((self._assign, self._assign_rows(vectors[len(self._assign):])))
+        # Regroup once the unsorted tail gets big; until then it is scanned directly.
+        if len(self._assign) - self._built_rows > max(1024, self._built_rows // 10):
+            self._build()
+
+    # === Search ===
+    def search(self, vectors, query, k):
+        self._sync(vectors)
+        nlist = len(self.centroids)
+        nprobe = min(nlist, self.nprobe or max(8, nlist // 8))
+        probe = top_k_indices(self.centroids @ query, nprobe)
+        parts = [self._order[self._offsets[c]:self._offsets[c + 1]] for c in probe]
+        tail_assign = self._assign[self._built_rows:]
+        if len(tail_assign):
+            parts.append(self._built_rows + np.flatnonzero(np.isin(tail_assign, probe)))
+        candidates = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        if not len(candidates):
+            return candidates, np.empty(0, dtype=np.float32)
+        scores = _as_float32(vectors[candidates]) @ query
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def resident_bytes(self, vectors):
+        # Probed lists are spread over the whole matrix, so all of it ends up touched.
+        centroids = self.centroids.nbytes if self.centroids is not None else 0
+        return vectors.nbytes + centroids + self._assign.nbytes + self._order.nbytes
+
+
+class HNSWIndex:
+    name = "hnsw"
+
+    def __init__(self, m=16, ef_construction=200, ef_search=128):
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.reset()
+
+    def reset(self):
+        self._graph = None
+        self._indexed = 0
+
+    def _sync(self, vectors):
+        n = len(vectors)
+        if self._graph is None:
+            self._graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+            self._graph.init_index(max_elements=max(1024, 2 * n), ef_construction=self.ef_construction, M=self.m)
+        if n > self._indexed:
+            if n > self._graph.get_max_elements():
+                self._graph.resize_index(2 * n)
+            self._graph.add_items(_as_float32(vectors[self._indexed:n]), np.arange(self._indexed, n))
+            self._indexed = n
+
+    def search(self, vectors, query, k):
+        self._sync(vectors)
+        k = min(k, len(vectors))
+        self._graph.set_ef(max(self.ef_search, k))
+        labels, distances = self._graph.knn_query(query[None, :], k=k)
+        # hnswlib's "ip" distance is 1 - dot product.
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def resident_bytes(self, vectors):
+        # hnswlib keeps its own float32 copy plus 2*M links per element on layer 0.
+        return self._indexed * (vectors.shape[1] * 4 + self.m * 2 * 4 + 8)
+
+
+class QuantizedIndex:
+    # Shared bookkeeping for int8/binary: codes for every row, extended as
+    # rows are appended, then the best `rerank * k` by code score are
+    # rescored against the full-precision vectors.
+    name = None
+    rerank = 4
+
+    def __init__(self, rerank=None, seed=0):
+        self.rerank = rerank or self.rerank
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        self._codes = None
+        self._encoded = 0
+        self._calibrated_rows = 0
+
+    def _calibrate(self, vectors):
+        pass
+
+    def _encode(self, block):
+        raise NotImplementedError
+
+    def _scores(self, query, codes):
+        # Higher is better; only the ordering matters.
+        raise NotImplementedError
+
+    def _reserve(self, rows, width, dtype):
+        if self._codes is not None and rows <= len(self._codes):
+            return
+        capacity = max(rows, 2 * (len(self._codes) if self._codes is not None else 0), 1024)
+        grown = np.empty((capacity, width), dtype=dtype)
+        if self._codes is not None:
+            grown[:self._encoded] = self._codes[:self._encoded]
+        self._codes = grown
+
+    def _encode_rows(self, vectors, start):
+        for begin in range(start, len(vectors), SCAN_CHUNK_ROWS):
+            codes = self._encode(_as_float32(vectors[begin:begin + SCAN_CHUNK_ROWS]))
+            self._reserve(begin + len(codes), codes.shape[1], codes.dtype)
+            self._codes[begin:begin + len(codes)] = codes
+            self._encoded = begin + len(codes)
+
+    def _sync(self, vectors):
+        n = len(vectors)
+        if self._codes is None or n < self._encoded or n > 2 * self._calibrated_rows:
+            self._encoded = 0
+            self._calibrate(vectors)
+            self._calibrated_rows = n
+            self._encode_rows(vectors, 0)
+            log_info("%s codes built: %d rows, %.1f MB.", self.name, n, self._codes[:n].nbytes / 1e6,
+                     module="ann_index")
+        elif n > self._encoded:
+            self._encode_rows(vectors, self._encoded)
+
+    def search(self, vectors, query, k):
+        self._sync(vectors)
+        n = len(vectors)
+        approx = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SCAN_CHUNK_ROWS):
+            approx[start:start + SCAN_CHUNK_ROWS] = self._scores(query, self._codes[start:min(n, start + SCAN_CHUNK_ROWS)])
+        # Sorted rows read the memory-mapped matrix front to back.
+        candidates = np.sort(top_k_indices(approx, k * self.rerank))
+        scores = _as_float32(vectors[candidates]) @ query
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def resident_bytes(self, vectors):
+        return self._codes[:self._encoded].nbytes if self._codes is not None else 0
+
+
+class Int8Index(QuantizedIndex):
+    # Symmetric scalar quantization with one scale per dimension, taken from
+    # a sample so a few outliers clip instead of stretching the range.
+    name = "int8"
+    rerank = 4
+
+    def _calibrate(self, vectors):
+        rng = np.random.default_rng(self.seed)
+        n = len(vectors)
+        sample = _as_float32(vectors[np.sort(rng.choice(n, size=min(n, 65536), replace=False))])
+        limit = np.percentile(np.abs(sample), 99.9, axis=0)
+        self.scale = (np.where(limit > 0, limit, 1.0) / 127).astype(np.float32)
+
+    def _encode(self, block):
+        return np.clip(np.rint(block / self.scale), -127, 127).astype(np.int8)
+
+    def _scores(self, query, codes):
+        # q . x ~= sum(q_d * scale_d * code_d)
+        return codes.astype(np.float32) @ (query * self.scale)
+
+
+class BinaryIndex(QuantizedIndex):
+    # One sign bit per dimension. Hamming distance between sign codes tracks
+    # the angle between vectors; rescoring recovers the exact order.
+    name = "binary"
+    rerank = 100
+
+    def _encode(self, block):
+        codes = np.packbits(block > 0, axis=1)
+        if codes.shape[1] % 8 == 0:
+            codes = codes.view(np.uint64)  # popcount over 64-bit words
+        return codes
+
+    def _scores(self, query, codes):
+        bits = self._encode(query[None, :])[0]
+        diff = codes ^ bits
+        if hasattr(np, "bitwise_count"):
+            distance = np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+        else:
+            distance = _POPCOUNT[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
+        return -distance
+
+
+def make_ann_index(kind="exact", **options):
+    if kind == "exact":
+        return ExactSearch()
+    if kind == "hnsw":
+        if hnswlib is not None:
+            return HNSWIndex(**options)
+        log_warning("hnswlib is not installed; using the NumPy IVF index instead.", module="ann_index")
+        kind = "ivf"
+    if kind == "ivf":
+        return IVFIndex(**options)
+    if kind == "int8":
+        return Int8Index(**options)
+    if kind == "binary":
+        return BinaryIndex(**options)
+    raise ValueError(f"Unknown ANN backend: {kind}")
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
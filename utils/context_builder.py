@@ -0,0 +1,195 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/context_builder.py
+#
+# Builds the memory part of a local-model prompt under a token budget.
+# Pasting the top-5 memories verbatim overflows small context windows
+# (TinyLlama: 2048 tokens) and prompt processing then dominates latency on
+# CPU. Instead:
+#
+#   1. candidates are ordered by maximal marginal relevance, so a memory
+#      that mostly repeats one already chosen loses to a different one and
+#      near-duplicates are dropped outright;
+#   2. each memory is capped and, when too long, cut down to the sentences
+#      that share the most words with the question;
+#   3. up to max_memories are added while the budget lasts.
+#
+# Tokens are counted with the model's own tokenizer when it is in the local
+# Hugging Face cache, otherwise estimated.
+import os
+import re
+import math
+import numpy as np
+
+from utils.logger import log_info
+
+# Ollama's default context window; raise it if you run models with a larger num_ctx.
+NUM_CTX = int(os.getenv("SUPERBRAIN_NUM_CTX", "2048"))
+# Tokens set aside for the model's answer.
+ANSWER_RESERVE = int(os.getenv("SUPERBRAIN_ANSWER_TOKENS", "512"))
+# Upper bound for the memory block, whatever the window leaves.
+MEMORY_TOKEN_BUDGET = int(os.getenv("SUPERBRAIN_MEMORY_TOKENS", "768"))
+MMR_LAMBDA = float(os.getenv("SUPERBRAIN_MMR_LAMBDA", "0.7"))
+# Cosine similarity above which a candidate counts as a duplicate of a chosen memory.
+DUPLICATE_SIMILARITY = 0.95
+MIN_SNIPPET_TOKENS = 24
+
+# Hugging Face tokenizers for the Ollama models the launcher offers.
+TOKENIZERS = {
+    "tinyllama": "TinyLlama/TinyLlama-1.1B-Chat-v1.0",
+    "llama2": "meta-llama/Llama-2-7b-hf",
+    "mistral": "mistralai/Mistral-7B-v0.1",
+    "phi-3": "microsoft/Phi-3-mini-4k-instruct",
+}
+
+CONTEXT_HEADER = "The assistant has the following prior context:\n"
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+# === Token Counting ===
+def estimate_tokens(text):
+    # SentencePiece/BPE vocabularies cover common words whole and split long
+    # ones into ~4-character pieces; punctuation is its own token.
+    return sum(max(1, math.ceil(len(w) / 4)) if w[0].isalnum() or w[0] == "_" else 1
+               for w in _WORD_RE.findall(text))
+
+
+_counters = {}
+
+
+def token_counter(model_name):
+    # text -> token count for an Ollama model name such as "tinyllama" or "mistral:7b".
+    family = model_name.split(":")[0].lower()
+    if family not in _counters:
+        repo = os.getenv("SUPERBRAIN_TOKENIZER") or TOKENIZERS.get(family)
+        counter = estimate_tokens
+        if repo:
+            try:
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(repo, local_files_only=True)
+                counter = lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+            except Exception:
+                pass  # not cached locally (or transformers missing): estimate instead
+        _counters[family] = counter
+    return _counters[family]
+
+
+def memory_budget(count, query, budget=None):
+    # What the memory block may use: the configured budget, never more than
+    # the window leaves after the question and the answer reserve.
+    budget = MEMORY_TOKEN_BUDGET if budget is None else budget
+    return max(0, min(budget, NUM_CTX - ANSWER_RESERVE - count(query) - count(CONTEXT_HEADER) - 8))
+
+
+# === Selection ===
+def mmr_order(scores, vectors, lam=MMR_LAMBDA, duplicate=DUPLICATE_SIMILARITY):
+    # Indices in maximal-marginal-relevance order, near-duplicates removed.
+    vectors = np.asarray(vectors, dtype=np.float32)
+    # Relevance rescaled to [0, 1] so cosine and fused (RRF) scores weigh the same against similarity.
+    scores = np.asarray(scores, dtype=np.float32)
+    spread = float(scores.max() - scores.min()) if len(scores) else 0.0
+    scores = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+    remaining = list(range(len(scores)))
+    chosen = []
+    max_sim = np.full(len(scores), -1.0, dtype=np.float32)
+    while remaining:
+        best = max(remaining, key=lambda i: lam * scores[i] - (1 - lam) * max(max_sim[i], 0.0))
+        remaining.remove(best)
+        if max_sim[best] >= duplicate:
+            continue
+        chosen.append(best)
+        max_sim = np.maximum(max_sim, vectors @ vectors[best])
+    return chosen
+
+
+def snippet(text, query, limit, count):
+    # The sentences sharing most words with the query, in original order, within `limit` tokens.
+    if count(text) <= limit:
+        return text
+    query_words = {w.lower() for w in _WORD_RE.findall(query) if w[0].isalnum()}
+    sentences = [s for s in _SENTENCE_RE.split(text) if s.strip()]
+    ranked = sorted(range(len(sentences)),
+                    key=lambda i: -len(query_words & {w.lower() for w in _WORD_RE.findall(sentences[i])}))
+    keep, used = set(), 0
+    for i in ranked:
+        cost = count(sentences[i])
+        if used + cost <= limit:
+            keep.add(i)
+            used += cost
+    if not keep:
+        # One long sentence: keep its head.
+        words = text.split()
+        while words and count(" ".join(words)) > limit:
+            words = words[:max(1, int(len(words) * 0.8))] if len(words) > 1 else []
+        return " ".join(words) + " …" if words else ""
+    return " … ".join(sentences[i] for i in sorted(keep))
+
+
+class ContextReport:
+    def __init__(self, candidates, used, duplicates, truncated, tokens_naive, tokens_used, budget, naive_k=5):
+        self.candidates = candidates
+        self.naive_k = naive_k
+        self.used = used
+        self.duplicates = duplicates
+        self.truncated = truncated
+        self.tokens_naive = tokens_naive
+        self.tokens_used = tokens_used
+        self.budget = budget
+
+    @property
+    def tokens_saved(self):
+        return max(0, self.tokens_naive - self.tokens_used)
+
+    def __str__(self):
+        return self.summary()
+
+    def summary(self):
+        return (f"memory context: {self.used}/{self.candidates} memories, {self.duplicates} near-duplicates dropped, "
+                f"{self.truncated} snippeted; {self.tokens_used}/{self.budget} tokens "
+                f"(saved {self.tokens_saved} vs. verbatim top-{self.naive_k})")
+
+
+def build_context(query, hits, embed, model_name, budget=None, max_memories=5):
+    # hits: [(text, score)] best first; embed: list[str] -> L2-normalised vectors.
+    # Returns (prompt, ContextReport); savings are measured against pasting
+    # the top max_memories hits verbatim, as the assistant used to.
+    naive_k = max_memories
+    count = token_counter(model_name)
+    naive = hits[:naive_k]
+    tokens_naive = count("\n".join(f"- {t}" for t, _ in naive)) if naive else 0
+    limit = memory_budget(count, query, budget)
+    if not hits or limit <= 0:
+        return query, ContextReport(len(hits), 0, 0, 0, tokens_naive, 0, limit, naive_k)
+
+    order = mmr_order([s for _, s in hits], embed([t for t, _ in hits]))
+    duplicates = len(hits) - len(order)
+    per_item = max(MIN_SNIPPET_TOKENS, limit // 3)
+    lines, used, truncated = [], 0, 0
+    for i in order:
+        remaining = limit - used
+        if len(lines) == max_memories or remaining < MIN_SNIPPET_TOKENS:
+            break
+        text = hits[i][0]
+        short = snippet(text, query, min(per_item, remaining - 2), count)
+        if not short:
+            continue
+        truncated += short != text
+        line = f"- {short}"
+        used += count(line) + 1
+        lines.append(line)
+    report = ContextReport(len(hits), len(lines), duplicates, truncated, tokens_naive, used, limit, naive_k)
+    log_info("%s", report, module="context_builder")
+    if not lines:
+        return query, report
+    memory = "\n".join(lines)
+    return f"{CONTEXT_HEADER}{memory}\n\nNow answer:\n{query}", report
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -0,0 +1,383 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/embedding_index.py
+#
+# Incremental embedding index for memory retrieval. Rows are keyed by a hash
+# of their text, so adding a memory only encodes what the index has not seen
+# before, and vectors are kept L2-normalised so cosine similarity is a dot
+# product.
+#
+# PersistentEmbeddingIndex keeps the matrix on disk next to the memory log
+# (memory/embeddings.vec, raw float32/float16 rows, memory-mapped) with a
+# sidecar of row hashes (memory/embeddings.ids) and a small meta file, so
+# startup maps the file and only encodes memories added since the last run.
+# Several processes may share the files: appends and rewrites happen under a
+# file lock, and a process notices another's rewrite (the .ids file is a new
+# inode) and reloads before its next read or write.
+#
+# Searches go through an ANN backend from utils/ann_index.py once the index
+# is large enough; pass exact=True to compare against brute force.
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+from utils.ann_index import ExactSearch
+from utils import metrics
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Below this many rows brute force is as fast as any ANN structure.
+ANN_MIN_ROWS = 20000
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def sentence_transformer_encoder(model):
+    # Adapts a SentenceTransformer to the encoder interface: list[str] -> (n, dim) float32.
+    def encode(texts):
+        with metrics.timer("superbrain_embedding_seconds"):
+            vectors = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+        metrics.inc("superbrain_embedding_texts_total", len(texts))
+        return vectors
+    return encode
+
+
+def lazy_sentence_transformer_encoder(model_name="all-MiniLM-L6-v2"):
+    # Same interface, but sentence_transformers is imported and the model
+    # loaded on the first call rather than up front.
+    model = []
+    lock = threading.Lock()
+
+    def encode(texts):
+        if not model:
+            with lock:  # the chat loop and the embedding worker may both get here first
+                if not model:
+                    from sentence_transformers import SentenceTransformer
+                    model.append(SentenceTransformer(model_name))
+        return sentence_transformer_encoder(model[0])(texts)
+    return encode
+
+
+class EmbeddingIndex:
+    def __init__(self, encoder, dim=None, ann=None, ann_min_rows=ANN_MIN_ROWS):
+        self.encoder = encoder
+        self.dim = dim
+        self.ann = ann
+        self.ann_min_rows = ann_min_rows
+        self._exact = ExactSearch()
+        self.texts = []
+        self.hashes = []
+        self._textless = 0  # rows whose text is None, kept in step with self.texts
+        self._rows = {}
+        self._matrix = None
+        self._size = 0
+        # Guards rows/texts so a background writer publishes a batch atomically to searches.
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, text):
+        return content_hash(text) in self._rows
+
+    def has(self, key):
+        return key in self._rows
+
+    @property
+    def vectors(self):
+        if self._matrix is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if self._matrix is not None and needed <= len(self._matrix):
+            return
+        # Grow geometrically so a stream of single appends stays amortised O(1).
+        capacity = max(needed, 2 * (len(self._matrix) if self._matrix is not None else 0), 64)
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        if self._matrix is not None:
+            grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def add_vectors(self, texts, vectors, hashes=None):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        hashes = hashes or [content_hash(t) for t in texts]
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            self._reserve(len(texts))
+            for text, h, vec in zip(texts, hashes, vectors):
+                if h in self._rows:
+                    continue
+                self._matrix[self._size] = vec
+                self._rows[h] = self._size
+                self.texts.append(text)
+                self._textless += text is None
+                self.hashes.append(h)
+                self._size += 1
+
+    def _set_text(self, row, text):
+        self._textless += (text is None) - (self.texts[row] is None)
+        self.texts[row] = text
+
+    def add_many(self, texts, keys=None):
+        # Encode only texts whose key (default: content hash) is new; returns how many were encoded.
+        pending, seen = [], set()
+        for text, h in zip(texts, keys or [content_hash(t) for t in texts]):
+            if h not in self._rows and h not in seen:
+                seen.add(h)
+                pending.append((text, h))
+        if not pending:
+            return 0
+        vectors = self.encoder([t for t, _ in pending])
+        self.add_vectors([t for t, _ in pending], vectors, [h for _, h in pending])
+        return len(pending)
+
+    def add(self, text):
+        return self.add_many([text])
+
+    def encode_query(self, query):
+        return np.asarray(self.encoder([query]), dtype=np.float32)[0]
+
+    def search_rows(self, query_vector, k, exact=False):
+        if exact or self.ann is None or self._size < self.ann_min_rows:
+            return self._exact.search(self.vectors, query_vector, k)
+        return self.ann.search(self.vectors, query_vector, k)
+
+    def _reload_if_replaced(self):
+        pass
+
+    def search(self, query, top_k=5, similarity_threshold=None, exact=False, with_keys=False):
+        # Returns [(text, score)] best first, or [(text, score, key)] with_keys.
+        self._reload_if_replaced()
+        if not self._size:
+            return []
+        query_vector = self.encode_query(query) if isinstance(query, str) else np.asarray(query, dtype=np.float32)
+        with self._lock:
+            # Rows appended by another process have no text until the next sync.
+            rows, scores = self.search_rows(query_vector, top_k + self._textless, exact=exact)
+            hits = []
+            for row, score in zip(rows, scores):
+                if self.texts[row] is None:
+                    continue
+                if len(hits) == top_k or (similarity_threshold is not None and score < similarity_threshold):
+                    break
+                hit = (self.texts[row], float(score))
+                hits.append(hit + (self.hashes[row],) if with_keys else hit)
+        return hits
+
+
+class PersistentEmbeddingIndex(EmbeddingIndex):
+    def __init__(self, encoder, path_prefix, model_name, dtype="float32", **options):
+        super().__init__(encoder, **options)
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.vec_path = path_prefix + ".vec"
+        self.ids_path = path_prefix + ".ids"
+        self.meta_path = path_prefix + ".meta.json"
+        self.lock_path = path_prefix + ".lock"
+        self._ids_offset = 0
+        self._ids_inode = None  # which .ids file the rows were read from
+        # Rows that existed when we opened, i.e. before the caller read the memory
+        # log it will sync against; later rows may belong to newer memories.
+        self._horizon = 0
+        os.makedirs(os.path.dirname(self.vec_path) or ".", exist_ok=True)
+        self._open()
+
+    # === Files ===
+    def _meta(self):
+        return {"model": self.model_name, "dim": self.dim, "dtype": self.dtype.name}
+
+    def _write_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._meta(), f)
+        os.replace(tmp, self.meta_path)
+
+    @contextmanager
+    def _locked(self):
+        # Serialises writers across assistant processes sharing the same files.
+        with open(self.lock_path, "a") as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _reset(self):
+        for path in (self.vec_path, self.ids_path, self.meta_path, self.lock_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.dim = None
+        self.texts, self.hashes, self._rows, self._size = [], [], {}, 0
+        self._textless = 0
+        self._matrix = None
+        self._ids_offset = 0
+        self._ids_inode = None
+        if self.ann is not None:
+            self.ann.reset()
+
+    def _open(self):
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if meta is None or meta.get("model") != self.model_name or meta.get("dtype") != self.dtype.name:
+            # Different embedding model or precision: the stored vectors are useless.
+            self._reset()
+            return
+        self.dim = meta["dim"]
+        with self._locked():
+            self._repair()
+        self._refresh()
+        self._horizon = self._size
+
+    def _repair(self):
+        # A crash between the .vec and .ids appends leaves them uneven, or a
+        # half-written row/line at the end; cut both back to the rows they agree on.
+        try:
+            with open(self.ids_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""  # no rows were ever appended
+        complete = data[:data.rfind(b"\n") + 1]
+        hashes = complete.split()
+        row_bytes = self.dim * self.dtype.itemsize
+        vec_size = os.path.getsize(self.vec_path) if os.path.exists(self.vec_path) else 0
+        count = min(len(hashes), vec_size // row_bytes)
+        if vec_size != count * row_bytes:
+            with open(self.vec_path, "ab") as f:
+                f.truncate(count * row_bytes)
+        if len(complete) != len(data) or len(hashes) != count:
+            with open(self.ids_path, "r+b") as f:
+                f.truncate(sum(len(h) + 1 for h in hashes[:count]))
+
+    def _refresh(self):
+        # Reads hashes appended since the last refresh, by us or another assistant.
+        # Callers hold the file lock, or accept a view that may be one append behind.
+        carried = None
+        with open(self.ids_path, "ab+") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._ids_inode:
+                if self._ids_inode is not None:
+                    # Rewritten (by sync) since we last read it: row numbers changed, start over.
+                    carried = {h: t for h, t in zip(self.hashes, self.texts) if t is not None}
+                    self.hashes, self.texts, self._rows, self._size, self._ids_offset = [], [], {}, 0, 0
+                    self._textless = 0
+                    self._matrix = None
+                    self._horizon = 0
+                    if self.ann is not None:
+                        self.ann.reset()
+                self._ids_inode = inode
+            f.seek(self._ids_offset)
+            tail = f.read()
+        tail = tail[:tail.rfind(b"\n") + 1]
+        self._ids_offset += len(tail)
+        for h in tail.decode("ascii").split():
+            self._rows[h] = len(self.hashes)
+            self.hashes.append(h)
+            text = None if carried is None else carried.get(h)
+            self.texts.append(text)
+            self._textless += text is None
+        self._size = len(self.hashes)
+        self._remap()
+
+    def _reload_if_replaced(self):
+        try:
+            inode = os.stat(self.ids_path).st_ino
+        except OSError:
+            return
+        if self._ids_inode is not None and inode != self._ids_inode:
+            with self._lock, self._locked():
+                self._refresh()
+
+    def _remap(self):
+        if self._size:
+            self._matrix = np.memmap(self.vec_path, dtype=self.dtype, mode="r", shape=(self._size, self.dim))
+        else:
+            self._matrix = None
+
+    def _rewrite(self, keep_rows):
+        # Caller holds the file lock and has just refreshed, so no other
+        # process's rows are missing from keep_rows.
+        tmp_vec, tmp_ids = self.vec_path + ".tmp", self.ids_path + ".tmp"
+        with open(tmp_vec, "wb") as vf, open(tmp_ids, "wb") as idf:
+            for i in keep_rows:
+                vf.write(np.ascontiguousarray(self._matrix[i]).tobytes())
+                idf.write(self.hashes[i].encode("ascii") + b"\n")
+        self._matrix = None
+        os.replace(tmp_vec, self.vec_path)
+        os.replace(tmp_ids, self.ids_path)
+        self._refresh()  # new .ids inode: rows are reloaded, texts carried over by hash
+
+    # === Index ===
+    def add_vectors(self, texts, vectors, hashes=None):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        hashes = hashes or [content_hash(t) for t in texts]
+        with self._lock, self._locked():
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                # Data files before meta: a meta file is what makes the index openable.
+                for path in (self.vec_path, self.ids_path):
+                    open(path, "ab").close()
+                self._write_meta()
+            self._refresh()
+            new, seen = [], set()
+            for text, h, vec in zip(texts, hashes, vectors):
+                if h not in self._rows and h not in seen:
+                    seen.add(h)
+                    new.append((text, h, vec))
+            if new:
+                # Vectors land before their ids, so a reader never sees an id without its row.
+                with open(self.vec_path, "ab") as vec_file:
+                    vec_file.write(np.stack([v for _, _, v in new]).astype(self.dtype).tobytes())
+                with open(self.ids_path, "ab") as ids_file:
+                    ids_file.write(b"".join(h.encode("ascii") + b"\n" for _, h, _ in new))
+            self._refresh()
+            for text, h, _ in new:
+                self._set_text(self._rows[h], text)
+
+    def sync(self, texts, keys=None):
+        # Validates the stored rows against the memory log: rows for memories
+        # that no longer exist are dropped, missing memories are encoded.
+        live = {}
+        for text, h in zip(texts, keys or [content_hash(t) for t in texts]):
+            live.setdefault(h, text)
+        with self._lock, self._locked():
+            # Under the lock, so rows another process is appending are either
+            # in `keep` or appended after the rewrite, never dropped.
+            self._refresh()
+            for h, text in live.items():
+                if h in self._rows:
+                    self._set_text(self._rows[h], text)
+            keep = [i for i, h in enumerate(self.hashes) if h in live or i >= self._horizon]
+            if len(keep) != self._size:
+                horizon = sum(1 for i in keep if i < self._horizon)
+                self._rewrite(keep)
+                self._horizon = horizon
+        return self.add_many(list(live.values()), list(live))
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -0,0 +1,135 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/embedding_worker.py
+#
+# Background embedding so the chat loop never waits on the encoder. New
+# memories are queued; a worker thread drains the queue in batches (one
+# encoder call per batch is far cheaper per text than one call each) and
+# publishes every batch to the index in one locked step, so a search sees
+# all of a batch or none of it. Pending texts are flushed on exit.
+#
+# Texts may target different indexes (e.g. MemoryIndexer partitions sharing
+# one encoder); a batch is still encoded in a single call.
+import os
+import time
+import queue
+import atexit
+import threading
+
+from utils.logger import log_info, log_error
+from utils.embedding_index import content_hash
+
+BATCH_SIZE = int(os.getenv("SUPERBRAIN_EMBED_BATCH", "32"))
+# How long the worker waits for a batch to fill once it has one text.
+BATCH_WAIT = float(os.getenv("SUPERBRAIN_EMBED_BATCH_WAIT", "0.2"))
+
+_STOP = object()
+
+
+class EmbeddingWorker:
+    def __init__(self, index=None, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT, encoder=None):
+        self.index = index  # default target for submit()
+        self.encoder = encoder or index.encoder
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue()
+        self.stats = {"encoded": 0, "batches": 0, "encode_seconds": 0.0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="embedding-worker", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # === Producer ===
+    def submit(self, text, index=None, key=None):
+        # key: the row key to store the text under (default: its content hash).
+        self._queue.put((index if index is not None else self.index, text, key or content_hash(text)))
+
+    def submit_many(self, texts, index=None):
+        for text in texts:
+            self.submit(text, index)
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    @property
+    def throughput(self):
+        # Texts encoded per second of encoder time.
+        seconds = self.stats["encode_seconds"]
+        return self.stats["encoded"] / seconds if seconds else 0.0
+
+    def summary(self):
+        s = self.stats
+        return (f"queue={self.depth} encoded={s['encoded']} in {s['batches']} batches "
+                f"({self.throughput:.1f} texts/s) errors={s['errors']}")
+
+    def flush(self):
+        # Blocks until everything submitted so far is searchable.
+        self._queue.join()
+
+    def close(self):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.stats["encoded"] or self.stats["errors"]:
+            log_info("Embedding worker: %s", self.summary(), module="embedding_worker")
+
+    # === Worker ===
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch, deadline = [first], time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _encode(self, batch):
+        pending = [(index, text, key) for index, text, key in dict.fromkeys(batch) if not index.has(key)]
+        if not pending:
+            return
+        start = time.perf_counter()
+        vectors = self.encoder([text for _, text, _ in pending])  # outside the index locks: searches keep running
+        self.stats["encode_seconds"] += time.perf_counter() - start
+        targets = {}
+        for (index, text, key), vector in zip(pending, vectors):
+            target = targets.setdefault(id(index), (index, [], [], []))
+            target[1].append(text)
+            target[2].append(vector)
+            target[3].append(key)
+        for index, texts, rows, keys in targets.values():
+            index.add_vectors(texts, rows, keys)
+        self.stats["encoded"] += len(pending)
+        self.stats["batches"] += 1
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                try:
+                    self._encode(batch)
+                except Exception as e:
+                    # The memory itself is already in the log; the next startup sync re-encodes it.
+                    self.stats["errors"] += 1
+                    log_error("Embedding batch of %d failed: %s", len(batch), e, module="embedding_worker")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+            if stop:
+                self._queue.task_done()  # the _STOP marker
+                return
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -0,0 +1,179 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/local_ensemble.py
+#
+# One prompt to several local Ollama models, answers as each finishes. The
+# local counterpart of multi_ai_query's fan_out.
+#
+# On a CPU-only machine, generations compete for the same cores and memory
+# bandwidth. Running four 7B models at once is slower than running them two
+# at a time, and if their weights don't fit in RAM together the machine
+# swaps. GenerationScheduler therefore:
+#
+#   - allows at most `slots` generations at once (physical cores / 4 by
+#     default, SUPERBRAIN_ENSEMBLE_PARALLEL to override);
+#   - gives each one num_thread = cores / slots, so they don't oversubscribe;
+#   - only starts a model when its weights fit in the RAM still available
+#     after the running models, unless it is already loaded; one generation
+#     always runs even if it doesn't fit, as a single model would;
+#   - queues the rest in order.
+#
+# Each answer comes with latency, queue wait, load time and tokens/sec from
+# Ollama's own timings.
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.logger import log_info, log_warning
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PARALLEL = int(os.getenv("SUPERBRAIN_ENSEMBLE_PARALLEL", "0"))  # 0 = from core count
+# Share of available RAM the ensemble may fill with model weights.
+RAM_FRACTION = 0.9
+# Resident size of a loaded model relative to its file (KV cache, buffers).
+RAM_OVERHEAD = 1.2
+CORES_PER_GENERATION = 4
+
+
+def physical_cores():
+    if psutil is not None:
+        return psutil.cpu_count(logical=False) or psutil.cpu_count() or 1
+    return os.cpu_count() or 1
+
+
+def available_ram():
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return 0  # unknown: the RAM check is skipped
+
+
+class GenerationScheduler:
+    def __init__(self, slots=None, cores=None, ram=None):
+        self.cores = cores or physical_cores()
+        self.slots = max(1, slots or PARALLEL or self.cores // CORES_PER_GENERATION)
+        self.ram = ram  # fixed budget in bytes; None = whatever run_ensemble measured for its run
+        self._running = {}  # ticket -> reserved bytes
+        self._waiting = []  # tickets in arrival order
+        self._cond = threading.Condition()
+        self._tickets = 0
+
+    @property
+    def threads_per_generation(self):
+        return max(1, self.cores // self.slots)
+
+    def _fits(self, need, budget):
+        if not budget or not self._running:
+            return True
+        # `budget` was measured when the run started, so it already excludes
+        # models resident then; only what this run loads is counted against it.
+        return sum(self._running.values()) + need <= budget * RAM_FRACTION
+
+    def acquire(self, need=0, budget=None):
+        # Blocks until this generation may start; returns a ticket for release().
+        budget = self.ram if budget is None else budget
+        with self._cond:
+            self._tickets += 1
+            ticket = self._tickets
+            self._waiting.append(ticket)
+            while not (self._waiting[0] == ticket and len(self._running) < self.slots and self._fits(need, budget)):
+                self._cond.wait()
+            self._waiting.pop(0)
+            self._running[ticket] = need
+            self._cond.notify_all()
+            return ticket
+
+    def release(self, ticket):
+        with self._cond:
+            self._running.pop(ticket, None)
+            self._cond.notify_all()
+
+
+class EnsembleResult:
+    def __init__(self, model, answer=None, error=None, waited=0.0, latency=0.0, timings=None):
+        self.model = model
+        self.answer = answer
+        self.error = error
+        self.waited = waited
+        self.latency = latency  # from start of generation, excluding queue wait
+        self.timings = timings or {}
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def tokens(self):
+        return self.timings.get("eval_count", 0)
+
+    @property
+    def tokens_per_sec(self):
+        duration = self.timings.get("eval_duration", 0) / 1e9
+        return self.tokens / duration if duration > 0 else 0.0
+
+    @property
+    def load_seconds(self):
+        return self.timings.get("load_duration", 0) / 1e9
+
+    def __str__(self):
+        return self.summary()
+
+    def summary(self):
+        if not self.ok:
+            return f"{self.model}: failed after {self.latency:.1f}s ({self.error})"
+        return (f"{self.model}: {self.latency:.1f}s (queued {self.waited:.1f}s, load {self.load_seconds:.1f}s), "
+                f"{self.tokens} tokens at {self.tokens_per_sec:.1f} tok/s")
+
+
+def run_ensemble(manager, prompt, models, scheduler=None):
+    # Yields an EnsembleResult per model as each finishes.
+    scheduler = scheduler or GenerationScheduler()
+    # Measured for every run: models from earlier runs stay resident (keep_alive),
+    # so a budget from an earlier run would be stale.
+    loaded = set(manager.loaded())
+    ram = scheduler.ram if scheduler.ram is not None else available_ram()
+    log_info("Ensemble of %d models: %d at a time, %d threads each.", len(models), scheduler.slots,
+             scheduler.threads_per_generation, module="local_ensemble")
+
+    def generate(model):
+        queued = time.monotonic()
+        need = 0 if model in loaded else int(manager.size(model) * RAM_OVERHEAD)
+        if ram and need > ram * RAM_FRACTION:
+            log_warning("%s may not fit in available RAM; it will run alone.", model, module="local_ensemble")
+        ticket = scheduler.acquire(need, ram)
+        started = time.monotonic()
+        timings = {}
+        try:
+            answer = "".join(manager.generate(model, prompt, stats=timings,
+                                              num_thread=scheduler.threads_per_generation))
+            return EnsembleResult(model, answer.strip(), waited=started - queued,
+                                  latency=time.monotonic() - started, timings=timings)
+        except Exception as e:
+            return EnsembleResult(model, error=str(e), waited=started - queued, latency=time.monotonic() - started)
+        finally:
+            scheduler.release(ticket)
+
+    pool = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="ensemble")
+    try:
+        for future in as_completed([pool.submit(generate, model) for model in models]):
+            result = future.result()
+            log_info("%s", result, module="local_ensemble")
+            yield result
+    finally:
+        pool.shutdown(wait=False)
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
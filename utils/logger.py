@@ -3,36 +3,290 @@
 # © 2025 All Rights Reserved — https://github.com/KatchDaVizion
 
 # utils/logger.py
-import logging
+#
+# One log stream for every module and every process: logs/superbrain.jsonl,
+# one JSON object per line, each tagged with the run it came from.
+#
+# Callers never wait on the disk or the console. log_* checks the level,
+# then puts the unformatted record on a queue; a background thread formats
+# it and does the I/O. Arguments are formatted only if the level is enabled:
+#
+#   log_info("Indexed %d entries in %.1fs", n, seconds, module="memory_indexer")
+#
+# Extra keyword arguments become JSON fields:
+#
+#   log_warning("Provider slow", module="resilience", provider="Groq", seconds=12.5)
+#
+# The file rotates to logs/superbrain-<time>.jsonl when it reaches
+# SUPERBRAIN_LOG_MAX_MB (default 10) or is SUPERBRAIN_LOG_ROTATE_HOURS old
+# (default 24); the newest SUPERBRAIN_LOG_BACKUPS rotated files (default 10)
+# are kept. SUPERBRAIN_LOG_LEVEL sets the level (default INFO).
 import os
+import json
+import time
+import glob
+import queue
+import atexit
+import logging
+import threading
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: rotation is not coordinated between processes
+    fcntl = None
+
 LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
-os.makedirs(LOGS_DIR, exist_ok=True)
-LOG_FILE = os.path.join(LOGS_DIR, f"superbrain_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+LOG_FILE = os.path.join(LOGS_DIR, "superbrain.jsonl")
+LOCK_FILE = os.path.join(LOGS_DIR, ".superbrain.lock")
+
+LEVEL = getattr(logging, os.getenv("SUPERBRAIN_LOG_LEVEL", "INFO").upper(), logging.INFO)
+MAX_BYTES = int(float(os.getenv("SUPERBRAIN_LOG_MAX_MB", "10")) * 1024 * 1024)
+ROTATE_SECONDS = float(os.getenv("SUPERBRAIN_LOG_ROTATE_HOURS", "24")) * 3600
+BACKUPS = int(os.getenv("SUPERBRAIN_LOG_BACKUPS", "10"))
+
+RUN_ID = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+
+
+# === Formatting (background thread) ===
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "run": RUN_ID,
+            "module": getattr(record, "sb_module", record.name),
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "sb_fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        module = getattr(record, "sb_module", record.name)
+        text = f"{self.formatTime(record)} - {record.levelname} - [{module}] {record.getMessage()}"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+# === Rotating File ===
+class RotatingJsonlHandler(logging.Handler):
+    # Appends to LOG_FILE from any number of processes. Rotation happens under
+    # a file lock, and a process whose file was rotated away reopens the new
+    # one before its next write, the way WatchedFileHandler does.
+    def __init__(self, path=LOG_FILE, max_bytes=MAX_BYTES, rotate_seconds=ROTATE_SECONDS, backups=BACKUPS):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.stream = None
+        self.inode = None
+        self.checked = 0.0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.stream = open(self.path, "a", encoding="utf-8")
+        self.inode = os.fstat(self.stream.fileno()).st_ino
+
+    def _close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def _rotated_away(self):
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+    def _due(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if self.max_bytes and st.st_size >= self.max_bytes:
+            return True
+        # The first line holds the file's start time; st_ctime changes on every write.
+        return bool(self.rotate_seconds) and st.st_size and time.time() - self._started(st) >= self.rotate_seconds
+
+    def _started(self, st):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                first = json.loads(f.readline())
+            return datetime.fromisoformat(first["ts"]).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            return st.st_mtime
+
+    def rotate(self):
+        lock = open(LOCK_FILE, "a") if fcntl is not None else None
+        try:
+            if lock is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another process may have rotated while we waited for the lock.
+            if not self._rotated_away() and self._due():
+                target = _rotated_name(os.path.dirname(self.path))
+                try:
+                    os.replace(self.path, target)
+                except OSError:
+                    return  # e.g. open elsewhere on Windows; try again on a later record
+                prune(self.backups)
+        finally:
+            if lock is not None:
+                lock.close()
+            self._close()
+
+    def emit(self, record):
+        try:
+            line = self.format(record) + "\n"
+            if self.stream is None or self._rotated_away():
+                self._close()
+                self._open()
+            if self._check_due():
+                self.rotate()
+                self._open()
+            self.stream.write(line)
+            self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def _check_due(self):
+        # Stat only every so often; size is tracked from our own stream in between.
+        now = time.monotonic()
+        if self.stream.tell() < self.max_bytes and now - self.checked < 5:
+            return False
+        self.checked = now
+        return self._due()
+
+    def close(self):
+        self._close()
+        super().close()
+
+
+def _rotated_name(directory):
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    target, n = os.path.join(directory, f"superbrain-{stamp}.jsonl"), 1
+    while os.path.exists(target):  # several rotations within a second
+        target, n = os.path.join(directory, f"superbrain-{stamp}-{n}.jsonl"), n + 1
+    return target
+
+
+def prune(keep=BACKUPS):
+    # Oldest rotated files beyond `keep` are removed, along with the
+    # per-run superbrain_<time>.log files earlier versions left behind.
+    for pattern in ("superbrain-*.jsonl", "superbrain_*.log"):
+        files = sorted(glob.glob(os.path.join(LOGS_DIR, pattern)), key=_mtime, reverse=True)
+        for path in files[keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:  # removed by another process meanwhile
+        return 0.0
+
+
+# === Queue ===
+class QueueHandler(logging.Handler):
+    # Hands records, unformatted, to the writer thread.
+    def __init__(self, records):
+        super().__init__()
+        self.records = records
+
+    def handle(self, record):
+        # No handler lock: SimpleQueue.put is already thread-safe.
+        if _writer is None:  # after shutdown, e.g. from a late atexit hook
+            _write(record)
+        else:
+            self.records.put(record)
+        return True
+
+
+_records = queue.SimpleQueue()
+_handlers = []
+_writer = None
+_STOP = object()
+
+
+def _write(record):
+    for handler in _handlers:
+        if record.levelno >= handler.level:
+            handler.handle(record)
+
+
+def _drain():
+    while True:
+        record = _records.get()
+        if record is _STOP:
+            return
+        _write(record)
+
+
+def _setup():
+    global _writer
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter())
+    file_handler = RotatingJsonlHandler()
+    file_handler.setFormatter(JsonFormatter())
+    _handlers.extend([console, file_handler])
+
+    _writer = threading.Thread(target=_drain, name="log-writer", daemon=True)
+    _writer.start()
+    atexit.register(shutdown)
+    threading.Thread(target=prune, name="log-prune", daemon=True).start()
+
+    root = logging.getLogger()
+    if not root.handlers:  # third-party loggers share the stream, as with basicConfig before
+        root.addHandler(QueueHandler(_records))
+        root.setLevel(LEVEL)
+        return logging.getLogger("superbrain")
+    own = logging.getLogger("superbrain")
+    own.addHandler(QueueHandler(_records))
+    own.propagate = False
+    return own
+
+
+def shutdown():
+    # Drains the queue; anything logged afterwards is written synchronously.
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        _records.put(_STOP)
+        writer.join()
+        while not _records.empty():  # put by a thread that raced the stop
+            _write(_records.get())
+
+
+logger = _setup()
+logger.setLevel(LEVEL)
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(module)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()  # Also log to console
-    ]
-)
+def _log(level, message, args, module, fields, exc_info=False):
+    if not logger.isEnabledFor(level):
+        return
+    extra = {"sb_module": module, "sb_fields": fields} if fields else {"sb_module": module}
+    logger.log(level, message, *args, exc_info=exc_info, extra=extra)
 
-logger = logging.getLogger(__name__)
 
-def log_info(message, module=__name__):
-    logger.info(f"[{module}] {message}")
+def log_info(message, *args, module=__name__, **fields):
+    _log(logging.INFO, message, args, module, fields)
 
-def log_warning(message, module=__name__):
-    logger.warning(f"[{module}] {message}")
+def log_warning(message, *args, module=__name__, **fields):
+    _log(logging.WARNING, message, args, module, fields)
 
-def log_error(message, module=__name__):
-    logger.error(f"[{module}] {message}")
+def log_error(message, *args, module=__name__, exc_info=False, **fields):
+    _log(logging.ERROR, message, args, module, fields, exc_info)
 
-def log_debug(message, module=__name__):
-    logger.debug(f"[{module}] {message}")
+def log_debug(message, *args, module=__name__, **fields):
+    _log(logging.DEBUG, message, args, module, fields)
 
 
 __author_id__ = "KatchDaVizion_2025_DLC_SIG"
@@ -0,0 +1,498 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/memory_daemon.py
+#
+# Local memory service for running several assistants at once. One daemon
+# owns the memory log and the retrieval index; assistants talk to it over a
+# Unix domain socket (memory/memory.sock, owner-only) with one JSON object
+# per line:
+#
+#   {"op": "append", "entries": [...], "id": "..."}  -> {"ok": true}
+#   {"op": "search", "query": "...", "top_k": 5}     -> {"ok": true, "hits": [[text, score], ...]}
+#   {"op": "stats"} / {"op": "ping"}
+#
+# The socket is bound before the index is loaded, so clients connect at once:
+# pings and appends are answered while loading, searches wait for the index.
+# An append carries a client-generated id; a retried append the daemon has
+# already taken is not stored twice.
+#
+# Appends from every client are queued to a single writer that commits
+# whatever has accumulated as one group (one write + one fsync), so
+# concurrent assistants neither interleave nor each pay for their own
+# fsync. Committed entries are embedded into the shared index in the
+# background and searches are answered from it.
+#
+# get_store() uses the daemon when its socket answers and falls back to
+# direct file access otherwise (SUPERBRAIN_MEMORY_DAEMON=0 forces direct).
+# DaemonIndex does the same for searches when the daemon goes away.
+#
+#   python3 -m utils.memory_daemon
+#   python3 -m utils.memory_daemon --wait 10   # exit 0 once a daemon answers
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+from collections import OrderedDict
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:  # no Unix sockets without it either
+    fcntl = None
+
+from utils.logger import log_info, log_warning, log_error
+from utils.memory_store import MEMORY_DIR, open_backend
+from utils import metrics
+
+SOCKET_PATH = os.getenv("SUPERBRAIN_MEMORY_SOCKET", os.path.join(MEMORY_DIR, "memory.sock"))
+DAEMON_ENABLED = os.getenv("SUPERBRAIN_MEMORY_DAEMON", "1") != "0"
+# After the first queued append, wait this long for others to join the commit.
+GROUP_COMMIT_WINDOW = float(os.getenv("SUPERBRAIN_GROUP_COMMIT_MS", "2")) / 1000
+GROUP_COMMIT_MAX = 1000
+# Exit after this many seconds with no requests (0 = never).
+IDLE_TIMEOUT = float(os.getenv("SUPERBRAIN_MEMORY_DAEMON_IDLE", "1800"))
+CLIENT_TIMEOUT = 30
+# How long a search waits for the index to finish loading; below CLIENT_TIMEOUT.
+LOAD_WAIT = 20
+# Append ids remembered for spotting retries.
+RECENT_APPENDS = 10000
+
+_STOP = object()
+
+
+class DaemonLoading(RuntimeError):
+    pass
+
+
+# === Server ===
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.memory_daemon
+        for line in self.rfile:
+            daemon.last_request = time.monotonic()
+            try:
+                reply = daemon.dispatch(json.loads(line))
+            except DaemonLoading as e:
+                reply = {"ok": False, "error": str(e), "loading": True}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MemoryDaemon:
+    def __init__(self, path=SOCKET_PATH, store=None, indexer=None):
+        self.path = path
+        # Group commits make per-commit fsync cheap, so the daemon defaults to durable writes.
+        self.store = store or open_backend(fsync=os.getenv("SUPERBRAIN_MEMORY_FSYNC", "always"))
+        self.indexer = indexer
+        self.worker = None
+        self._ready = threading.Event()  # index loaded (or failed to)
+        self._load_error = None
+        self._unindexed = []  # committed while the index was loading
+        self._index_lock = threading.Lock()
+        self._appends = OrderedDict()  # append id -> Future, recent ones only
+        self._appends_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self.stats = {"commits": 0, "entries": 0, "largest_commit": 0, "searches": 0}
+        self.last_request = time.monotonic()
+        self._server = None
+        self._pidlock = None
+        self._closing = False
+        self._closing_lock = threading.Lock()
+
+    # === Index ===
+    def _open_index(self):
+        from utils.embedding_index import lazy_sentence_transformer_encoder
+        from utils.memory_indexer import MemoryIndexer
+        encoder = lazy_sentence_transformer_encoder(os.getenv("SUPERBRAIN_EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+        self.indexer = MemoryIndexer(encoder, os.getenv("SUPERBRAIN_EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+                                     dtype=os.getenv("SUPERBRAIN_EMBEDDING_DTYPE", "float32"),
+                                     ann=os.getenv("SUPERBRAIN_ANN", "int8"))
+        encoded = self.indexer.sync(self.store.load())
+        log_info("Memory index ready: %d entries, %d newly encoded.", len(self.indexer), encoded,
+                 module="memory_daemon")
+
+    def _load(self):
+        # Runs while the socket is already serving; searches wait on _ready.
+        try:
+            if self.indexer is None:
+                self._open_index()
+            from utils.embedding_worker import EmbeddingWorker
+            worker = EmbeddingWorker(encoder=self.indexer.encoder)
+            with self._index_lock:
+                self.worker = worker
+                pending, self._unindexed = self._unindexed, []
+            self._embed(pending)  # the worker skips any the sync already encoded
+        except Exception as e:
+            self._load_error = str(e)
+            log_error("Memory index failed to load: %s", e, module="memory_daemon")
+        finally:
+            self._ready.set()
+
+    def _wait_ready(self):
+        if not self._ready.wait(LOAD_WAIT):
+            raise DaemonLoading("memory index is still loading")
+        if self._load_error is not None:
+            raise RuntimeError(f"memory index failed to load: {self._load_error}")
+
+    def _embed(self, entries):
+        for entry in entries:
+            for index, passage, key in self.indexer.route(entry):
+                self.worker.submit(passage, index=index, key=key)
+
+    def _index(self, entries):
+        with self._index_lock:
+            if self.worker is None:
+                if not self._ready.is_set():
+                    self._unindexed.extend(entries)
+                return
+        self._embed(entries)
+
+    # === Group Commit ===
+    def _writer(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, deadline = [first], time.monotonic() + GROUP_COMMIT_WINDOW
+            while len(batch) < GROUP_COMMIT_MAX:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(item)
+            entries = [e for chunk, _ in batch for e in chunk]
+            try:
+                with metrics.timer("superbrain_memory_write_seconds", backend="group_commit"):
+                    self.store.append_many(entries)
+            except Exception as e:
+                log_error("Group commit of %d entries failed: %s", len(entries), e, module="memory_daemon")
+                for _, done in batch:
+                    done.set_exception(e)
+                continue
+            for _, done in batch:
+                done.set_result(True)
+            metrics.inc("superbrain_memory_entries_total", len(entries), backend="group_commit")
+            self.stats["commits"] += 1
+            self.stats["entries"] += len(entries)
+            self.stats["largest_commit"] = max(self.stats["largest_commit"], len(entries))
+            self._index(entries)
+
+    def append(self, entries, append_id=None):
+        # Returns once the group containing these entries is on disk. A retry
+        # with the same id waits on the first attempt instead of appending again.
+        with self._appends_lock:
+            done = self._appends.get(append_id) if append_id else None
+            if done is None or (done.done() and done.exception() is not None):
+                done = Future()
+                with self._closing_lock:
+                    if self._closing:
+                        raise RuntimeError("memory daemon is shutting down")
+                    self._queue.put((entries, done))
+                if append_id:
+                    self._appends[append_id] = done
+                    while len(self._appends) > RECENT_APPENDS:
+                        self._appends.popitem(last=False)
+        done.result()
+
+    # === Requests ===
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "append":
+            self.append(request["entries"], request.get("id"))
+            return {"ok": True}
+        if op == "search":
+            self._wait_ready()
+            self.stats["searches"] += 1
+            hits = self.indexer.search(request["query"], top_k=request.get("top_k", 5),
+                                       similarity_threshold=request.get("similarity_threshold"),
+                                       source=request.get("source"), model=request.get("model"),
+                                       with_keys=request.get("with_keys", False))
+            return {"ok": True, "hits": hits}
+        if op == "stats":
+            loading = not self._ready.is_set()
+            stats = dict(self.stats, indexed=len(self.indexer) if self.indexer is not None and not loading else 0,
+                          pending=self._queue.qsize(),
+                         loading=loading)
+            if self.worker is not None:
+                stats["embedding"] = self.worker.summary()
+            return {"ok": True, "stats": stats}
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "ready": self._ready.is_set()}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    # === Lifecycle ===
+    def _claim(self):
+        # One daemon per socket, even when two launchers start at the same moment.
+        self._pidlock = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(self._pidlock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._pidlock.close()
+            return False
+
+    def serve_forever(self):
+        if ping(self.path) or not self._claim():
+            log_warning("A memory daemon is already serving %s.", self.path, module="memory_daemon")
+            return False
+        if os.path.exists(self.path):
+            os.remove(self.path)  # stale socket from a daemon that died
+        self._writer_thread = threading.Thread(target=self._writer, name="memory-group-commit", daemon=True)
+        self._writer_thread.start()
+        old_umask = os.umask(0o177)  # socket is owner-only
+        try:
+            self._server = _Server(self.path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.memory_daemon = self
+        # Bound before loading, so assistants started alongside find the daemon
+        # instead of building (and syncing) their own copy of the index.
+        threading.Thread(target=self._load, name="memory-index-load", daemon=True).start()
+        if IDLE_TIMEOUT:
+            threading.Thread(target=self._idle_watch, name="memory-daemon-idle", daemon=True).start()
+        log_info("Memory daemon listening on %s (pid %d).", self.path, os.getpid(), module="memory_daemon")
+        try:
+            self._server.serve_forever()
+        finally:
+            self.shutdown()
+        return True
+
+    def _idle_watch(self):
+        while time.monotonic() - self.last_request < IDLE_TIMEOUT:
+            time.sleep(min(60, IDLE_TIMEOUT))
+        log_info("Memory daemon idle; shutting down.", module="memory_daemon")
+        self._server.shutdown()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        with self._closing_lock:
+            self._closing = True
+            self._queue.put(_STOP)
+        self._writer_thread.join()  # commits everything queued before the stop
+        if self.worker is not None:
+            self.worker.close()
+        self.store.close()
+        if self._pidlock is not None:
+            self._pidlock.close()
+
+
+# === Client ===
+class MemoryClient:
+    def __init__(self, path=SOCKET_PATH, timeout=CLIENT_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self._sock, self._file = sock, sock.makefile("rb")
+
+    def call(self, request):
+        # Raises OSError when the daemon is unreachable, DaemonLoading while its
+        # index loads, RuntimeError when it reports any other error. A dropped
+        # connection is retried once; appends carry an id, so that is safe.
+        payload = json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionResetError("memory daemon closed the connection")
+                    break
+                except OSError:
+                    self.close()
+                    if attempt:
+                        raise
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            error = DaemonLoading if reply.get("loading") else RuntimeError
+            raise error(reply.get("error", "memory daemon error"))
+        return reply
+
+    def append_many(self, entries):
+        self.call({"op": "append", "entries": entries, "id": uuid.uuid4().hex})
+
+    def search(self, query, top_k=5, similarity_threshold=None, source=None, model=None, with_keys=False):
+        with metrics.timer("superbrain_retrieval_seconds", index="daemon"):
+            reply = self.call({"op": "search", "query": query, "top_k": top_k,
+                               "similarity_threshold": similarity_threshold, "source": source, "model": model,
+                               "with_keys": with_keys})
+        return [tuple(hit) for hit in reply["hits"]]
+
+    def stats(self):
+        return self.call({"op": "stats"})["stats"]
+
+    def __len__(self):
+        return self.stats()["indexed"]
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+
+def ping(path=SOCKET_PATH):
+    if not os.path.exists(path):
+        return False
+    client = MemoryClient(path, timeout=1)
+    try:
+        client.call({"op": "ping"})
+        return True
+    except (OSError, ValueError, RuntimeError):
+        return False
+    finally:
+        client.close()
+
+
+def connect(path=SOCKET_PATH):
+    # A client for the running daemon, or None to use the files directly.
+    if not DAEMON_ENABLED or not ping(path):
+        return None
+    return MemoryClient(path)
+
+
+class DaemonStore:
+    # get_store() stand-in: writes go to the daemon, reads come from the files
+    # (entries are on disk before an append returns). Anything else, e.g.
+    # keyword_search on the SQLite backend, is served by the local store.
+    def __init__(self, client, local):
+        self.client = client
+        self._local = local
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        if not entries:
+            return
+        try:
+            self.client.append_many(entries)
+        except (OSError, ValueError, RuntimeError) as e:
+            log_warning("Memory daemon unavailable (%s); writing directly.", e, module="memory_daemon")
+            self._local.append_many(entries)
+
+    def iter_entries(self):
+        return self._local.iter_entries()
+
+    def load(self):
+        return self._local.load()
+
+    def close(self):
+        self.client.close()
+        self._local.close()
+
+    def __getattr__(self, name):
+        return getattr(self._local, name)
+
+
+class DaemonIndex:
+    # Retrieval stand-in for the local assistant: searches go to the daemon's
+    # shared index. If the daemon stops answering (idle exit, killed), the
+    # index built by `open_local` serves the rest of the session instead.
+    def __init__(self, client, open_local):
+        self.client = client
+        self._open_local = open_local
+        self.local = None
+
+    def _fall_back(self, error):
+        log_warning("Memory daemon unavailable (%s); searching a local index.", error, module="memory_daemon")
+        self.client.close()
+        self.local = self._open_local()
+        return self.local
+
+    def search(self, query, top_k=5, similarity_threshold=None, source=None, model=None, with_keys=False):
+        if self.local is None:
+            try:
+                return self.client.search(query, top_k=top_k, similarity_threshold=similarity_threshold,
+                                          source=source, model=model, with_keys=with_keys)
+            except DaemonLoading:
+                log_warning("Memory daemon is still loading its index; answering without memories.",
+                            module="memory_daemon")
+                return []
+            except (OSError, ValueError, RuntimeError) as e:
+                self._fall_back(e)
+        return self.local.search(query, top_k=top_k, similarity_threshold=similarity_threshold,
+                                 source=source, model=model, with_keys=with_keys)
+
+    def stats(self):
+        if self.local is None:
+            try:
+                return self.client.stats()
+            except (OSError, ValueError, RuntimeError) as e:
+                self._fall_back(e)
+        return {"indexed": len(self.local), "daemon": False}
+
+    def route(self, entry):
+        # While the daemon is up it embeds what we save; afterwards the local index does.
+        return [] if self.local is None else self.local.route(entry)
+
+    def __len__(self):
+        return self.stats()["indexed"]
+
+    def __getattr__(self, name):
+        # e.g. `vectors`, which only a local index has.
+        local = self.__dict__.get("local")
+        if local is None:
+            raise AttributeError(name)
+        return getattr(local, name)
+
+
+def wait(path=SOCKET_PATH, timeout=10.0):
+    # True once a daemon answers on `path`, for launchers that just started one.
+    deadline = time.monotonic() + timeout
+    while not ping(path):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SuperBrain memory daemon")
+    parser.add_argument("--wait", type=float, metavar="SECONDS",
+                        help="don't start a daemon; exit 0 once one answers, 1 after SECONDS")
+    args = parser.parse_args()
+    if args.wait is not None:
+        sys.exit(0 if wait(timeout=args.wait) else 1)
+    # SIGTERM (e.g. from the launcher) shuts down cleanly, committing queued writes.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    sys.exit(0 if MemoryDaemon().serve_forever() else 1)
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -0,0 +1,262 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/memory_indexer.py
+#
+# One retrieval index over every memory, whatever wrote it. Records come in
+# two shapes: local_llm entries carry `content`, the cloud assistants and
+# multi_ai_query write `prompt`/`response`. record_text() turns either into
+# the text that gets embedded.
+#
+# Long memories are split into overlapping passages; each passage is its own
+# row, keyed "<entry hash>-<nnn>" so it points back to its memory, and
+# searches return the best passage per memory rather than whole entries.
+#
+# Vectors are partitioned by (source, model), one PersistentEmbeddingIndex
+# per partition under memory/index/, so "only Venice answers" searches the
+# Venice partition instead of filtering a scan of everything. Unfiltered
+# searches query every partition with one encoded query and merge by score.
+import os
+import re
+import json
+import threading
+import numpy as np
+
+from utils.logger import log_info
+from utils.memory_store import MEMORY_DIR
+from utils.embedding_index import PersistentEmbeddingIndex, content_hash
+from utils.ann_index import make_ann_index
+from utils import metrics
+
+INDEX_DIR = os.path.join(MEMORY_DIR, "index")
+# Single-partition index from before partitioning; its vectors seed the partitions once.
+LEGACY_INDEX_PREFIX = os.path.join(MEMORY_DIR, "embeddings")
+# all-MiniLM-L6-v2 reads 256 word pieces (~190 English words); longer
+# memories are split so nothing past that is silently ignored.
+PASSAGE_WORDS = int(os.getenv("SUPERBRAIN_PASSAGE_WORDS", "160"))
+PASSAGE_OVERLAP = int(os.getenv("SUPERBRAIN_PASSAGE_OVERLAP", "32"))
+
+
+def record_text(entry):
+    # The text a memory is embedded and retrieved as, or None if it has none.
+    if isinstance(entry.get("content"), str) and entry["content"].strip():
+        return entry["content"]
+    prompt, response = entry.get("prompt"), entry.get("response")
+    if isinstance(prompt, str) and isinstance(response, str) and (prompt.strip() or response.strip()):
+        return f"{prompt}\n{response}"
+    return None
+
+
+def passages(text, size=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP):
+    # [(passage, row key)]: overlapping word windows, sliced from the original
+    # text so line breaks survive. The key "<entry hash>-<nnn>" is the
+    # passage's back-pointer to its memory.
+    entry = content_hash(text)
+    spans = [m.span() for m in re.finditer(r"\S+", text)]
+    if len(spans) <= size:
+        return [(text, f"{entry}-000")]
+    out, step = [], max(1, size - overlap)
+    for n, start in enumerate(range(0, len(spans) - overlap, step)):
+        words = spans[start:start + size]
+        out.append((text[words[0][0]:words[-1][1]], f"{entry}-{n:03d}"))
+    return out
+
+
+def entry_of(key):
+    # The memory (content hash of its text) a row key points back to.
+    return key.split("-")[0]
+
+
+_MULTI_AI_PROMPT = re.compile(r"(\w+) → ")
+
+
+def partition_key(entry):
+    # ("local_llm", "tinyllama") for "local_llm:tinyllama", ("venice", "llama-3.3-70b"), ("openai", "") ...
+    source = str(entry.get("source") or "unknown")
+    source, _, embedded_model = source.partition(":")
+    model = entry.get("model") or embedded_model
+    if source == "multi_ai_query" and not model:
+        # Older multi_ai_query answers name their provider only in the prompt: "Venice → ...".
+        answered = _MULTI_AI_PROMPT.match(str(entry.get("prompt") or ""))
+        if answered:
+            source = answered.group(1)
+    return source.strip().lower(), str(model).strip()
+
+
+def matches(entry, source=None, model=None):
+    # Same filter semantics as MemoryIndexer.select, for entries found some other way.
+    s, m = partition_key(entry)
+    return (source is None or s == source.lower()) and (model is None or m.lower() == model.lower())
+
+
+def _slug(key):
+    return re.sub(r"[^a-z0-9._-]+", "_", "--".join(key).lower()).strip("_") or "default"
+
+
+class MemoryIndexer:
+    def __init__(self, encoder, model_name, directory=INDEX_DIR, dtype="float32", ann="exact",
+                 legacy_prefix=LEGACY_INDEX_PREFIX):
+        self.encoder = encoder
+        self.model_name = model_name
+        self.directory = directory
+        self.dtype = dtype
+        self.ann = ann  # backend kind; every partition gets its own structure
+        self.legacy_prefix = legacy_prefix
+        self.manifest_path = os.path.join(directory, "partitions.json")
+        self.partitions = {}
+        self._recent = {}  # passage -> (index, key) from the last search, for vectors()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        for slug, key in self._read_manifest().items():
+            self.partitions[tuple(key)] = self._open(slug)
+
+    # === Partitions ===
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({_slug(key): list(key) for key in self.partitions}, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _open(self, slug):
+        return PersistentEmbeddingIndex(self.encoder, os.path.join(self.directory, slug), model_name=self.model_name,
+                                        dtype=self.dtype, ann=make_ann_index(self.ann))
+
+    def partition(self, key):
+        with self._lock:
+            if key not in self.partitions:
+                self.partitions[key] = self._open(_slug(key))
+                self._write_manifest()
+            return self.partitions[key]
+
+    def select(self, source=None, model=None):
+        # Partitions matching the filter; source/model compare case-insensitively.
+        return [index for (s, m), index in list(self.partitions.items())
+                if matches({"source": s, "model": m}, source, model)]
+
+    def __len__(self):
+        return sum(len(index) for index in list(self.partitions.values()))
+
+    # === Writes ===
+    def route(self, entry):
+        # [(partition index, passage, row key)] for a new memory; empty if it has no text.
+        text = record_text(entry)
+        if not text:
+            return []
+        index = self.partition(partition_key(entry))
+        return [(index, passage, key) for passage, key in passages(text)]
+
+    def add(self, entry):
+        routed = self.route(entry)
+        if not routed:
+            return 0
+        index = routed[0][0]
+        return index.add_many([p for _, p, _ in routed], [k for _, _, k in routed])
+
+    def sync(self, entries):
+        # Validates every partition against the memory log and encodes the
+        # passages that are missing; returns how many were encoded.
+        grouped = {}
+        for entry in entries:
+            text = record_text(entry)
+            if text:
+                grouped.setdefault(partition_key(entry), []).extend(passages(text))
+        legacy = self._open_legacy()
+        encoded = 0
+        for key in set(grouped) | set(self.partitions):
+            index = self.partition(key)
+            items = grouped.get(key, [])
+            # Whole-entry rows from before passages (keyed by the entry's hash)
+            # are reused for entries short enough to be a single passage.
+            self._seed(index, index, items)
+            if legacy is not None:
+                self._seed(index, legacy, items)
+            encoded += index.sync([p for p, _ in items], [k for _, k in items])
+        if legacy is not None:
+            legacy._reset()  # everything useful now lives in the partitions
+            log_info("Moved the single embedding index into per-source partitions.", module="memory_indexer")
+        return encoded
+
+    def _open_legacy(self):
+        if not os.path.exists(self.legacy_prefix + ".meta.json"):
+            return None
+        return PersistentEmbeddingIndex(self.encoder, self.legacy_prefix, model_name=self.model_name, dtype=self.dtype)
+
+    @staticmethod
+    def _seed(index, source, items):
+        # Copies vectors `source` holds under a whole-entry hash to the
+        # passage key, instead of re-encoding the same text.
+        found = {}
+        for passage, key in items:
+            old = key.split("-")[0]
+            if key.endswith("-000") and old in source._rows and not index.has(key) and content_hash(passage) == old:
+                found.setdefault(key, (passage, source._rows[old]))
+        if found:
+            vectors = np.asarray(source.vectors[[row for _, row in found.values()]], dtype=np.float32)
+            index.add_vectors([p for p, _ in found.values()], vectors, list(found))
+
+    def vectors(self, texts):
+        # Stored vectors for passages returned by the last search; anything else is encoded.
+        out, missing = [None] * len(texts), []
+        for i, text in enumerate(texts):
+            found = self._recent.get(text)
+            if found:
+                index, key = found
+                with index._lock:
+                    row = index._rows.get(key)
+                    if row is not None:
+                        out[i] = np.asarray(index.vectors[row], dtype=np.float32)
+            if out[i] is None:
+                missing.append(i)
+        if missing:
+            for i, vector in zip(missing, self.encoder([texts[i] for i in missing])):
+                out[i] = vector
+        return np.stack(out) if out else np.empty((0, 0), dtype=np.float32)
+
+    # === Search ===
+    def search(self, query, top_k=5, similarity_threshold=None, source=None, model=None, per_entry=1,
+               with_keys=False):
+        # Returns [(passage, score)] best first across the selected partitions,
+        # at most per_entry passages from any one memory; with_keys adds the
+        # memory's id (content hash of its record_text) as a third element.
+        with metrics.timer("superbrain_retrieval_seconds", index=self.ann):
+            return self._search(query, top_k, similarity_threshold, source, model, per_entry, with_keys)
+
+    def _search(self, query, top_k, similarity_threshold, source, model, per_entry, with_keys):
+        partitions = [index for index in self.select(source, model) if len(index)]
+        if not partitions:
+            return []
+        query_vector = self.encoder([query])[0] if isinstance(query, str) else query
+        hits = []
+        for index in partitions:
+            # Over-fetch: neighbouring passages of one memory tend to rank together.
+            for text, score, key in index.search(query_vector, top_k=top_k * 3,
+                                                 similarity_threshold=similarity_threshold, with_keys=True):
+                hits.append((score, text, key, index))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        results, per_parent, recent = [], {}, {}
+        for score, text, key, index in hits:
+            parent = entry_of(key)
+            if per_parent.get(parent, 0) >= per_entry:
+                continue
+            per_parent[parent] = per_parent.get(parent, 0) + 1
+            results.append((text, score, parent) if with_keys else (text, score))
+            recent[text] = (index, key)
+            if len(results) == top_k:
+                break
+        self._recent = recent
+        return results
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -0,0 +1,372 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/memory_store.py
+#
+# Append-only memory log shared by every assistant.
+#
+# Records live in line-delimited segment files under memory/segments/:
+#
+#     <crc32 hex> <json record>\n
+#
+# Appends are O(1), every record carries its own checksum so a torn write
+# only loses that one line, and sealed segments are merged in the background.
+# The legacy memory/memory_db.json array is migrated once on first open.
+import os
+import re
+import json
+import time
+import zlib
+import atexit
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+from utils.logger import log_info, log_warning, log_error
+from utils import metrics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEMORY_DIR = os.path.join(PROJECT_ROOT, "memory")
+LEGACY_MEMORY_FILE = os.path.join(MEMORY_DIR, "memory_db.json")
+
+# "always" fsyncs every append, "interval" at most once per FSYNC_INTERVAL
+# seconds (and on exit), "never" leaves it to the OS.
+FSYNC_POLICY = os.getenv("SUPERBRAIN_MEMORY_FSYNC", "interval")
+FSYNC_INTERVAL = float(os.getenv("SUPERBRAIN_MEMORY_FSYNC_INTERVAL", "1.0"))
+SEGMENT_MAX_BYTES = int(os.getenv("SUPERBRAIN_SEGMENT_MAX_BYTES", str(16 * 1024 * 1024)))
+# "segments" (this module) or "sqlite" (utils/sqlite_memory.py: indexed columns + FTS5).
+MEMORY_BACKEND = os.getenv("SUPERBRAIN_MEMORY_BACKEND", "segments")
+COMPACT_MIN_SEGMENTS = 4
+COMPACT_CHECK_INTERVAL = 300
+
+_SEGMENT_RE = re.compile(r"^seg-(\d{6})(?:-(\d{6}))?\.jsonl$")
+
+
+def encode_record(entry):
+    payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def decode_record(line):
+    # Returns the entry, or None if the line is torn or fails its checksum.
+    line = line.rstrip(b"\n")
+    if len(line) < 10 or line[8:9] != b" ":
+        return None
+    payload = line[9:]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+class _Segment:
+    def __init__(self, directory, name):
+        match = _SEGMENT_RE.match(name)
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.start = int(match.group(1))
+        self.end = int(match.group(2) or match.group(1))
+        self.compacted = match.group(2) is not None
+
+
+class MemoryStore:
+    def __init__(self, directory=MEMORY_DIR, fsync=FSYNC_POLICY, segment_max_bytes=SEGMENT_MAX_BYTES,
+                 compact_max_bytes=None):
+        self.directory = directory
+        self.segment_dir = os.path.join(directory, "segments")
+        self.fsync = fsync
+        self.segment_max_bytes = segment_max_bytes
+        self.compact_max_bytes = compact_max_bytes or 16 * segment_max_bytes
+        self._lock = threading.RLock()
+        self._handle = None
+        self._handle_segment = None
+        self._last_fsync = 0.0
+        self._dirty = False
+        self._compactor = None
+        self._stop = threading.Event()
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self.migrate_legacy_json()
+
+    # === Segments ===
+    def _segments(self):
+        segments = [_Segment(self.segment_dir, n) for n in os.listdir(self.segment_dir) if _SEGMENT_RE.match(n)]
+        # A compacted segment supersedes every raw segment in its range; raw
+        # leftovers are what a crash mid-compaction leaves behind.
+        covered = set()
+        for seg in segments:
+            if seg.compacted:
+                covered.update(s.name for s in segments
+                               if s is not seg and seg.start <= s.start and s.end <= seg.end)
+        live = [s for s in segments if s.name not in covered]
+        return sorted(live, key=lambda s: s.start)
+
+    def _open_active(self):
+        segments = self._segments()
+        if segments and not segments[-1].compacted and os.path.getsize(segments[-1].path) < self.segment_max_bytes:
+            name = segments[-1].name
+        else:
+            next_id = segments[-1].end + 1 if segments else 1
+            name = f"seg-{next_id:06d}.jsonl"
+        self._close_handle()
+        path = os.path.join(self.segment_dir, name)
+        self._handle = open(path, "ab")
+        self._handle_segment = name
+        # Terminate a torn tail line so it does not swallow the next record.
+        if self._handle.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._handle.write(b"\n")
+
+    def _close_handle(self):
+        if self._handle is not None:
+            if self._dirty and self.fsync != "never":
+                self._sync()
+            self._handle.close()
+            self._handle = None
+
+    def _sync(self):
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+
+    # === Writes ===
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        data = b"".join(encode_record(e) for e in entries)
+        if not data:
+            return
+        with self._lock:
+            if self._handle is None:
+                self._open_active()
+            for _ in range(2):
+                if fcntl:
+                    fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+                st = os.fstat(self._handle.fileno())
+                # Reopen if compaction unlinked our segment or it is full.
+                if st.st_nlink == 0 or st.st_size >= self.segment_max_bytes:
+                    if fcntl:
+                        fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+                    self._open_active()
+                    continue
+                break
+            try:
+                self._handle.write(data)
+                self._handle.flush()
+                self._dirty = True
+                if self.fsync == "always" or (
+                        self.fsync == "interval" and time.monotonic() - self._last_fsync >= FSYNC_INTERVAL):
+                    self._sync()
+            finally:
+                if fcntl:
+                    fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+
+    # === Reads ===
+    def iter_entries(self):
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+        # A segment can be compacted away between listing and opening it. Its
+        # records then live in a merged segment the listing didn't have, so we
+        # re-list and resume after the last segment read, skipping the records
+        # of the merged one that came from segments already read.
+        done_end, read = 0, []  # read: (start, end, records) of each segment read
+        while True:
+            for seg in (s for s in self._segments() if s.end > done_end):
+                skip = sum(n for start, end, n in read if seg.start <= start and end <= done_end)
+                try:
+                    f = open(seg.path, "rb")
+                except FileNotFoundError:
+                    break
+                records = 0
+                with f:
+                    for lineno, line in enumerate(f, 1):
+                        entry = decode_record(line)
+                        if entry is None:
+                            log_warning("Skipping corrupt record %s:%d", seg.name, lineno, module="memory_store")
+                            continue
+                        records += 1
+                        if records > skip:
+                            yield entry
+                read = [r for r in read if not (seg.start <= r[0] and r[1] <= seg.end)]
+                read.append((seg.start, seg.end, records))
+                done_end = seg.end
+            else:
+                return
+
+    def load(self):
+        return list(self.iter_entries())
+
+    # === Compaction ===
+    def compact(self, min_segments=COMPACT_MIN_SEGMENTS):
+        # Every process with a store runs a compactor; whichever holds
+        # .compact.lock does the pass and the others skip it.
+        lock = open(os.path.join(self.segment_dir, ".compact.lock"), "a")
+        try:
+            if fcntl:
+                try:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+            with self._lock:
+                return self._compact(min_segments)
+        finally:
+            lock.close()
+
+    def _compact(self, min_segments):
+        segments = self._segments()
+        active = self._handle_segment if self._handle is not None else None
+        sealed = [s for s in segments[:-1] if s.name != active]
+        if len(sealed) < min_segments:
+            return False
+        # Merge the first run of contiguous sealed segments that fits in one
+        # compacted file, so full compacted files are never rewritten.
+        run, size = [], 0
+        for seg in sealed:
+            seg_size = os.path.getsize(seg.path)
+            if run and (seg.start != run[-1].end + 1 or size + seg_size > self.compact_max_bytes):
+                if len(run) >= 2:
+                    break
+                run, size = [], 0
+            if seg_size < self.compact_max_bytes:
+                run.append(seg)
+                size += seg_size
+        if len(run) < 2:
+            return False
+
+        name = f"seg-{run[0].start:06d}-{run[-1].end:06d}.jsonl"
+        tmp_path = os.path.join(self.segment_dir, f"{name}.{os.getpid()}.tmp")
+        locked = []
+        try:
+            with open(tmp_path, "wb") as out:
+                for seg in run:
+                    f = open(seg.path, "rb")
+                    locked.append(f)
+                    if fcntl:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                    for line in f:
+                        if decode_record(line) is not None:
+                            out.write(line if line.endswith(b"\n") else line + b"\n")
+                out.flush()
+                os.fsync(out.fileno())
+            # Only replace segments that are still there (e.g. Windows, where
+            # compactions are not serialised between processes).
+            if any(os.fstat(f.fileno()).st_nlink == 0 for f in locked):
+                log_warning("Skipped compacting into %s: its segments were compacted elsewhere", name,
+                            module="memory_store")
+                return False
+            os.replace(tmp_path, os.path.join(self.segment_dir, name))
+            for seg in run:
+                os.remove(seg.path)
+        finally:
+            for f in locked:
+                f.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        log_info("Compacted %d segments into %s", len(run), name, module="memory_store")
+        return True
+
+    def start_background_compaction(self, interval=COMPACT_CHECK_INTERVAL):
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    log_error("Background compaction failed: %s", e, module="memory_store")
+
+        self._compactor = threading.Thread(target=run, name="memory-compactor", daemon=True)
+        self._compactor.start()
+
+    # === Migration ===
+    def migrate_legacy_json(self, legacy_file=None):
+        legacy_file = legacy_file or os.path.join(self.directory, "memory_db.json")
+        if not os.path.exists(legacy_file) or self._segments():
+            return 0
+        try:
+            with open(legacy_file, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            log_error("Could not migrate %s: %s", legacy_file, e, module="memory_store")
+            return 0
+        path = os.path.join(self.segment_dir, "seg-000001.jsonl")
+        with open(path + ".tmp", "wb") as out:
+            for entry in entries:
+                out.write(encode_record(entry))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(path + ".tmp", path)
+        os.replace(legacy_file, legacy_file + ".migrated")
+        log_info("Migrated %d entries from %s to the append-only log.", len(entries), legacy_file,
+                 module="memory_store")
+        return len(entries)
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._close_handle()
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def open_backend(fsync=FSYNC_POLICY):
+    # The store SUPERBRAIN_MEMORY_BACKEND selects, opened directly on the files.
+    if MEMORY_BACKEND == "sqlite":
+        from utils.sqlite_memory import SqliteMemoryStore
+        return SqliteMemoryStore(fsync=fsync)
+    store = MemoryStore(fsync=fsync)
+    store.start_background_compaction()
+    return store
+
+
+def get_store():
+    # Goes through the memory daemon (utils/memory_daemon.py) when one is running.
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            from utils.memory_daemon import connect, DaemonStore
+            client = connect()
+            _default_store = DaemonStore(client, open_backend()) if client else open_backend()
+            atexit.register(_default_store.close)
+        return _default_store
+
+
+_BACKEND_LABELS = {"MemoryStore": "segments", "SqliteMemoryStore": "sqlite", "DaemonStore": "daemon"}
+
+
+def append_entry(entry):
+    append_entries([entry])
+
+
+def append_entries(entries):
+    if not entries:
+        return
+    store = get_store()
+    backend = _BACKEND_LABELS.get(type(store).__name__, type(store).__name__)
+    with metrics.timer("superbrain_memory_write_seconds", backend=backend):
+        store.append_many(entries)
+    metrics.inc("superbrain_memory_entries_total", len(entries), backend=backend)
+
+
+def load_entries():
+    return get_store().load()
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
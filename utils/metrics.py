@@ -0,0 +1,298 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/metrics.py
+#
+# In-process counters and latency histograms, labelled Prometheus-style:
+#
+#   metrics.inc("superbrain_provider_requests_total", provider="Groq", outcome="ok")
+#   with metrics.timer("superbrain_retrieval_seconds", index="flat"):
+#       ...
+#
+# Nothing to wire up per entry point. The first recorded metric starts
+# whatever export is configured and registers the exit summary:
+#
+#   SUPERBRAIN_METRICS_PORT=9464           serve /metrics on 127.0.0.1
+#   SUPERBRAIN_METRICS_TEXTFILE_DIR=dir    write dir/superbrain_<script>.prom every
+#                                          15s and at exit (node_exporter textfile
+#                                          collector)
+#   SUPERBRAIN_METRICS_SUMMARY=0           no summary table on exit
+#
+# Only the standard library is used, so importing this module costs nothing.
+import os
+import sys
+import time
+import atexit
+import bisect
+import threading
+from contextlib import contextmanager
+
+PORT = int(os.getenv("SUPERBRAIN_METRICS_PORT", "0"))
+TEXTFILE_DIR = os.getenv("SUPERBRAIN_METRICS_TEXTFILE_DIR")
+TEXTFILE_INTERVAL = 15
+SUMMARY_ON_EXIT = os.getenv("SUPERBRAIN_METRICS_SUMMARY", "1") != "0"
+
+# Seconds; spans an embedding batch (ms) up to a slow cloud answer (minutes).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Histograms that don't measure seconds.
+BUCKETS = {
+    "superbrain_stream_tokens_per_second": (1, 2.5, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500, 1000),
+}
+
+HELP = {
+    "superbrain_provider_requests_total": "Cloud provider calls by outcome (ok, error, rejected, cancelled).",
+    "superbrain_provider_retries_total": "Cloud provider attempts that were retried.",
+    "superbrain_provider_latency_seconds": "Cloud provider call latency, including retries.",
+    "superbrain_provider_tokens_total": "Tokens reported by cloud providers, by kind (prompt, completion).",
+    "superbrain_stream_ttft_seconds": "Time to the first streamed chunk of an answer.",
+    "superbrain_stream_tokens_per_second": "Streamed generation speed, from the provider's own token count.",
+    "superbrain_ollama_requests_total": "Ollama generations by outcome.",
+    "superbrain_ollama_generation_seconds": "Ollama generation latency, model load included.",
+    "superbrain_ollama_tokens_total": "Tokens reported by Ollama, by kind (prompt, completion).",
+    "superbrain_embedding_seconds": "Time to encode one batch of texts.",
+    "superbrain_embedding_texts_total": "Texts encoded into embeddings.",
+    "superbrain_retrieval_seconds": "Memory retrieval latency.",
+    "superbrain_memory_write_seconds": "Time to durably append memories.",
+    "superbrain_memory_entries_total": "Memories appended.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket holding the q-th observation,
+        # kept within the observed range so small samples don't read high.
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                estimate = lower + (upper - lower) * (rank - seen) / n
+                return min(max(estimate, self.min), self.max)
+            seen += n
+        return self.max
+
+
+class Registry:
+    def __init__(self):
+        self.counters = {}    # (name, labels) -> float
+        self.histograms = {}  # (name, labels) -> Histogram
+        self._lock = threading.Lock()
+        self._started = False
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self._start()
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(BUCKETS.get(name, LATENCY_BUCKETS))
+            self.histograms[key].observe(value)
+        self._start()
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # === Export ===
+    def render(self):
+        # Prometheus text exposition format.
+        lines, typed = [], set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (h.buckets, list(h.counts), h.count, h.sum))
+                                for key, h in self.histograms.items())
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{fmt(labels)} {value:g}")
+        for (name, labels), (buckets, counts, count, total) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{fmt(labels, [('le', bound if bound == '+Inf' else f'{bound:g}')])} {cumulative}")
+            lines.append(f"{name}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        # [(metric, labels, text)] rows for the exit table.
+        rows = []
+        with self._lock:
+            for (name, labels), h in sorted(self.histograms.items()):
+                unit = "s" if name.endswith("_seconds") else ""
+                rows.append((name, _label_text(labels), f"n={h.count} mean={h.sum / h.count:.3f}{unit} "
+                             f"p50={h.quantile(0.5):.3f}{unit} p95={h.quantile(0.95):.3f}{unit}"))
+            for (name, labels), value in sorted(self.counters.items()):
+                rows.append((name, _label_text(labels), f"{value:g}"))
+        return rows
+
+    def write_textfile(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)  # the collector never reads a half-written file
+
+    def _start(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if PORT:
+            serve(self, PORT)
+        if TEXTFILE_DIR:
+            path = os.path.join(TEXTFILE_DIR, f"superbrain_{_script_name()}.prom")
+            os.makedirs(TEXTFILE_DIR, exist_ok=True)
+            threading.Thread(target=self._textfile_loop, args=(path,), name="metrics-textfile", daemon=True).start()
+            atexit.register(self.write_textfile, path)
+        if SUMMARY_ON_EXIT:
+            atexit.register(self.print_summary)
+
+    def _textfile_loop(self, path):
+        while True:
+            time.sleep(TEXTFILE_INTERVAL)
+            try:
+                self.write_textfile(path)
+            except OSError:
+                pass
+
+    def print_summary(self, out=None):
+        rows = self.summary()
+        if not rows:
+            return
+        out = out or sys.stderr
+        width = max(len(f"{name}{labels}") for name, labels, _ in rows)
+        out.write("\n[📈] Metrics this run:\n")
+        for name, labels, text in rows:
+            out.write(f"  {f'{name}{labels}':<{width}}  {text}\n")
+        out.flush()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels):
+    return "{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""
+
+
+def _script_name():
+    name = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0]
+    return name if name.replace("_", "").isalnum() else "python"  # "-c", "-" and the REPL
+
+
+def serve(registry, port):
+    # /metrics on localhost in a daemon thread; a second process on the same port just logs.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    except OSError as e:
+        from utils.logger import log_warning
+        log_warning("Metrics endpoint not started on port %s: %s", port, e, module="metrics")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+timer = registry.timer
+render = registry.render
+
+
+def record_call(provider, fn, *args, **kwargs):
+    # fn(*args, **kwargs) counted like a utils.resilience call (outcome,
+    # latency, tokens), for assistants that call their SDK directly.
+    start, outcome = time.perf_counter(), "error"
+    try:
+        result = fn(*args, **kwargs)
+        outcome = "ok"
+        record_usage(provider, result)
+        return result
+    finally:
+        inc("superbrain_provider_requests_total", provider=provider, outcome=outcome)
+        observe("superbrain_provider_latency_seconds", time.perf_counter() - start, provider=provider)
+
+
+def record_usage(provider, response):
+    # Token counts from an SDK response or a JSON dict, whichever shape it has.
+    usage = response.get("usage") if isinstance(response, dict) else (
+        getattr(response, "usage", None) or getattr(response, "usage_metadata", None))
+    if usage is None:
+        return
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+    prompt = get("prompt_tokens") or get("input_tokens") or get("prompt_token_count")
+    completion = get("completion_tokens") or get("output_tokens") or get("candidates_token_count")
+    if isinstance(prompt, int):
+        inc("superbrain_provider_tokens_total", prompt, provider=provider, kind="prompt")
+    if isinstance(completion, int):
+        inc("superbrain_provider_tokens_total", completion, provider=provider, kind="completion")
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
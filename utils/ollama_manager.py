@@ -0,0 +1,428 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/ollama_manager.py
+#
+# Local models through Ollama's HTTP API (http://127.0.0.1:11434) instead of
+# the `ollama` CLI. One pooled requests Session serves every call, and the
+# installed-model list is cached for a short while, so '/list' and '/model'
+# don't start a subprocess each time.
+#
+# Selecting a model loads it in the background (an empty generate request),
+# so the first question after a switch doesn't pay the whole load time.
+# Requests pass keep_alive so the current model stays resident between
+# questions. A model that is no longer selected is unloaded once it has been
+# idle for SUPERBRAIN_OLLAMA_IDLE_UNLOAD seconds, which frees its RAM.
+#
+# Downloads (pull) run as background jobs, at most SUPERBRAIN_OLLAMA_MAX_PULLS
+# at a time, and report bytes, rate and ETA while the chat keeps working.
+# update_available() compares an installed model's digest with the one the
+# registry serves, without pulling anything.
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+
+from utils.logger import log_info, log_warning, log_error
+from utils import metrics
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+# How long Ollama keeps the selected model loaded after its last request.
+KEEP_ALIVE = os.getenv("SUPERBRAIN_OLLAMA_KEEP_ALIVE", "30m")
+# Seconds before a model that is no longer selected is unloaded.
+IDLE_UNLOAD = float(os.getenv("SUPERBRAIN_OLLAMA_IDLE_UNLOAD", "120"))
+MODEL_LIST_TTL = 30
+CONNECT_TIMEOUT = 5
+# Generation can wait on a model load from disk; this is the read timeout.
+GENERATE_TIMEOUT = float(os.getenv("SUPERBRAIN_OLLAMA_TIMEOUT", "600"))
+# Concurrent downloads; further pulls wait in line.
+MAX_PULLS = int(os.getenv("SUPERBRAIN_OLLAMA_MAX_PULLS", "2"))
+# Download rate is averaged over this many seconds.
+RATE_WINDOW = 5.0
+OLLAMA_REGISTRY = os.getenv("SUPERBRAIN_OLLAMA_REGISTRY", "https://registry.ollama.ai")
+MANIFEST_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
+
+
+def _base_url(host):
+    return host if host.startswith("http") else f"http://{host}"
+
+
+def registry_path(name):
+    # ("library/llama3", "latest") for "llama3"; None for models from another host (hf.co/...).
+    repo, _, tag = name.partition(":")
+    if "." in repo.split("/")[0]:
+        return None
+    return (repo if "/" in repo else f"library/{repo}"), tag or "latest"
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s" if seconds >= 60 else f"{seconds}s"
+
+
+class PullJob:
+    # One background `ollama pull`; progress is summed over the model's layers.
+    def __init__(self, name):
+        self.name = name
+        self.status = "queued"
+        self.error = None
+        self.created = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.layers = {}  # digest -> (completed, total) bytes
+        self._samples = deque()  # (time, completed) for the rate
+        self._cancelled = threading.Event()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def ok(self):
+        return self.status == "success"
+
+    @property
+    def completed(self):
+        return sum(c for c, _ in self.layers.values())
+
+    @property
+    def total(self):
+        return sum(t for _, t in self.layers.values())
+
+    def update(self, data):
+        self.status = data.get("status", self.status)
+        digest = data.get("digest")
+        if digest and data.get("total"):
+            self.layers[digest] = (data.get("completed", 0), data["total"])
+            now = time.monotonic()
+            self._samples.append((now, self.completed))
+            while len(self._samples) > 2 and now - self._samples[0][0] > RATE_WINDOW:
+                self._samples.popleft()
+
+    @property
+    def rate(self):
+        # Bytes per second over the last few seconds.
+        if len(self._samples) < 2:
+            return 0.0
+        (t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+        return (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+
+    @property
+    def eta(self):
+        rate = self.rate
+        return (self.total - self.completed) / rate if rate > 0 else None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def summary(self):
+        if self.done:
+            took = format_duration(self.finished - (self.started or self.created))
+            if self.ok:
+                return f"{self.name}: done, {format_bytes(self.total)} in {took}"
+            return f"{self.name}: {self.status}" + (f" ({self.error})" if self.error else "")
+        if not self.layers:
+            return f"{self.name}: {self.status}"
+        percent = 100 * self.completed / self.total if self.total else 0
+        eta = self.eta
+        return (f"{self.name}: {format_bytes(self.completed)} / {format_bytes(self.total)} ({percent:.0f}%), "
+                f"{format_bytes(self.rate)}/s, ETA {format_duration(eta) if eta is not None else '?'}")
+
+
+class OllamaModel:
+    # What get_llm() hands out: llm(prompt) -> answer, llm.stream(prompt) -> chunks.
+    def __init__(self, manager, name):
+        self.manager = manager
+        self.name = name
+
+    def stream(self, prompt, stats=None):
+        return self.manager.generate(self.name, prompt, stats=stats)
+
+    def __call__(self, prompt):
+        return "".join(self.manager.generate(self.name, prompt))
+
+
+class OllamaManager:
+    def __init__(self, host=OLLAMA_HOST, keep_alive=KEEP_ALIVE, idle_unload=IDLE_UNLOAD):
+        self.url = _base_url(host).rstrip("/")
+        self.keep_alive = keep_alive
+        self.idle_unload = idle_unload
+        self.current = None
+        self.last_stats = {}  # timing fields of the last finished generation
+        self._session = None
+        self._models = None   # name -> size in bytes, as /api/tags lists them
+        self._digests = {}    # name -> manifest digest, from the same listing
+        self._models_at = 0.0
+        self._last_used = {}  # model -> monotonic time of its last request
+        self._loading = {}    # model -> Event set when its background load ends
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.pulls = {}  # model -> latest PullJob
+        self._pull_slots = threading.BoundedSemaphore(max(1, MAX_PULLS))
+
+    # === HTTP ===
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+                self._session = session
+            return self._session
+
+    def _post(self, path, payload, stream=False, timeout=GENERATE_TIMEOUT):
+        r = self.session.post(f"{self.url}{path}", json=payload, stream=stream, timeout=(CONNECT_TIMEOUT, timeout))
+        if r.status_code != 200:
+            message = r.text
+            r.close()
+            raise RuntimeError(f"Ollama Error {r.status_code}: {message}")
+        return r
+
+    def available(self):
+        try:
+            self.session.get(f"{self.url}/api/version", timeout=CONNECT_TIMEOUT).raise_for_status()
+            return True
+        except Exception:
+            return False
+
+    # === Models ===
+    def models(self, refresh=False):
+        # Installed model names ("tinyllama:latest", ...); [] when Ollama is not running.
+        with self._lock:
+            if not refresh and self._models is not None and time.monotonic() - self._models_at < MODEL_LIST_TTL:
+                return list(self._models)
+        try:
+            r = self.session.get(f"{self.url}/api/tags", timeout=CONNECT_TIMEOUT)
+            r.raise_for_status()
+            listed = r.json().get("models", [])
+        except Exception as e:
+            log_error("Could not list Ollama models at %s: %s", self.url, e, module="ollama_manager")
+            return []
+        models = {m["name"]: m.get("size", 0) for m in listed}
+        with self._lock:
+            self._models, self._models_at = models, time.monotonic()
+            self._digests = {m["name"]: m.get("digest") for m in listed}
+        return list(models)
+
+    def size(self, name):
+        # Bytes on disk for an installed model (roughly what it needs in RAM); 0 if unknown.
+        self.models()
+        with self._lock:
+            models = self._models or {}
+        return models.get(name) or models.get(f"{name}:latest", 0)
+
+    def update_available(self, name):
+        # True if the registry serves a different manifest than the installed
+        # one (/api/tags reports the manifest's sha256 as the digest); None
+        # when it can't be told: not installed, another registry, offline.
+        path = registry_path(name)
+        self.models(refresh=True)
+        with self._lock:
+            local = self._digests.get(name) or self._digests.get(f"{name}:latest")
+        if path is None or not local:
+            return None
+        try:
+            r = self.session.get(f"{OLLAMA_REGISTRY}/v2/{path[0]}/manifests/{path[1]}",
+                                 headers={"Accept": MANIFEST_TYPE}, timeout=CONNECT_TIMEOUT)
+            r.raise_for_status()
+        except Exception as e:
+            log_warning("Could not check '%s' for updates: %s", name, e, module="ollama_manager")
+            return None
+        remote = r.headers.get("Docker-Content-Digest") or "sha256:" + hashlib.sha256(r.content).hexdigest()
+        return remote.split(":")[-1] != local.split(":")[-1]
+
+    def invalidate(self):
+        # After a pull or delete, the next models() call asks Ollama again.
+        with self._lock:
+            self._models = None
+
+    def loaded(self):
+        # Models Ollama currently holds in memory.
+        try:
+            r = self.session.get(f"{self.url}/api/ps", timeout=CONNECT_TIMEOUT)
+            r.raise_for_status()
+            return [m["name"] for m in r.json().get("models", [])]
+        except Exception as e:
+            log_warning("Could not query loaded Ollama models: %s", e, module="ollama_manager")
+            return []
+
+    # === Residency ===
+    def select(self, name):
+        # Makes `name` the current model and starts loading it in the background.
+        previous, self.current = self.current, name
+        if previous and previous != name:
+            self._last_used.setdefault(previous, time.monotonic())
+        self.preload(name)
+        self._start_reaper()
+        return OllamaModel(self, name)
+
+    def preload(self, name):
+        with self._lock:
+            if name in self._loading and not self._loading[name].is_set():
+                return self._loading[name]
+            done = self._loading[name] = threading.Event()
+        threading.Thread(target=self._load, args=(name, done), name=f"ollama-preload-{name}", daemon=True).start()
+        return done
+
+    def _load(self, name, done):
+        start = time.perf_counter()
+        try:
+            # A generate request without a prompt only loads the model.
+            self._post("/api/generate", {"model": name, "keep_alive": self.keep_alive}).close()
+            self._last_used[name] = time.monotonic()
+            log_info("Ollama model '%s' loaded in %.1fs.", name, time.perf_counter() - start, module="ollama_manager")
+        except Exception as e:
+            log_warning("Could not preload Ollama model '%s': %s", name, e, module="ollama_manager")
+        finally:
+            done.set()
+
+    def wait_ready(self, name, timeout=None):
+        done = self._loading.get(name)
+        return done.wait(timeout) if done is not None else True
+
+    def unload(self, name):
+        try:
+            self._post("/api/generate", {"model": name, "keep_alive": 0}, timeout=CONNECT_TIMEOUT * 6).close()
+            self._last_used.pop(name, None)
+            log_info("Unloaded idle Ollama model '%s'.", name, module="ollama_manager")
+            return True
+        except Exception as e:
+            log_warning("Could not unload Ollama model '%s': %s", name, e, module="ollama_manager")
+            return False
+
+    def unload_idle(self):
+        now = time.monotonic()
+        for name, used in list(self._last_used.items()):
+            if name != self.current and now - used >= self.idle_unload:
+                self.unload(name)
+
+    def _start_reaper(self):
+        if self._reaper is None and self.idle_unload > 0:
+            self._reaper = threading.Thread(target=self._reap, name="ollama-idle-unload", daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(min(30, self.idle_unload))
+            self.unload_idle()
+
+    # === Generation ===
+    def generate(self, name, prompt, stats=None, **options):
+        # Yields response chunks as Ollama streams them; keeps the model resident
+        # afterwards. Ollama's token counts and durations land in `stats` (a dict).
+        payload = {"model": name, "prompt": prompt, "stream": True, "keep_alive": self.keep_alive}
+        if options:
+            payload["options"] = options
+        self._last_used[name] = time.monotonic()
+        start, outcome = time.perf_counter(), "error"
+        try:
+            with self._post("/api/generate", payload, stream=True) as r:
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama Error: {data['error']}")
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        timings = {k: v for k, v in data.items() if k.endswith(("_count", "_duration"))}
+                        self.last_stats = timings
+                        if stats is not None:
+                            stats.update(timings)
+                        metrics.inc("superbrain_ollama_tokens_total", timings.get("prompt_eval_count", 0),
+                                    model=name, kind="prompt")
+                        metrics.inc("superbrain_ollama_tokens_total", timings.get("eval_count", 0),
+                                    model=name, kind="completion")
+            outcome = "ok"
+        except GeneratorExit:
+            outcome = "cancelled"  # the caller stopped reading
+            raise
+        finally:
+            metrics.inc("superbrain_ollama_requests_total", model=name, outcome=outcome)
+            if outcome == "ok":
+                metrics.observe("superbrain_ollama_generation_seconds", time.perf_counter() - start, model=name)
+        self._last_used[name] = time.monotonic()
+
+    # === Downloads ===
+    def pull(self, name, on_done=None):
+        # Starts (or returns the running) background download of `name`.
+        # on_done(job) is called from the download thread when it ends.
+        with self._lock:
+            job = self.pulls.get(name)
+            if job is not None and not job.done:
+                return job
+            job = self.pulls[name] = PullJob(name)
+        threading.Thread(target=self._pull, args=(job, on_done), name=f"ollama-pull-{name}", daemon=True).start()
+        return job
+
+    def _pull(self, job, on_done):
+        try:
+            with self._pull_slots:
+                if job._cancelled.is_set():
+                    job.status = "cancelled"
+                    return
+                job.started = time.monotonic()
+                job.status = "starting"
+                with self._post("/api/pull", {"name": job.name, "model": job.name, "stream": True}, stream=True) as r:
+                    for line in r.iter_lines():
+                        if job._cancelled.is_set():
+                            job.status = "cancelled"  # closing the stream stops the download
+                            return
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if data.get("error"):
+                            raise RuntimeError(data["error"])
+                        job.update(data)
+                if job.status != "success":
+                    raise RuntimeError(f"pull ended with status '{job.status}'")
+            self.invalidate()
+            log_info("Pulled Ollama model '%s' (%s).", job.name, format_bytes(job.total), module="ollama_manager")
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            log_error("Pulling Ollama model '%s' failed: %s", job.name, e, module="ollama_manager")
+        finally:
+            job.finished = time.monotonic()
+            if on_done is not None:
+                on_done(job)
+
+    def active_pulls(self):
+        return [job for job in list(self.pulls.values()) if not job.done]
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_manager = None
+
+
+def get_manager():
+    global _manager
+    if _manager is None:
+        _manager = OllamaManager()
+    return _manager
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
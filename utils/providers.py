@@ -0,0 +1,155 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/providers.py
+#
+# Long-lived registry of cloud provider clients. API keys are decrypted once
+# per process, and each provider's SDK client (or a keep-alive requests
+# Session for Venice) is built on first use and then reused, so repeated
+# calls skip file I/O, decryption, client setup and TLS handshakes.
+# SDKs are imported only when their provider is first used.
+import os
+import base64
+import getpass
+import hashlib
+import threading
+from cryptography.fernet import Fernet
+
+KEY_FILES = {
+    "OpenAI": "~/.openai_api.enc",
+    "Claude": "~/.claude_api.enc",
+    "Gemini": "~/.gemini_api.enc",
+    "Groq": "~/.groq_api.enc",
+    "Venice": "~/.venice_api.enc"
+}
+
+VENICE_API_URL = "https://api.venice.ai/api/v1"
+
+# Per-provider deadline in seconds; override with SUPERBRAIN_TIMEOUT_<PROVIDER>.
+DEFAULT_TIMEOUT = float(os.getenv("SUPERBRAIN_PROVIDER_TIMEOUT", "60"))
+
+
+def provider_timeout(name):
+    return float(os.getenv(f"SUPERBRAIN_TIMEOUT_{name.upper()}", DEFAULT_TIMEOUT))
+
+
+def _fernet():
+    secret = hashlib.sha256(getpass.getuser().encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(secret[:32]))
+
+
+class ProviderRegistry:
+    def __init__(self, key_files=KEY_FILES, sdk_retries=None):
+        self.key_files = {name: os.path.expanduser(path) for name, path in key_files.items()}
+        # max_retries for the OpenAI/Anthropic/Groq SDKs; None keeps their default (2).
+        # Set to 0 before the first client() when utils.resilience does the retrying.
+        self.sdk_retries = sdk_retries
+        self._fernet = _fernet()
+        self._keys = {}
+        self._clients = {}
+        self._gemini_models = {}
+        self._lock = threading.RLock()
+
+    # === Keys ===
+    def key(self, name):
+        with self._lock:
+            if name not in self._keys:
+                self._keys[name] = self._read_key(name)
+            return self._keys[name]
+
+    def _read_key(self, name):
+        path = self.key_files[name]
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return self._fernet.decrypt(f.read()).decode()
+        except Exception:
+            return None
+
+    def save_key(self, name, api_key):
+        with self._lock:
+            with open(self.key_files[name], "wb") as f:
+                f.write(self._fernet.encrypt(api_key.encode()))
+            self._keys[name] = api_key
+            self._drop_client(name)
+
+    def forget_key(self, name):
+        with self._lock:
+            if os.path.exists(self.key_files[name]):
+                os.remove(self.key_files[name])
+            self._keys.pop(name, None)
+            self._drop_client(name)
+
+    # === Clients ===
+    def _drop_client(self, name):
+        client = self._clients.pop(name, None)
+        if name == "Gemini":
+            self._gemini_models.clear()
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+
+    def client(self, name):
+        # Returns the cached client for `name`, or None when no key is stored.
+        with self._lock:
+            if name not in self._clients:
+                key = self.key(name)
+                if not key:
+                    return None
+                self._clients[name] = self._build_client(name, key)
+            return self._clients[name]
+
+    def _build_client(self, name, key):
+        options = {"api_key": key, "timeout": provider_timeout(name)}
+        if self.sdk_retries is not None:
+            options["max_retries"] = self.sdk_retries
+        if name == "OpenAI":
+            from openai import OpenAI
+            return OpenAI(**options)
+        if name == "Claude":
+            from anthropic import Anthropic
+            return Anthropic(**options)
+        if name == "Groq":
+            from groq import Groq
+            return Groq(**options)
+        if name == "Gemini":
+            import google.generativeai as genai
+            genai.configure(api_key=key)
+            return genai
+        if name == "Venice":
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.headers.update({"Authorization": f"Bearer {key}", "Content-Type": "application/json"})
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            return session
+        raise ValueError(f"Unknown provider: {name}")
+
+    def gemini_model(self, model_name):
+        with self._lock:
+            genai = self.client("Gemini")
+            if genai is None:
+                return None
+            if model_name not in self._gemini_models:
+                self._gemini_models[model_name] = genai.GenerativeModel(model_name)
+            return self._gemini_models[model_name]
+
+    def close(self):
+        with self._lock:
+            for name in list(self._clients):
+                self._drop_client(name)
+
+
+registry = ProviderRegistry()
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
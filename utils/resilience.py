@@ -0,0 +1,326 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/resilience.py
+#
+# Wraps every cloud provider call in three things:
+#
+#   rate limit       a token bucket per provider, so batch runs stay under
+#                    the provider's requests-per-minute instead of meeting
+#                    429s (SUPERBRAIN_RPM_<PROVIDER>);
+#   retry            429, 5xx, timeouts and dropped connections are retried
+#                    with exponential backoff and full jitter, waiting at
+#                    least as long as the server's Retry-After says;
+#   circuit breaker  after SUPERBRAIN_BREAKER_FAILURES failures in a row a
+#                    provider is skipped for SUPERBRAIN_BREAKER_COOLDOWN
+#                    seconds, then a single trial call decides whether it
+#                    is back.
+#
+# Failures surface as ProviderError, never as a reply string, so callers
+# can't mistake an error for an answer (or save one to memory).
+#
+# Inside `with cancel_scope(event):` a call gives up (RequestCancelled) as
+# soon as the event is set instead of waiting for a token or a retry, which
+# is how hedged requests stop the losers.
+#
+#   reply = call("Groq", client.chat.completions.create, model=..., messages=...)
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from utils.logger import log_info, log_warning
+from utils import metrics
+
+MAX_RETRIES = int(os.getenv("SUPERBRAIN_RETRIES", "4"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+# Longest Retry-After we are willing to sit through; beyond it the call fails.
+MAX_RETRY_AFTER = 120.0
+BREAKER_FAILURES = int(os.getenv("SUPERBRAIN_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("SUPERBRAIN_BREAKER_COOLDOWN", "30"))
+
+# Requests per minute, roughly each provider's entry-tier limit.
+DEFAULT_RPM = {"OpenAI": 500, "Claude": 50, "Gemini": 15, "Groq": 30, "Venice": 20}
+DEFAULT_BURST = 5
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+# Exception class names the SDKs use for network trouble (no status code).
+TRANSIENT_ERRORS = {"APITimeoutError", "APIConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout",
+                    "ConnectionError", "DeadlineExceeded", "ServiceUnavailable", "InternalServerError"}
+
+
+class ProviderError(Exception):
+    def __init__(self, provider, message, status=None, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.provider = provider
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+    def __str__(self):
+        status = f" {self.status}" if self.status else ""
+        return f"{self.provider} Error{status}: {self.args[0]}"
+
+
+class CircuitOpenError(ProviderError):
+    pass
+
+
+class RequestCancelled(ProviderError):
+    pass
+
+
+_scope = threading.local()
+
+
+@contextmanager
+def cancel_scope(event):
+    # Calls made by this thread inside the block stop waiting once `event` is set.
+    previous = getattr(_scope, "event", None)
+    _scope.event = event
+    try:
+        yield event
+    finally:
+        _scope.event = previous
+
+
+def _cancel_event():
+    return getattr(_scope, "event", None)
+
+
+def _sleep(seconds, cancel):
+    # time.sleep that wakes early on cancellation; True if cancelled.
+    if cancel is None:
+        time.sleep(seconds)
+        return False
+    return cancel.wait(seconds)
+
+
+# === Error Classification ===
+def status_of(error):
+    for source in (error, getattr(error, "response", None)):
+        status = getattr(source, "status_code", None)
+        if isinstance(status, int):
+            return status
+    code = getattr(error, "code", None)  # google.api_core exceptions carry the HTTP status here
+    return code if isinstance(code, int) and 100 <= code < 600 else None
+
+
+def retry_after_of(error):
+    # Seconds from a Retry-After (or retry-after-ms) header, if the error carries one.
+    headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(provider, error):
+    # Any exception -> ProviderError with retryable/status/retry_after filled in.
+    if isinstance(error, ProviderError):
+        return error
+    status = status_of(error)
+    transient = isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in TRANSIENT_ERRORS
+    return ProviderError(provider, str(error) or type(error).__name__, status=status,
+                         retryable=transient or status in RETRYABLE_STATUS, retry_after=retry_after_of(error))
+
+
+# === Rate Limiting ===
+class TokenBucket:
+    def __init__(self, rate, burst=DEFAULT_BURST):
+        self.rate = rate  # tokens per second
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cancel=None):
+        # Blocks until a token is free; returns the seconds spent waiting, or None if cancelled.
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            if _sleep(delay, cancel):
+                return None
+            waited += delay
+
+
+# === Circuit Breaker ===
+class CircuitBreaker:
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False  # a half-open trial call is in flight
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    @property
+    def remaining(self):
+        # Seconds until the next trial call is allowed.
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def abandon(self):
+        # A call let through never ran (e.g. cancelled); let the next one be the trial.
+        with self._lock:
+            self.trial = False
+
+    def record(self, ok):
+        # Returns True when this failure opened the circuit.
+        with self._lock:
+            self.trial = False
+            if ok:
+                self.failures, self.opened_at = 0, None
+                return False
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                was_closed = self.opened_at is None
+                self.opened_at = time.monotonic()  # (re)start the cooldown
+                return was_closed
+            return False
+
+
+# === Guarded Calls ===
+class ProviderGuard:
+    def __init__(self, name, rpm=None, burst=DEFAULT_BURST, retries=MAX_RETRIES):
+        self.name = name
+        rpm = rpm or float(os.getenv(f"SUPERBRAIN_RPM_{name.upper()}", DEFAULT_RPM.get(name, 60)))
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.breaker = CircuitBreaker()
+        self.retries = retries
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0, "throttled_s": 0.0}
+
+    def call(self, fn, *args, **kwargs):
+        start, outcome = time.perf_counter(), "error"
+        try:
+            result = self._call(fn, *args, **kwargs)
+            outcome = "ok"
+            metrics.record_usage(self.name, result)
+            return result
+        except CircuitOpenError:
+            outcome = "rejected"
+            raise
+        except RequestCancelled:
+            outcome = "cancelled"
+            raise
+        finally:
+            metrics.inc("superbrain_provider_requests_total", provider=self.name, outcome=outcome)
+            if outcome in ("ok", "error"):
+                metrics.observe("superbrain_provider_latency_seconds", time.perf_counter() - start,
+                                provider=self.name)
+
+    def _call(self, fn, *args, **kwargs):
+        self.stats["calls"] += 1
+        cancel = _cancel_event()
+        for attempt in range(self.retries + 1):
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled(self.name, "cancelled")
+            if not self.breaker.allow():
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, f"circuit open after repeated failures; "
+                                                  f"next try in {self.breaker.remaining:.0f}s")
+            waited = self.bucket.acquire(cancel)
+            if waited is None:
+                self.breaker.abandon()
+                raise RequestCancelled(self.name, "cancelled while rate limited")
+            self.stats["throttled_s"] += waited
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error = classify(self.name, e)
+                # Client errors (bad key, bad request) say nothing about the provider's health.
+                if error.retryable and self.breaker.record(ok=False):
+                    log_warning("%s: circuit opened for %.0fs.", self.name, self.breaker.cooldown, module="resilience")
+                elif not error.retryable:
+                    self.breaker.record(ok=True)
+                if not error.retryable or attempt == self.retries:
+                    self.stats["failures"] += 1
+                    raise error from e
+                if error.retry_after is not None and error.retry_after > MAX_RETRY_AFTER:
+                    self.stats["failures"] += 1
+                    raise error from e
+                delay = backoff(attempt, error.retry_after)
+                self.stats["retries"] += 1
+                metrics.inc("superbrain_provider_retries_total", provider=self.name)
+                log_info("%s: %s; retry %d/%d in %.1fs.", self.name, error, attempt + 1, self.retries, delay,
+                         module="resilience", provider=self.name, status=error.status)
+                if _sleep(delay, cancel):
+                    raise RequestCancelled(self.name, "cancelled while backing off") from e
+                continue
+            self.breaker.record(ok=True)
+            return result
+
+    def summary(self):
+        s = self.stats
+        return (f"{self.name}: {s['calls']} calls, {s['retries']} retries, {s['failures']} failed, "
+                f"{s['rejected']} skipped by breaker, {s['throttled_s']:.1f}s throttled, circuit {self.breaker.state}")
+
+
+def backoff(attempt, retry_after=None):
+    # Full jitter: uniform in [0, base * 2^attempt], capped; never sooner than Retry-After.
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after) if retry_after is not None else delay
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def guard(name):
+    with _guards_lock:
+        if name not in _guards:
+            _guards[name] = ProviderGuard(name)
+        return _guards[name]
+
+
+def call(name, fn, *args, **kwargs):
+    return guard(name).call(fn, *args, **kwargs)
+
+
+def summary():
+    return [g.summary() for g in list(_guards.values()) if g.stats["calls"]]
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -11,33 +11,33 @@ def check_disk_space(threshold_percent=90):
     try:
         disk = psutil.disk_usage('/')  # Check root partition, adjust as needed
         if disk.percent > threshold_percent:
-            log_warning(f"Disk space nearing critical levels: {disk.percent}% used.", module="resource_monitor")
+            log_warning("Disk space nearing critical levels: %s%% used.", disk.percent, module="resource_monitor")
             return True
         return False
     except Exception as e:
-        log_warning(f"Error checking disk space: {e}", module="resource_monitor")
+        log_warning("Error checking disk space: %s", e, module="resource_monitor")
         return False
 
 def check_cpu_usage(threshold_percent=95, duration=1):
     try:
         cpu_percent = psutil.cpu_percent(interval=duration)
         if cpu_percent > threshold_percent:
-            log_warning(f"CPU usage high: {cpu_percent}% for {duration} second(s).", module="resource_monitor")
+            log_warning("CPU usage high: %s%% for %s second(s).", cpu_percent, duration, module="resource_monitor")
             return True
         return False
     except Exception as e:
-        log_warning(f"Error checking CPU usage: {e}", module="resource_monitor")
+        log_warning("Error checking CPU usage: %s", e, module="resource_monitor")
         return False
 
 def check_memory_usage(threshold_percent=90):
     try:
         memory = psutil.virtual_memory()
         if memory.percent > threshold_percent:
-            log_warning(f"Memory usage high: {memory.percent}% used.", module="resource_monitor")
+            log_warning("Memory usage high: %s%% used.", memory.percent, module="resource_monitor")
             return True
         return False
     except Exception as e:
-        log_warning(f"Error checking memory usage: {e}", module="resource_monitor")
+        log_warning("Error checking memory usage: %s", e, module="resource_monitor")
         return False
 
 def monitor_resources(check_interval=60):
@@ -0,0 +1,233 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/response_cache.py
+#
+# Response cache in front of every provider, keyed on
+# (provider, model, normalised prompt, parameters).
+#
+#   memory tier  LRU with TTL, per process
+#   disk tier    SQLite file in memory/, shared by all assistants
+#   semantic     optional: a miss falls back to the most similar cached
+#                prompt for the same provider/model/parameters when its
+#                cosine similarity clears the configured threshold. Prompt
+#                vectors persist in memory/response_cache_vectors/, one
+#                index per scope; a scope's index is brought up to date in
+#                the background on its first lookup, which misses until then.
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from utils.logger import log_info, log_warning
+from utils.memory_store import MEMORY_DIR
+
+CACHE_FILE = os.path.join(MEMORY_DIR, "response_cache.sqlite")
+CACHE_ENABLED = os.getenv("SUPERBRAIN_CACHE", "1") != "0"
+MEMORY_MAX_ENTRIES = int(os.getenv("SUPERBRAIN_CACHE_ENTRIES", "1024"))
+MEMORY_TTL = float(os.getenv("SUPERBRAIN_CACHE_TTL", str(6 * 3600)))
+DISK_TTL = float(os.getenv("SUPERBRAIN_CACHE_DISK_TTL", str(30 * 24 * 3600)))
+# e.g. 0.92; empty disables semantic hits.
+SEMANTIC_THRESHOLD = os.getenv("SUPERBRAIN_CACHE_SEMANTIC", "")
+SEMANTIC_WARM_ROWS = 10000
+SEMANTIC_MODEL = "all-MiniLM-L6-v2"
+
+
+def normalize_prompt(prompt):
+    return " ".join(prompt.split()).casefold()
+
+
+def _scope(provider, model, params):
+    return json.dumps([provider, model, params or {}], sort_keys=True, separators=(",", ":"))
+
+
+def cache_key(provider, model, prompt, params=None):
+    raw = _scope(provider, model, params) + "\n" + normalize_prompt(prompt)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_FILE, max_entries=MEMORY_MAX_ENTRIES, ttl=MEMORY_TTL, disk_ttl=DISK_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_ttl = disk_ttl
+        self._memory = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.RLock()
+        self._db = None
+        self._encoder = None
+        self._encoder_name = None
+        self.semantic_threshold = None
+        self.vector_dir = os.path.splitext(path)[0] + "_vectors"
+        self._semantic = {}  # scope -> PersistentEmbeddingIndex over normalised prompts, rows keyed by cache key
+        self._building = set()  # scopes whose index is being built
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0}
+
+    # === Disk Tier ===
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, scope TEXT, prompt TEXT, response TEXT, created REAL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses(scope, created)")
+        return self._db
+
+    def _disk_get(self, key):
+        row = self._conn().execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row and time.time() - row[1] <= self.disk_ttl:
+            return row[0]
+        return None
+
+    def _remember(self, key, response):
+        self._memory[key] = (time.monotonic() + self.ttl, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # === Semantic Tier ===
+    def enable_semantic(self, encoder, threshold, model_name=SEMANTIC_MODEL):
+        # encoder: list[str] -> L2-normalised vectors, e.g. the all-MiniLM-L6-v2
+        # encoder the local assistant already has loaded. model_name tells
+        # stored vectors from another model's apart.
+        with self._lock:
+            self._encoder = encoder
+            self._encoder_name = model_name
+            self.semantic_threshold = float(threshold)
+            self._semantic.clear()
+            self._building.clear()
+
+    def _semantic_index(self, scope):
+        # The scope's index, or None while it is built in the background.
+        index = self._semantic.get(scope)
+        if index is None and scope not in self._building:
+            self._building.add(scope)
+            threading.Thread(target=self._build_semantic, args=(scope, self._encoder, self._encoder_name),
+                             name="cache-semantic", daemon=True).start()
+        return index
+
+    def _build_semantic(self, scope, encoder, model_name):
+        # Opens the scope's stored vectors and encodes only the cached prompts
+        # they lack, without holding the cache lock while encoding.
+        from utils.embedding_index import PersistentEmbeddingIndex
+        try:
+            with self._lock:
+                rows = self._conn().execute(
+                    "SELECT key, prompt FROM responses WHERE scope = ? AND created >= ? ORDER BY created DESC LIMIT ?",
+                    (scope, time.time() - self.disk_ttl, SEMANTIC_WARM_ROWS)).fetchall()
+            prefix = os.path.join(self.vector_dir, hashlib.sha256(scope.encode("utf-8")).hexdigest()[:16])
+            index = PersistentEmbeddingIndex(encoder, prefix, model_name=model_name)
+            encoded = index.sync([prompt for _, prompt in rows], [key for key, _ in rows])
+        except Exception as e:
+            log_warning("Semantic cache index for %s failed: %s", scope, e, module="response_cache")
+            return  # the scope stays in _building, so lookups keep missing rather than retrying
+        with self._lock:
+            if self._encoder is not encoder:  # re-enabled meanwhile
+                return
+            self._semantic[scope] = index
+        if encoded:
+            log_info("Encoded %d cached prompts for semantic lookups in %s.", encoded, scope, module="response_cache")
+
+    def _semantic_get(self, scope, normalized):
+        index = self._semantic_index(scope)
+        if index is None:
+            return None
+        hits = index.search(normalized, top_k=1, similarity_threshold=self.semantic_threshold, with_keys=True)
+        return self._disk_get(hits[0][2]) if hits else None
+
+    # === Public API ===
+    def get(self, provider, model, prompt, params=None):
+        key = cache_key(provider, model, prompt, params)
+        with self._lock:
+            item = self._memory.get(key)
+            if item and item[0] > time.monotonic():
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return item[1]
+            response = self._disk_get(key)
+            if response is not None:
+                self._remember(key, response)
+                self.stats["disk_hits"] += 1
+                return response
+            if self._encoder is not None:
+                response = self._semantic_get(_scope(provider, model, params), normalize_prompt(prompt))
+                if response is not None:
+                    self.stats["semantic_hits"] += 1
+                    return response
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, provider, model, prompt, response, params=None):
+        key = cache_key(provider, model, prompt, params)
+        scope, normalized = _scope(provider, model, params), normalize_prompt(prompt)
+        with self._lock:
+            self._remember(key, response)
+            with self._conn() as db:
+                db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                           (key, scope, normalized, response, time.time()))
+            if self._encoder is not None and scope in self._semantic:
+                self._semantic[scope].add_many([normalized], [key])
+            self.stats["stores"] += 1
+
+    def purge_expired(self):
+        with self._lock, self._conn() as db:
+            return db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.disk_ttl,)).rowcount
+
+    def summary(self):
+        s = self.stats
+        hits = s["memory_hits"] + s["disk_hits"] + s["semantic_hits"]
+        lookups = hits + s["misses"]
+        rate = hits / lookups if lookups else 0.0
+        return (f"{hits}/{lookups} hits ({rate:.0%}): memory={s['memory_hits']} disk={s['disk_hits']} "
+                f"semantic={s['semantic_hits']} misses={s['misses']} stores={s['stores']}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class _DisabledCache:
+    def get(self, *args, **kwargs):
+        return None
+
+    def put(self, *args, **kwargs):
+        pass
+
+    def enable_semantic(self, *args, **kwargs):
+        pass
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            if not CACHE_ENABLED:
+                _cache = _DisabledCache()
+            else:
+                _cache = ResponseCache()
+                atexit.register(_log_summary)
+        return _cache
+
+
+def enable_semantic_from_env(encoder_factory):
+    # Turns on semantic hits when SUPERBRAIN_CACHE_SEMANTIC holds a threshold.
+    if SEMANTIC_THRESHOLD:
+        get_cache().enable_semantic(encoder_factory(), float(SEMANTIC_THRESHOLD))
+
+
+def _log_summary():
+    if any(_cache.stats.values()):
+        log_info("Response cache: %s", _cache.summary(), module="response_cache")
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -0,0 +1,79 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/sdk_updates.py
+#
+# Out-of-band SDK updates. In fast-start mode (the default) an assistant no
+# longer blocks on `pip install --upgrade` at launch: at most once per
+# SUPERBRAIN_SDK_UPDATE_INTERVAL the upgrade is started as a detached
+# background process and the new version is picked up on the next launch.
+# SUPERBRAIN_FAST_START=0 restores the old blocking update and key check.
+import os
+import sys
+import json
+import time
+import subprocess
+
+from utils.logger import log_info, log_warning
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAST_START = os.getenv("SUPERBRAIN_FAST_START", "1") != "0"
+UPDATE_INTERVAL = float(os.getenv("SUPERBRAIN_SDK_UPDATE_INTERVAL", str(24 * 3600)))
+STAMP_FILE = os.path.join(PROJECT_ROOT, "logs", "sdk_updates.json")
+
+
+def pip_command(package):
+    return [os.path.join(sys.prefix, "bin", "pip"), "install", "--upgrade", package, "--break-system-packages"]
+
+
+def _load_stamps():
+    try:
+        with open(STAMP_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_stamps(stamps):
+    os.makedirs(os.path.dirname(STAMP_FILE), exist_ok=True)
+    tmp = STAMP_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(stamps, f)
+    os.replace(tmp, STAMP_FILE)
+
+
+def update_due(package):
+    return time.time() - _load_stamps().get(package, 0) >= UPDATE_INTERVAL
+
+
+def schedule_sdk_update(package):
+    # Starts a detached pip upgrade if one is due; never waits for it.
+    if not update_due(package):
+        return False
+    stamps = _load_stamps()
+    stamps[package] = time.time()
+    _save_stamps(stamps)
+    log_path = os.path.join(os.path.dirname(STAMP_FILE), f"sdk_update_{package}.log")
+    try:
+        with open(log_path, "ab") as log:
+            subprocess.Popen(pip_command(package), stdout=log, stderr=subprocess.STDOUT,
+                             stdin=subprocess.DEVNULL, start_new_session=True)
+        log_info("Updating %s in the background; the new version loads on next launch.", package, module="sdk_updates")
+        return True
+    except OSError as e:
+        log_warning("Could not start background update for %s: %s", package, e, module="sdk_updates")
+        return False
+
+
+if __name__ == "__main__":
+    # Suitable for cron: python3 -m utils.sdk_updates openai anthropic groq google-generativeai
+    for name in sys.argv[1:]:
+        schedule_sdk_update(name)
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
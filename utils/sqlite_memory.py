@@ -0,0 +1,244 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/sqlite_memory.py
+#
+# Optional SQLite memory backend (SUPERBRAIN_MEMORY_BACKEND=sqlite).
+#
+# Same interface as the segment log in utils/memory_store.py, but entries
+# live in memory/memory.sqlite (WAL mode) with indexed timestamp, source and
+# model columns, so filtered lookups don't read the whole history, and an
+# FTS5 table over prompt/response/content for BM25 keyword search. Exact
+# names, hashes and identifiers that dense embeddings blur together are
+# found by keyword_search; hybrid_rank fuses both rankings.
+#
+# On first open an empty database imports the existing segment log (and,
+# through it, a legacy memory_db.json). The segment files are left as-is.
+import os
+import re
+import json
+import sqlite3
+import threading
+
+from utils.logger import log_info
+from utils.memory_store import MEMORY_DIR, FSYNC_POLICY, MemoryStore
+
+SQLITE_MEMORY_FILE = os.path.join(MEMORY_DIR, "memory.sqlite")
+# Columns stored natively; any other keys of an entry go to `extra` as JSON.
+COLUMNS = ("timestamp", "source", "model", "prompt", "response", "content")
+# fsync policy of the segment log mapped onto SQLite's synchronous levels.
+SYNCHRONOUS = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+RRF_K = 60
+# Terms found in more documents than this are left out of keyword queries:
+# they carry almost no BM25 weight but their posting lists dominate the cost.
+KEYWORD_MAX_DOCS = int(os.getenv("SUPERBRAIN_KEYWORD_MAX_DOCS", "1000"))
+KEYWORD_MAX_TERMS = 16
+# "_" and "-" stay inside tokens so snake_case and dashed identifiers are one
+# term. "." does not: it would glue a sentence's last word to its period.
+# Dotted names (v1.2.3, config.yaml) are matched as phrases instead.
+TOKENIZER = "unicode61 tokenchars '_-'"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT, source TEXT, model TEXT,
+    prompt TEXT, response TEXT, content TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS memories_timestamp ON memories(timestamp);
+CREATE INDEX IF NOT EXISTS memories_source ON memories(source, timestamp);
+CREATE INDEX IF NOT EXISTS memories_model ON memories(model, timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    prompt, response, content,
+    content='memories', content_rowid='id',
+    tokenize="{tokenizer}"
+);
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, prompt, response, content)
+    VALUES (new.id, new.prompt, new.response, new.content);
+END;
+""".format(tokenizer=TOKENIZER)
+
+
+def _row(entry):
+    native = {c: entry[c] for c in COLUMNS if isinstance(entry.get(c), str)}
+    extra = {k: v for k, v in entry.items() if k not in native}
+    return tuple(native.get(c) for c in COLUMNS) + (json.dumps(extra, ensure_ascii=False) if extra else None,)
+
+
+def _entry(row):
+    entry = {c: v for c, v in zip(COLUMNS, row) if v is not None}
+    if row[len(COLUMNS)]:
+        entry.update(json.loads(row[len(COLUMNS)]))
+    return entry
+
+
+def query_terms(query):
+    # Words and dotted identifiers, without a sentence's trailing period; the
+    # tokenizer splits "v1.2.3" into v1 2 3 and the quoted term matches them
+    # as a phrase.
+    terms = (t.strip(".").lower() for t in re.findall(r"[\w.\-]+", query))
+    return list(dict.fromkeys(t for t in terms if t))[:KEYWORD_MAX_TERMS]
+
+
+def match_expression(terms):
+    # Each word becomes a quoted FTS5 term, OR-ed together, so user text can't
+    # inject FTS syntax and any matching identifier counts.
+    return " OR ".join('"%s"' % t.replace('"', '""') for t in terms)
+
+
+class SqliteMemoryStore:
+    def __init__(self, path=SQLITE_MEMORY_FILE, fsync=FSYNC_POLICY):
+        self.path = path
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={SYNCHRONOUS.get(fsync, 'NORMAL')}")
+        self._retokenize()
+        self._db.executescript(_SCHEMA)
+        self.migrate_segments()
+
+    # === Writes ===
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        rows = [_row(e) for e in entries]
+        if not rows:
+            return
+        with self._lock, self._db:
+            self._db.executemany(f"INSERT INTO memories ({', '.join(COLUMNS)}, extra) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 rows)
+
+    # === Reads ===
+    def iter_entries(self):
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(COLUMNS)}, extra FROM memories ORDER BY id").fetchall()
+        for row in rows:
+            yield _entry(row)
+
+    def load(self):
+        return list(self.iter_entries())
+
+    def query(self, source=None, model=None, since=None, until=None, limit=None):
+        # Filtered read served from the column indexes, newest first.
+        clauses, args = [], []
+        for column, value in (("source", source), ("model", model)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            args.append(until)
+        sql = f"SELECT {', '.join(COLUMNS)}, extra FROM memories"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [_entry(row) for row in self._db.execute(sql, args)]
+
+    def _selective(self, terms):
+        # Probes each posting list up to KEYWORD_MAX_DOCS rows instead of
+        # counting it, so a stop word costs the same at 1k or 10M entries.
+        keep = []
+        for term in terms:
+            hits = self._db.execute("SELECT COUNT(*) FROM (SELECT rowid FROM memories_fts WHERE memories_fts MATCH ? "
+                                    "LIMIT ?)", (match_expression([term]), KEYWORD_MAX_DOCS)).fetchone()[0]
+            if 0 < hits < KEYWORD_MAX_DOCS:
+                keep.append(term)
+        return keep
+
+    def keyword_search(self, query, limit=5):
+        # Returns [(entry, score)], best first; score is -bm25 so higher is better.
+        # Only selective terms are matched; a query made purely of common
+        # words returns nothing and is left to dense retrieval.
+        with self._lock:
+            terms = self._selective(query_terms(query))
+        if not terms:
+            return []
+        expression = match_expression(terms)
+        sql = (f"SELECT {', '.join('m.' + c for c in COLUMNS)}, m.extra, bm25(memories_fts) "
+               "FROM memories_fts JOIN memories m ON m.id = memories_fts.rowid "
+               "WHERE memories_fts MATCH ? ORDER BY rank LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(sql, (expression, limit)).fetchall()
+        return [(_entry(row[:-1]), -row[-1]) for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    # === Migration ===
+    def _retokenize(self):
+        # Databases created with an older tokenizer get their FTS index rebuilt.
+        row = self._db.execute("SELECT sql FROM sqlite_master WHERE name = 'memories_fts'").fetchone()
+        if row is None or TOKENIZER in row[0]:
+            return
+        with self._db:
+            self._db.execute("DROP TABLE memories_fts")
+            self._db.executescript(_SCHEMA)
+            self._db.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+        log_info("Rebuilt the keyword index of %s with the current tokenizer.", self.path, module="sqlite_memory")
+
+    def migrate_segments(self, directory=None):
+        directory = directory or os.path.dirname(self.path)
+        has_log = os.path.isdir(os.path.join(directory, "segments")) or \
+            os.path.exists(os.path.join(directory, "memory_db.json"))
+        if not has_log or len(self):
+            return 0
+        store = MemoryStore(directory)
+        try:
+            count = 0
+            batch = []
+            for entry in store.iter_entries():
+                batch.append(entry)
+                if len(batch) >= 10000:
+                    self.append_many(batch)
+                    count += len(batch)
+                    batch = []
+            self.append_many(batch)
+            count += len(batch)
+        finally:
+            store.close()
+        if count:
+            log_info("Imported %d entries from the segment log into %s.", count, self.path, module="sqlite_memory")
+        return count
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def hybrid_rank(dense_hits, keyword_hits, top_k=5, keyword_weight=1.0, k=RRF_K):
+    # Reciprocal rank fusion of two [(text, score, entry id)] lists, returning
+    # [(text, fused score)]. Ranks rather than raw scores are fused because
+    # cosine and BM25 live on unrelated scales. Fusing on the entry id means a
+    # memory found as a dense passage and as a whole keyword record counts
+    # once, shown as the first text found for it (dense passages come first).
+    # Hits without an id are fused on their text.
+    fused, texts = {}, {}
+    for weight, hits in ((1.0, dense_hits), (keyword_weight, keyword_hits)):
+        seen = set()
+        for rank, hit in enumerate(hits):
+            entry = hit[2] if len(hit) > 2 else hit[0]
+            if entry in seen:
+                continue
+            seen.add(entry)
+            texts.setdefault(entry, hit[0])
+            fused[entry] = fused.get(entry, 0.0) + weight / (k + rank + 1)
+    ranked = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+    return [(texts[entry], score) for entry, score in ranked]
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
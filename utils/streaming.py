@@ -0,0 +1,194 @@
+# SuperBrain AI Platform
+# Created by David Louis-Charles (GitHub: KatchDaVizion)
+# © 2025 All Rights Reserved — https://github.com/KatchDaVizion
+
+# utils/streaming.py
+#
+# Token streaming for the assistants. Each stream_* function is a generator
+# of text chunks for one provider; stream_to_console prints them as they
+# arrive and returns the assembled answer with time-to-first-token and
+# throughput (tokens/sec as the provider counted them, chunks/sec when it
+# doesn't say), so callers can save the full answer to memory afterwards.
+import os
+import sys
+import json
+import time
+
+from utils.logger import log_info
+from utils import metrics
+
+# Streaming is on by default; SUPERBRAIN_STREAM=0 restores blocking replies.
+STREAM_ENABLED = os.getenv("SUPERBRAIN_STREAM", "1") != "0"
+
+
+# === Provider Streams ===
+# Each stream takes an optional `usage` dict and fills in the provider's own
+# token counts once the stream ends: "prompt_tokens"/"completion_tokens" from
+# the SDKs, Ollama's "eval_count"/"eval_duration". Pass the same dict to
+# stream_to_console so it reports real tokens/sec.
+def _record_usage(usage, reported):
+    if usage is None or reported is None:
+        return
+    get = reported.get if isinstance(reported, dict) else lambda k: getattr(reported, k, None)
+    prompt = get("prompt_tokens") or get("input_tokens") or get("prompt_token_count")
+    completion = get("completion_tokens") or get("output_tokens") or get("candidates_token_count")
+    if isinstance(prompt, int):
+        usage["prompt_tokens"] = prompt
+    if isinstance(completion, int):
+        usage["completion_tokens"] = completion
+
+
+def stream_chat_completion(client, model, messages, usage=None, **params):
+    # OpenAI and Groq share the chat.completions streaming shape. OpenAI sends
+    # usage only with stream_options={"include_usage": True}; Groq always
+    # sends it on the last chunk, under x_groq.
+    for chunk in client.chat.completions.create(model=model, messages=messages, stream=True, **params):
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        _record_usage(usage, getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None))
+
+
+def stream_claude(client, model, messages, max_tokens=1000, usage=None):
+    with client.messages.stream(model=model, max_tokens=max_tokens, messages=messages) as stream:
+        for text in stream.text_stream:
+            yield text
+        if usage is not None:
+            _record_usage(usage, stream.get_final_message().usage)
+
+
+def stream_gemini(model, prompt, usage=None, **params):
+    produced = False
+    for chunk in model.generate_content(prompt, stream=True, **params):
+        # .text raises ValueError when a chunk has no usable candidate
+        # (blocked by safety settings, or empty).
+        try:
+            text = chunk.text
+        except ValueError:
+            text = None
+        if text:
+            produced = True
+            yield text
+        _record_usage(usage, getattr(chunk, "usage_metadata", None))
+    if not produced:
+        raise RuntimeError("Gemini returned no text (response blocked or empty).")
+
+
+def stream_venice(session, url, payload, timeout=None, usage=None):
+    # Venice speaks OpenAI-style server-sent events: "data: {...}" lines, then "data: [DONE]".
+    with session.post(url, json={**payload, "stream": True}, stream=True, timeout=timeout) as r:
+        if r.status_code != 200:
+            raise RuntimeError(f"Venice Error {r.status_code}: {r.text}")
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            event = json.loads(data)
+            _record_usage(usage, event.get("usage"))
+            choices = event.get("choices") or [{}]
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+def stream_ollama(llm, prompt, usage=None):
+    yield from llm.stream(prompt, stats=usage)
+
+
+# === Console ===
+class StreamStats:
+    def __init__(self, source, usage=None):
+        self.source = source
+        self.usage = usage if usage is not None else {}
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.chunks = 0
+
+    def on_chunk(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.chunks += 1
+
+    @property
+    def ttft(self):
+        return (self.first_token or self.finished or time.perf_counter()) - self.started
+
+    @property
+    def total(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def tokens(self):
+        # Generated tokens as the provider counted them, or None if it didn't say.
+        return self.usage.get("eval_count") or self.usage.get("completion_tokens")
+
+    @property
+    def tokens_per_sec(self):
+        # Real tokens/sec when the provider reported a count, otherwise chunks/sec.
+        # Ollama also reports its own generation time (in nanoseconds).
+        if self.usage.get("eval_count") and self.usage.get("eval_duration"):
+            return self.usage["eval_count"] / (self.usage["eval_duration"] / 1e9)
+        generating = self.total - self.ttft
+        return (self.tokens or self.chunks) / generating if generating > 0 else 0.0
+
+    def __str__(self):
+        return self.summary()
+
+    def summary(self):
+        if self.tokens:
+            rate = f"{self.tokens} tokens {self.tokens_per_sec:.1f} tok/s"
+        else:
+            rate = f"{self.chunks} chunks {self.tokens_per_sec:.1f} chunks/s"
+        return f"{self.source}: ttft={self.ttft:.2f}s total={self.total:.2f}s {rate}"
+
+
+def stream_to_console(chunks, source, prefix="", usage=None, provider=None):
+    # Prints chunks as they arrive; returns (answer, StreamStats). `usage` is
+    # the dict handed to the stream, read once it ends. A cloud `provider`
+    # also gets the superbrain_provider_* metrics a utils.resilience call records.
+    stats = StreamStats(source, usage)
+    parts, outcome = [], "error"
+    if prefix:
+        sys.stdout.write(prefix)
+    try:
+        for chunk in chunks:
+            stats.on_chunk()
+            parts.append(chunk)
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+        outcome = "ok"
+    except KeyboardInterrupt:
+        outcome = "cancelled"
+        raise
+    finally:
+        stats.finished = time.perf_counter()
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+        _record_metrics(stats, provider, outcome)
+    log_info("%s", stats, module="streaming")
+    return "".join(parts), stats
+
+
+def _record_metrics(stats, provider, outcome):
+    if stats.first_token is not None:
+        metrics.observe("superbrain_stream_ttft_seconds", stats.ttft, source=stats.source)
+    if outcome == "ok" and stats.tokens:
+        metrics.observe("superbrain_stream_tokens_per_second", stats.tokens_per_sec, source=stats.source)
+    if provider is None:
+        return
+    metrics.inc("superbrain_provider_requests_total", provider=provider, outcome=outcome)
+    if outcome != "cancelled":
+        metrics.observe("superbrain_provider_latency_seconds", stats.total, provider=provider)
+    for kind in ("prompt", "completion"):
+        count = stats.usage.get(f"{kind}_tokens")
+        if isinstance(count, int):
+            metrics.inc("superbrain_provider_tokens_total", count, provider=provider, kind=kind)
+
+
+__author_id__ = "KatchDaVizion_2025_DLC_SIG"
+
+def check_license():
+    allowed_user = "David Louis-Charles"
+    return allowed_user in __author_id__
@@ -2,87 +2,68 @@
 # Created by David Louis-Charles (GitHub: KatchDaVizion)
 # © 2025 All Rights Reserved
 
-import os
-import json
-import requests
-import base64
-import getpass
-import hashlib
 from datetime import datetime, timezone
-from cryptography.fernet import Fernet
+from utils.memory_store import append_entry
+from utils.providers import registry, provider_timeout, VENICE_API_URL
+from utils.streaming import STREAM_ENABLED, stream_venice, stream_to_console
+from utils.response_cache import get_cache, enable_semantic_from_env
+from utils.embedding_index import lazy_sentence_transformer_encoder
+from utils import metrics
 
 # === CONFIG ===
-KEY_FILE = os.path.expanduser("~/.venice_api.enc")
-SECRET = hashlib.sha256(getpass.getuser().encode()).digest()
-FERNET_KEY = base64.urlsafe_b64encode(SECRET[:32])
-fernet = Fernet(FERNET_KEY)
-API_URL = "https://api.venice.ai/api/v1"
+API_URL = VENICE_API_URL
+TIMEOUT = provider_timeout("Venice")  # pooled sockets can stall; never wait forever
 
 # === ENCRYPTED API KEY ===
-def save_encrypted_api_key(api_key):
-    with open(KEY_FILE, "wb") as f:
-        f.write(fernet.encrypt(api_key.encode()))
-
-def load_encrypted_api_key():
-    if not os.path.exists(KEY_FILE):
-        return None
-    try:
-        with open(KEY_FILE, "rb") as f:
-            return fernet.decrypt(f.read()).decode()
-    except:
-        return None
-
-def get_valid_venice_key():
+# Returns the shared keep-alive Session, already carrying the auth header.
+def get_valid_venice_session():
     for _ in range(2):
-        api_key = load_encrypted_api_key()
-        if not api_key:
+        if not registry.key("Venice"):
             print("[🔐] Missing Venice API Key. Get yours at https://venice.ai/settings/api")
-            api_key = input("Paste Venice API Key: ").strip()
-            save_encrypted_api_key(api_key)
+            registry.save_key("Venice", input("Paste Venice API Key: ").strip())
         else:
             print("[🔑] Reusing encrypted Venice API Key.")
 
         # Quick test
+        session = registry.client("Venice")
         try:
-            headers = {"Authorization": f"Bearer {api_key}"}
-            r = requests.get(f"{API_URL}/models", headers=headers)
+            r = session.get(f"{API_URL}/models", timeout=TIMEOUT)
             if r.status_code == 200:
-                return api_key
+                return session
             else:
                 print(f"[❌] Venice API Error: {r.status_code} - {r.text}")
         except Exception as e:
             print(f"[!] Connection error: {e}")
 
-        os.remove(KEY_FILE)
+        registry.forget_key("Venice")
 
     print("[❌] Failed to authenticate with Venice API.")
     exit(1)
 
 # === MEMORY ===
-MEMORY_FILE = "memory/memory_db.json"
 SOURCE = "Venice"
 
 def save_to_memory(prompt, answer, model):
-    os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-    memory = []
-    if os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, "r") as f:
-            memory = json.load(f)
-    memory.append({
+    append_entry({
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "source": SOURCE,
         "model": model,
         "prompt": prompt,
         "response": answer
     })
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=2)
+
+# === CHAT ===
+def post_chat(session, payload):
+    # Blocking chat call; a non-200 reply raises so it counts as an error.
+    r = session.post(f"{API_URL}/chat/completions", json=payload, timeout=TIMEOUT)
+    if r.status_code != 200:
+        raise RuntimeError(f"Venice Error {r.status_code}: {r.text}")
+    return r.json()
 
 # === LIST AVAILABLE MODELS ===
-def list_models(api_key):
+def list_models(session):
     try:
-        headers = {"Authorization": f"Bearer {api_key}"}
-        r = requests.get(f"{API_URL}/models", headers=headers)
+        r = session.get(f"{API_URL}/models", timeout=TIMEOUT)
         if r.status_code == 200:
             data = r.json()
             models = data.get("models") or data
@@ -99,16 +80,18 @@ def list_models(api_key):
         print(f"[!] Error: {e}")
 
 # === VENICE CHAT LOOP ===
-def venice_chat(api_key):
+def venice_chat(session):
     model = "llama-3.3-70b"
     temperature = 1.0
+    cache = get_cache()
+    enable_semantic_from_env(lazy_sentence_transformer_encoder)
     print("\n🤖 [Venice Assistant] — Type 'exit' to quit. '/list_models' to view models, '/model <id>' to change.\n")
     while True:
         user_input = input("You: ").strip()
         if user_input.lower() in ("exit", "quit"):
             break
         elif user_input.lower() == "/list_models":
-            list_models(api_key)
+            list_models(session)
             continue
         elif user_input.lower().startswith("/model "):
             new_model = user_input.split("/model ", 1)[1].strip()
@@ -119,11 +102,13 @@ def venice_chat(api_key):
                 print("[!] No model specified.")
             continue
 
+        params = {"temperature": temperature}
+        cached = cache.get(SOURCE, model, user_input, params)
+        if cached is not None:
+            print("Venice (cached):", cached.strip())
+            continue
+
         try:
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
             payload = {
                 "model": model,
                 "messages": [
@@ -132,20 +117,24 @@ def venice_chat(api_key):
                 ],
                 "temperature": temperature
             }
-            r = requests.post(f"{API_URL}/chat/completions", headers=headers, json=payload)
-            if r.status_code == 200:
-                reply = r.json()["choices"][0]["message"]["content"]
-                print("Venice:", reply.strip())
+            if STREAM_ENABLED:
+                usage = {}
+                chunks = stream_venice(session, f"{API_URL}/chat/completions", payload, TIMEOUT, usage)
+                reply, _ = stream_to_console(chunks, SOURCE, prefix="Venice: ", usage=usage, provider=SOURCE)
+                cache.put(SOURCE, model, user_input, reply, params)
                 save_to_memory(user_input, reply, model)
-            else:
-                print(f"[Venice Error {r.status_code}]: {r.text}")
+                continue
+            reply = metrics.record_call(SOURCE, post_chat, session, payload)["choices"][0]["message"]["content"]
+            print("Venice:", reply.strip())
+            cache.put(SOURCE, model, user_input, reply, params)
+            save_to_memory(user_input, reply, model)
         except Exception as e:
             print(f"[!] Request failed: {e}")
 
 # === ENTRY POINT ===
 if __name__ == "__main__":
-    api_key = get_valid_venice_key()
-    venice_chat(api_key)
+    session = get_valid_venice_session()
+    venice_chat(session)
 
 # 🔒 Authorship Signature
 __author_id__ = "KatchDaVizion_2025_DLC_SIG"